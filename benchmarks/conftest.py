@@ -0,0 +1,136 @@
+"""
+Бенчмарки вью-функций приложения posts.
+
+Запуск: pytest benchmarks/ [--bench-preset small] [--bench-rounds 20]
+[--bench-update]. Перед замерами база заполняется командой
+generate_load_data, каждая вью вызывается через тестовый клиент,
+а метрики сравниваются с baselines.json. С --bench-update
+сравнения нет: результаты записываются как новые базовые значения.
+Допуски по времени задаются из окружения, см. benchmarks.harness.
+"""
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+from posts.models import Group, Post, UserStats
+
+from .harness import (load_baselines, measure, regressions,
+                      save_baselines)
+
+DEFAULT_PRESET: str = "small"
+DEFAULT_ROUNDS: int = 20
+SEED: int = 0
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--bench-preset", default=DEFAULT_PRESET,
+        help="Набор объёмов данных generate_load_data.",
+    )
+    group.addoption(
+        "--bench-rounds", type=int, default=DEFAULT_ROUNDS,
+        help="Сколько раз вызывать каждую вью.",
+    )
+    group.addoption(
+        "--bench-update", action="store_true",
+        help="Записать результаты как новые базовые значения.",
+    )
+
+
+def pytest_configure(config):
+    config.bench_results = {}
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if config.getoption("--bench-update") and config.bench_results:
+        save_baselines(
+            config.bench_results, preset=config.getoption("--bench-preset"),
+        )
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    results = getattr(config, "bench_results", {})
+    if not results:
+        return
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(
+        f"{'сценарий':40} {'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9} "
+        f"{'запросы':>8} {'байты':>9}"
+    )
+    for name, metrics in sorted(results.items()):
+        terminalreporter.write_line(
+            f"{name:40} {metrics['p50_ms']:>9} {metrics['p95_ms']:>9} "
+            f"{metrics['p99_ms']:>9} {metrics['queries']:>8} "
+            f"{metrics['bytes']:>9}"
+        )
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker, pytestconfig):
+    """Тестовая база один раз за сессию заполняется данными."""
+
+    with django_db_blocker.unblock():
+        call_command(
+            "generate_load_data",
+            preset=pytestconfig.getoption("--bench-preset"),
+            seed=SEED,
+        )
+
+
+@pytest.fixture(scope="session")
+def subjects(django_db_setup, django_db_blocker):
+    """
+    Самые нагруженные объекты набора данных: на них
+    вью работают дольше всего.
+    """
+
+    with django_db_blocker.unblock():
+        author = UserStats.objects.select_related("user").order_by(
+            "-posts_count",
+        ).first().user
+        reader = UserStats.objects.select_related("user").exclude(
+            user=author,
+        ).order_by("-following_count").first().user
+        post = Post.objects.order_by("-comments_count").first()
+        return {
+            "author": author,
+            "reader": reader,
+            "group": Group.objects.order_by("-posts_count").first(),
+            "post": post,
+            "own_post": Post.objects.filter(author=author).first(),
+            "query": post.text.split()[0],
+        }
+
+
+@pytest.fixture
+def benchmark(request, pytestconfig, settings):
+    """
+    Замеряет сценарий name: benchmark(name, send, before=None).
+    Тест падает, если метрики вышли за допуск относительно базовых.
+    Выборочное профилирование на время замеров выключено.
+    """
+
+    settings.PROFILING_SAMPLE_RATE = 0.0
+
+    preset = pytestconfig.getoption("--bench-preset")
+    baselines = load_baselines().get(preset, {})
+    cache.clear()
+
+    def run(name, send, before=None):
+        result = measure(
+            send, rounds=pytestconfig.getoption("--bench-rounds"),
+            before=before,
+        )
+        pytestconfig.bench_results[name] = result
+
+        if pytestconfig.getoption("--bench-update") or name not in baselines:
+            return result
+        found = regressions(result, baselines[name])
+        if found:
+            pytest.fail(f"{name}: " + "; ".join(found), pytrace=False)
+        return result
+
+    return run
@@ -0,0 +1,117 @@
+"""
+Замеры вью-функций для бенчмарков: перцентили времени ответа,
+количество SQL-запросов и размер ответа в байтах.
+Результаты сравниваются с базовыми значениями из baselines.json.
+
+Время в baselines.json снято на одной машине, поэтому допуски
+по времени задаются переменными окружения: BENCH_LATENCY_TOLERANCE
+(доля роста, например 2 на медленной машине CI, inf - не проверять)
+и BENCH_LATENCY_FLOOR_MS. Запросы и байты от машины не зависят.
+"""
+
+import json
+import math
+import os
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BASELINES_PATH: str = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines.json",
+)
+
+# допустимый рост относительно базового значения
+LATENCY_TOLERANCE: float = 0.5
+# и абсолютный запас на шум таймера для быстрых вью
+LATENCY_FLOOR_MS: float = 5.0
+LATENCY_TOLERANCE_ENV: str = "BENCH_LATENCY_TOLERANCE"
+LATENCY_FLOOR_ENV: str = "BENCH_LATENCY_FLOOR_MS"
+BYTES_TOLERANCE: float = 0.1
+QUERIES_TOLERANCE: int = 0
+
+LATENCY_METRICS: tuple = ("p50_ms", "p95_ms")
+
+
+def percentile(values, share: float) -> float:
+    """Перцентиль по методу ближайшего ранга."""
+
+    ordered = sorted(values)
+    rank = max(math.ceil(share * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def measure(send, rounds: int, before=None) -> dict:
+    """
+    Выполняет запрос send() rounds раз и возвращает метрики.
+    before() вызывается перед каждым запросом вне замера.
+    """
+
+    timings, queries, sizes = [], [], []
+    for _ in range(rounds):
+        if before is not None:
+            before()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = send()
+            elapsed = time.perf_counter() - started
+        assert response.status_code < 400, (
+            f"Вью ответила кодом {response.status_code}"
+        )
+        timings.append(elapsed * 1000)
+        queries.append(len(captured))
+        sizes.append(len(response.content))
+
+    return {
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "queries": max(queries),
+        "bytes": max(sizes),
+    }
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return default if value is None else float(value)
+
+
+def regressions(result: dict, baseline: dict) -> list:
+    """Описания метрик, которые вышли за допуск относительно baseline."""
+
+    found = []
+    tolerance = _env_float(LATENCY_TOLERANCE_ENV, LATENCY_TOLERANCE)
+    floor = _env_float(LATENCY_FLOOR_ENV, LATENCY_FLOOR_MS)
+
+    def check(metric, limit):
+        if metric in baseline and result[metric] > limit:
+            found.append(
+                f"{metric}: {result[metric]} > {round(limit, 3)} "
+                f"(база {baseline[metric]})"
+            )
+
+    for metric in LATENCY_METRICS:
+        check(metric, baseline.get(metric, 0) * (1 + tolerance) + floor)
+    check("queries", baseline.get("queries", 0) + QUERIES_TOLERANCE)
+    check("bytes", baseline.get("bytes", 0) * (1 + BYTES_TOLERANCE))
+    return found
+
+
+def load_baselines(path: str = BASELINES_PATH) -> dict:
+    """Базовые значения: {набор данных: {сценарий: метрики}}."""
+
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_baselines(results: dict, preset: str,
+                   path: str = BASELINES_PATH) -> None:
+    """Записывает результаты как новые базовые значения набора preset."""
+
+    baselines = load_baselines(path)
+    baselines.setdefault(preset, {}).update(results)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(baselines, file, indent=2, sort_keys=True)
+        file.write("\n")
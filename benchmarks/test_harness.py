@@ -0,0 +1,32 @@
+"""Допуски сравнения с базовыми значениями."""
+
+from .harness import (LATENCY_FLOOR_ENV, LATENCY_TOLERANCE_ENV,
+                      regressions)
+
+BASELINE = {"p50_ms": 10.0, "p95_ms": 20.0, "queries": 3, "bytes": 1000}
+RESULT = {"p50_ms": 40.0, "p95_ms": 50.0, "queries": 3, "bytes": 1000}
+
+
+def test_latency_over_default_tolerance_is_reported():
+    assert [line.split(":")[0] for line in regressions(RESULT, BASELINE)] == [
+        "p50_ms", "p95_ms",
+    ]
+
+
+def test_latency_tolerance_is_read_from_environment(monkeypatch):
+    monkeypatch.setenv(LATENCY_TOLERANCE_ENV, "3")
+    assert regressions(RESULT, BASELINE) == []
+
+    monkeypatch.setenv(LATENCY_TOLERANCE_ENV, "inf")
+    assert regressions({**RESULT, "p95_ms": 1e6}, BASELINE) == []
+
+
+def test_latency_floor_is_read_from_environment(monkeypatch):
+    monkeypatch.setenv(LATENCY_FLOOR_ENV, "30")
+    assert regressions(RESULT, BASELINE) == []
+
+
+def test_queries_ignore_latency_tolerance(monkeypatch):
+    monkeypatch.setenv(LATENCY_TOLERANCE_ENV, "inf")
+    found = regressions({**RESULT, "queries": 4}, BASELINE)
+    assert [line.split(":")[0] for line in found] == ["queries"]
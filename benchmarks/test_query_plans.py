@@ -0,0 +1,56 @@
+"""
+Планы запросов страниц на данных generate_load_data: страницы автора
+и сообщества, комментарии поста, подписки и подписчики выбираются
+по составным индексам, без сортировки во временном B-дереве.
+"""
+
+import pytest
+from django.db import connection
+
+from posts.constants import POSTS_PER_PAGE
+from posts.models import Follow
+
+# запрос как во вью и индекс, по которому он должен выполняться
+PLANS = {
+    "profile": (
+        lambda s: s["author"].posts.select_related("group").order_by(
+            "-created", "-pk",
+        )[:POSTS_PER_PAGE + 1],
+        "posts_post_author_created_idx",
+    ),
+    "group_posts": (
+        lambda s: s["group"].posts.select_related("author").order_by(
+            "-created", "-pk",
+        )[:POSTS_PER_PAGE + 1],
+        "posts_post_group_created_idx",
+    ),
+    "post_detail": (
+        lambda s: s["post"].comments.select_related("author").all(),
+        "posts_comment_post_created_idx",
+    ),
+    "follow_index": (
+        lambda s: Follow.objects.filter(
+            user=s["reader"],
+        ).values_list("author_id", flat=True),
+        "posts_follow_user_id_author_id",
+    ),
+    "followers": (
+        lambda s: Follow.objects.filter(
+            author=s["author"],
+        ).values_list("user_id", flat=True),
+        "posts_follow_author_user_idx",
+    ),
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", list(PLANS))
+def test_query_uses_index(subjects, name):
+    if connection.vendor != "sqlite":
+        pytest.skip("планы записаны для SQLite")
+    queryset, index = PLANS[name]
+
+    plan = queryset(subjects).explain()
+
+    assert index in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,92 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from posts.models import Follow
+
+# вью, аргументы URL и GET-параметры по объектам из фикстуры subjects
+READ_VIEWS = {
+    "index": lambda s: ({}, {}),
+    "follow_index": lambda s: ({}, {}),
+    "group_posts": lambda s: ({"slug": s["group"].slug}, {}),
+    "profile": lambda s: ({"username": s["author"].username}, {}),
+    "post_detail": lambda s: ({"post_id": s["post"].pk}, {}),
+    "search": lambda s: ({}, {"q": s["query"]}),
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("cache_state", ("cold", "warm"))
+@pytest.mark.parametrize("view", list(READ_VIEWS))
+def test_read_view(benchmark, client, subjects, view, cache_state):
+    kwargs, data = READ_VIEWS[view](subjects)
+    url = reverse(f"posts:{view}", kwargs=kwargs)
+    if view == "follow_index":
+        client.force_login(subjects["reader"])
+
+    def send():
+        return client.get(url, data)
+
+    if cache_state == "warm":
+        send()
+    benchmark(
+        f"posts:{view}[{cache_state}]",
+        send,
+        before=cache.clear if cache_state == "cold" else None,
+    )
+
+
+@pytest.mark.django_db
+def test_post_create(benchmark, client, subjects):
+    client.force_login(subjects["reader"])
+    url = reverse("posts:post_create")
+
+    benchmark(
+        "posts:post_create",
+        lambda: client.post(url, {
+            "text": "Новый пост для замера", "group": subjects["group"].pk,
+        }),
+    )
+
+
+@pytest.mark.django_db
+def test_post_edit(benchmark, client, subjects):
+    client.force_login(subjects["author"])
+    post = subjects["own_post"]
+    url = reverse("posts:post_edit", kwargs={"post_id": post.pk})
+
+    benchmark(
+        "posts:post_edit",
+        lambda: client.post(url, {
+            "text": "Исправленный текст поста", "group": subjects["group"].pk,
+        }),
+    )
+
+
+@pytest.mark.django_db
+def test_add_comment(benchmark, client, subjects):
+    client.force_login(subjects["reader"])
+    url = reverse("posts:add_comment", kwargs={"post_id": subjects["post"].pk})
+
+    benchmark(
+        "posts:add_comment",
+        lambda: client.post(url, {"text": "Комментарий для замера"}),
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view", ("profile_follow", "profile_unfollow"))
+def test_follow_toggle(benchmark, client, subjects, view):
+    reader, author = subjects["reader"], subjects["author"]
+    client.force_login(reader)
+    url = reverse(f"posts:{view}", kwargs={"username": author.username})
+
+    def reset():
+        follows = Follow.objects.filter(user=reader, author=author)
+        if view == "profile_follow":
+            for follow in follows:
+                follow.delete()
+        elif not follows.exists():
+            Follow.objects.create(user=reader, author=author)
+
+    benchmark(f"posts:{view}", lambda: client.get(url), before=reset)
@@ -0,0 +1,45 @@
+"""
+Файловое хранилище с адресацией по содержимому.
+
+Файл сохраняется под именем из SHA-256 его содержимого
+(posts/photo.jpg -> posts/<sha256>.jpg), поэтому повторная загрузка
+той же картинки не создаёт новый файл, а получает имя уже
+сохранённого. Время изменения такого файла при этом обновляется:
+сборщик мусора не трогает свежие файлы, поэтому картинку, которую
+только что загрузили повторно, он не удалит, пока сохраняется пост.
+"""
+
+import hashlib
+import os
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def hashed_name(self, name, content) -> str:
+        """Имя файла по содержимому в том же каталоге и с тем же типом."""
+
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        directory, filename = posixpath.split(name.replace("\\", "/"))
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(directory, digest.hexdigest() + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return self._save(name, content)
@@ -0,0 +1,272 @@
+"""
+Двухуровневый кэш: маленький LRU-кэш в памяти процесса (L1)
+перед общим для всех процессов кэшем (L2).
+
+Чтения сначала идут в L1 и только при промахе - в L2.
+Записи идут сквозь оба уровня. Запись поверх существующего значения
+и удаление записывают изменённые ключи в журнал в L2 под очередным
+номером. Каждый процесс не чаще раза в SYNC_INTERVAL секунд читает
+из журнала новые записи и выбрасывает из своего L1 только эти ключи,
+так что чужие изменения видны с задержкой не больше SYNC_INTERVAL.
+Весь L1 сбрасывается, только если журнал прочитать целиком нельзя:
+записи вытеснены, новых больше INVALIDATION_LOG_LIMIT или L2 очищен
+(очистка меняет эпоху журнала). Независимо от этого значение живёт
+в L1 не дольше L1_TIMEOUT секунд и не дольше своего TTL в L2,
+поэтому и запись журнала, потерянная при гонке неатомарного incr
+в L2, оставляет устаревшую копию не дольше L1_TIMEOUT.
+
+Пример настройки в settings.CACHES:
+
+    "default": {
+        "BACKEND": "core.backends.tiered.TieredCache",
+        "OPTIONS": {
+            "L2_CACHE": "shared",
+            "MAX_ENTRIES": 1000,
+            "L1_TIMEOUT": 5,
+            "SYNC_INTERVAL": 1,
+        },
+    },
+    "shared": {...},
+"""
+
+import pickle
+import time
+from collections import OrderedDict
+from threading import Lock
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+EPOCH_KEY: str = "tiered:epoch"
+SEQUENCE_KEY: str = "tiered:sequence"
+INVALIDATION_KEY_PREFIX: str = "tiered:invalidated"
+INVALIDATION_LOG_LIMIT: int = 1000
+
+
+class TieredCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._l2_alias = options.get("L2_CACHE", location)
+        self._l1_timeout = float(options.get("L1_TIMEOUT", 5))
+        self._sync_interval = float(options.get("SYNC_INTERVAL", 1))
+
+        self._l1 = OrderedDict()
+        self._lock = Lock()
+        self._epoch = None
+        self._sequence = 0
+        self._synced_at = 0.0
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    # L1
+
+    def _sync(self):
+        """Выбрасывает из L1 ключи, изменённые другими процессами."""
+
+        now = time.time()
+        if now - self._synced_at < self._sync_interval:
+            return
+        state = self.l2.get_many([EPOCH_KEY, SEQUENCE_KEY])
+        epoch = state.get(EPOCH_KEY)
+        sequence = state.get(SEQUENCE_KEY, 0)
+        if epoch is None:
+            self.l2.add(EPOCH_KEY, uuid4().hex, timeout=None)
+            epoch = self.l2.get(EPOCH_KEY)
+
+        stale = None
+        if epoch == self._epoch and sequence >= self._sequence:
+            stale = self._invalidated_keys(self._sequence, sequence)
+        with self._lock:
+            if stale is None:
+                self._l1.clear()
+            else:
+                for key in stale:
+                    self._l1.pop(key, None)
+            self._epoch = epoch
+            self._sequence = sequence
+            self._synced_at = now
+
+    def _invalidated_keys(self, seen, current):
+        """
+        Ключи L1 из записей журнала с номерами после seen до current
+        или None, если какой-то записи уже нет.
+        """
+
+        if current - seen > INVALIDATION_LOG_LIMIT:
+            return None
+        log_keys = [self._log_key(number)
+                    for number in range(seen + 1, current + 1)]
+        if not log_keys:
+            return []
+        entries = self.l2.get_many(log_keys)
+        if len(entries) != len(log_keys):
+            return None
+        return [key for keys in entries.values() for key in keys]
+
+    def _l1_get(self, key):
+        with self._lock:
+            item = self._l1.get(key)
+            if item is None:
+                return None
+            expires_at, pickled = item
+            if expires_at <= time.time():
+                del self._l1[key]
+                return None
+            self._l1.move_to_end(key)
+        return pickle.loads(pickled),
+
+    def _l1_set(self, key, value, expires_at):
+        local_expires_at = time.time() + self._l1_timeout
+        if expires_at is not None:
+            local_expires_at = min(local_expires_at, expires_at)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        with self._lock:
+            self._l1[key] = (local_expires_at, pickled)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self._max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_delete(self, key):
+        with self._lock:
+            self._l1.pop(key, None)
+
+    # журнал изменённых ключей
+
+    @staticmethod
+    def _log_key(number):
+        return f"{INVALIDATION_KEY_PREFIX}:{number}"
+
+    def _next_sequence(self):
+        if self.l2.add(SEQUENCE_KEY, 1, timeout=None):
+            return 1
+        try:
+            return self.l2.incr(SEQUENCE_KEY)
+        except ValueError:
+            self.l2.set(SEQUENCE_KEY, 1, timeout=None)
+            return 1
+
+    def _invalidate(self, *l1_keys):
+        """Записывает в журнал ключи, копии которых в L1 устарели."""
+
+        # копия в чужом L1 живёт не дольше L1_TIMEOUT, после этого
+        # запись журнала не нужна; её отсутствие сбросит весь L1
+        self.l2.set(
+            self._log_key(self._next_sequence()), list(l1_keys),
+            timeout=self._l1_timeout + self._sync_interval + 1,
+        )
+
+    # L2 хранит значение вместе с моментом истечения,
+    # чтобы L1 не держал его дольше, чем L2
+
+    def _relative_timeout(self, timeout):
+        if timeout == DEFAULT_TIMEOUT:
+            return self.default_timeout
+        return timeout
+
+    def _wrap(self, value, timeout):
+        return self.get_backend_timeout(timeout), value
+
+    # API кэша
+
+    def get(self, key, default=None, version=None):
+        l1_key = self.make_key(key, version=version)
+        self.validate_key(l1_key)
+        self._sync()
+
+        cached = self._l1_get(l1_key)
+        if cached is not None:
+            return cached[0]
+
+        wrapped = self.l2.get(key, version=version)
+        if wrapped is None:
+            return default
+        expires_at, value = wrapped
+        self._l1_set(l1_key, value, expires_at)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        for key in keys:
+            value = self.get(key, default=self, version=version)
+            if value is not self:
+                found[key] = value
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_key(key, version=version)
+        self.validate_key(l1_key)
+        timeout = self._relative_timeout(timeout)
+        wrapped = self._wrap(value, timeout)
+
+        if not self.l2.add(key, wrapped, timeout, version=version):
+            self.l2.set(key, wrapped, timeout, version=version)
+            self._invalidate(l1_key)
+        self._l1_set(l1_key, value, wrapped[0])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version=version)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        l1_key = self.make_key(key, version=version)
+        self.validate_key(l1_key)
+        timeout = self._relative_timeout(timeout)
+        wrapped = self._wrap(value, timeout)
+
+        if not self.l2.add(key, wrapped, timeout, version=version):
+            return False
+        self._l1_set(l1_key, value, wrapped[0])
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, default=self, version=version)
+        if value is self:
+            return False
+        self.set(key, value, timeout, version=version)
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        l1_key = self.make_key(key, version=version)
+        wrapped = self.l2.get(key, version=version)
+        if wrapped is None:
+            raise ValueError("Key '%s' not found" % key)
+        expires_at, value = wrapped
+        timeout = None
+        if expires_at is not None:
+            timeout = max(expires_at - time.time(), 0)
+        new_value = value + delta
+        self.l2.set(key, (expires_at, new_value), timeout, version=version)
+        self._invalidate(l1_key)
+        self._l1_set(l1_key, new_value, expires_at)
+        return new_value
+
+    def delete(self, key, version=None):
+        l1_key = self.make_key(key, version=version)
+        self.validate_key(l1_key)
+        self.l2.delete(key, version=version)
+        self._l1_delete(l1_key)
+        self._invalidate(l1_key)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        l1_keys = [self.make_key(key, version=version) for key in keys]
+        self.l2.delete_many(keys, version=version)
+        for l1_key in l1_keys:
+            self._l1_delete(l1_key)
+        self._invalidate(*l1_keys)
+
+    def has_key(self, key, version=None):
+        return self.get(key, default=self, version=version) is not self
+
+    def clear(self):
+        self.l2.clear()
+        with self._lock:
+            self._l1.clear()
+        self.l2.set(EPOCH_KEY, uuid4().hex, timeout=None)
@@ -0,0 +1,252 @@
+"""
+Версии для ключей кэша, кэширование страниц и валидаторы условных запросов.
+
+Вместо поиска и удаления всех зависимых записей кэша
+в их ключи подмешивается версия области (scope), а при изменении
+данных области версия просто заменяется на новую.
+"""
+
+import hashlib
+import math
+import random
+import time
+from collections import Counter
+from functools import wraps
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.views.decorators.http import condition
+
+from .metrics import PAGE_CACHE_EVENTS
+from .profiling import record_cache_event
+
+VERSION_KEY_PREFIX: str = "version"
+
+PAGE_LOCK_TIMEOUT_SECONDS: int = 30
+PAGE_LOCK_WAIT_SECONDS: float = 2.0
+PAGE_LOCK_POLL_SECONDS: float = 0.05
+PAGE_STALE_TIMEOUT_MULTIPLIER: int = 2
+PAGE_EARLY_REFRESH_BETA: float = 1.0
+
+page_cache_metrics = Counter()
+
+
+def _version_key(scope: str) -> str:
+    return f"{VERSION_KEY_PREFIX}:{scope}"
+
+
+def _new_version() -> str:
+    return uuid4().hex
+
+
+def get_versions(*scopes: str) -> list:
+    """
+    Текущие версии перечисленных областей.
+    Области без версии (новые или вытесненные из кэша) получают свежую,
+    поэтому старые записи кэша после вытеснения версии не оживают.
+    """
+
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes: str) -> None:
+    """Заменяет версии перечисленных областей на новые."""
+
+    cache.set_many(
+        {_version_key(scope): _new_version() for scope in scopes},
+        timeout=None,
+    )
+
+
+def page_etag(scopes):
+    """
+    Функция для декоратора django.views.decorators.http.condition:
+    ETag страницы по версиям её областей, без запросов к базе и рендера.
+    scopes устроена как в cache_page_versioned; если она вернула None,
+    ETag не выставляется. В ETag входят адрес страницы, пользователь
+    и CSRF-cookie, поэтому чужая или выданная до входа страница
+    не подтверждается ответом 304, и номер выкладки RELEASE.
+    """
+
+    def etag_func(request, *args, **kwargs):
+        page_scopes = scopes(request, *args, **kwargs)
+        if page_scopes is None:
+            return None
+        parts = [
+            _release(),
+            request.get_full_path(),
+            str(request.user.pk),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+            *get_versions(*page_scopes),
+        ]
+        return hashlib.md5("|".join(parts).encode()).hexdigest()
+    return etag_func
+
+
+def conditional_page(scopes):
+    """
+    Декоратор condition с page_etag, который оставляет ETag только
+    у ответов 200: страницы ошибок и перенаправления не подтверждаются.
+    """
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=page_etag(scopes))(view_func)
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                del response["ETag"]
+            return response
+        return _wrapped_view
+    return decorator
+
+
+def _count(key_prefix: str, event: str) -> None:
+    page_cache_metrics[(key_prefix, event)] += 1
+    PAGE_CACHE_EVENTS.labels(key_prefix, event).inc()
+    record_cache_event(event)
+
+
+def get_page_cache_metrics() -> dict:
+    """
+    Счётчики событий кэша страниц этого процесса:
+    {(key_prefix, событие): количество}. События - hit (свежая копия),
+    miss (страница собрана заново), stale (отдана устаревшая копия,
+    пока другой процесс пересобирает страницу), wait (дождались копии,
+    собранной другим процессом) и early_refresh (досрочная пересборка).
+    """
+
+    return dict(page_cache_metrics)
+
+
+def _release() -> str:
+    return str(getattr(settings, "RELEASE", ""))
+
+
+def _page_key(key_prefix: str, request) -> str:
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"page:{_release()}:{key_prefix}:{request.method}:{url}"
+
+
+def _wants_early_refresh(entry, timeout) -> bool:
+    """
+    Вероятностное досрочное обновление (XFetch): чем ближе конец
+    жизни копии и чем дольше собиралась страница, тем вероятнее,
+    что запрос возьмётся пересобрать её заранее.
+    """
+
+    remaining = entry["expires"] - time.time()
+    if remaining <= 0:
+        return True
+    jitter = -math.log(1.0 - random.random())
+    return entry["delta"] * PAGE_EARLY_REFRESH_BETA * jitter >= remaining
+
+
+def _is_cacheable(response) -> bool:
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and "private" not in response.get("Cache-Control", "")
+    )
+
+
+def _wait_for_rebuild(fresh_key):
+    """Ждёт копию страницы, которую пересобирает другой процесс."""
+
+    deadline = time.time() + PAGE_LOCK_WAIT_SECONDS
+    while time.time() < deadline:
+        time.sleep(PAGE_LOCK_POLL_SECONDS)
+        entry = cache.get(fresh_key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _render_and_store(view, timeout, fresh_key, stale_key):
+    """Собирает страницу и кладёт её в кэш как свежую и как запасную."""
+
+    started = time.time()
+    response = view()
+    if _is_cacheable(response):
+        entry = {
+            "response": response,
+            "expires": time.time() + timeout,
+            "delta": time.time() - started,
+        }
+        cache.set(fresh_key, entry, timeout)
+        cache.set(stale_key, entry, timeout * PAGE_STALE_TIMEOUT_MULTIPLIER)
+    return response
+
+
+def cache_page_versioned(timeout, key_prefix, scopes):
+    """
+    Кэширует страницу под ключом, в который входят версии областей.
+    scopes получает те же аргументы, что и view-функция,
+    и возвращает список областей, от которых зависит страница.
+    Замена версии любой из них делает закэшированную страницу недоступной,
+    поэтому timeout можно выбирать большим.
+
+    Защищает от лавины одинаковых пересборок: страницу пересобирает
+    только процесс, взявший блокировку, а остальные в это время отдают
+    последнюю собранную копию (даже устаревшей версии) или ждут новую.
+
+    Кэшируются только страницы для анонимных посетителей: декоратор
+    срабатывает раньше, чем SessionMiddleware добавит заголовок
+    Vary: Cookie, и иначе чужая персональная страница попала бы в кэш.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if (request.method not in ("GET", "HEAD")
+                    or request.user.is_authenticated):
+                return view_func(request, *args, **kwargs)
+
+            page_key = _page_key(key_prefix, request)
+            versions = get_versions(*scopes(request, *args, **kwargs))
+            fresh_key = ".".join([page_key, *versions])
+            stale_key = f"{page_key}.stale"
+            lock_key = f"{page_key}.lock"
+
+            entry = cache.get(fresh_key)
+            is_fresh = entry is not None
+            if is_fresh and not _wants_early_refresh(entry, timeout):
+                _count(key_prefix, "hit")
+                return entry["response"]
+            if not is_fresh:
+                entry = cache.get(stale_key)
+
+            locked = cache.add(lock_key, True, PAGE_LOCK_TIMEOUT_SECONDS)
+            if not locked and entry is not None:
+                _count(key_prefix, "hit" if is_fresh else "stale")
+                return entry["response"]
+            if not locked:
+                entry = _wait_for_rebuild(fresh_key)
+                if entry is not None:
+                    _count(key_prefix, "wait")
+                    return entry["response"]
+
+            try:
+                _count(key_prefix, "early_refresh" if is_fresh else "miss")
+                return _render_and_store(
+                    view=lambda: view_func(request, *args, **kwargs),
+                    timeout=timeout,
+                    fresh_key=fresh_key,
+                    stale_key=stale_key,
+                )
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,68 @@
+import glob
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.slow_queries import aggregate, read_log
+
+SORT_KEYS = ("total_ms", "max_ms", "avg_ms", "count")
+
+
+class Command(BaseCommand):
+    help = (
+        "Сводит журнал медленных SQL-запросов в топ слепков запросов "
+        "с вью, временем и планом самого медленного из них."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--log",
+            default=settings.SLOW_QUERY_LOG_FILE,
+            help="Файл журнала; его ротированные копии читаются тоже.",
+        )
+        parser.add_argument(
+            "--top", type=int, default=10,
+            help="Сколько слепков показать.",
+        )
+        parser.add_argument(
+            "--sort", choices=SORT_KEYS, default="total_ms",
+            help="По какой величине упорядочить слепки.",
+        )
+
+    def handle(self, *args, **options):
+        paths = sorted(glob.glob(glob.escape(options["log"]) + "*"))
+        if not paths:
+            raise CommandError(f"Журнал {options['log']} не найден")
+
+        entries = []
+        for path in paths:
+            with open(path, encoding="utf-8") as log:
+                entries.extend(read_log(log))
+        groups = sorted(
+            aggregate(entries), key=lambda group: group[options["sort"]],
+            reverse=True,
+        )[:options["top"]]
+
+        for place, group in enumerate(groups, 1):
+            self.write_group(place, group)
+        self.stdout.write(self.style.SUCCESS(
+            f"Записей: {len(entries)}, показано слепков: {len(groups)}"
+        ))
+
+    def write_group(self, place, group):
+        slowest = group["slowest"]
+        views = ", ".join(
+            f"{view} ({count})" for view, count in sorted(
+                group["views"].items(), key=lambda item: -item[1],
+            )
+        )
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{place}. всего {group['total_ms']} мс, "
+            f"запросов {group['count']}, среднее {group['avg_ms']} мс, "
+            f"наибольшее {group['max_ms']} мс"
+        ))
+        self.stdout.write(f"   вью: {views}")
+        self.stdout.write(f"   {group['fingerprint']}")
+        self.stdout.write(f"   параметры: {slowest.get('params')}")
+        for line in slowest.get("plan") or ():
+            self.stdout.write(f"   | {line}")
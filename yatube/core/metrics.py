@@ -0,0 +1,113 @@
+"""
+Метрики Prometheus, которые отдаёт вью metrics по адресу /metrics
+адресам из METRICS_ALLOWED_IPS и сотрудникам.
+
+Под gunicorn с несколькими воркерами каждый процесс считает своё,
+поэтому перед запуском в переменную PROMETHEUS_MULTIPROC_DIR
+записывается путь к пустому каталогу: процессы пишут значения
+в файлы в нём, а /metrics складывает их (multiprocess mode).
+Умершие воркеры отмечает хук child_exit из gunicorn.conf.py.
+
+Доля попаданий в кэш главной страницы:
+sum(rate(yatube_page_cache_events_total{cache="index_page",event="hit"}[5m]))
+/ sum(rate(yatube_page_cache_events_total{cache="index_page"}[5m]))
+"""
+
+import os
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+DB_QUERY_BUCKETS: tuple = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+UPLOAD_SIZE_BUCKETS: tuple = tuple(2 ** power * 1024 for power in range(4, 15))
+DB_OPERATIONS: frozenset = frozenset(
+    ("SELECT", "INSERT", "UPDATE", "DELETE", "SAVEPOINT", "RELEASE"),
+)
+
+VIEW_LATENCY = Histogram(
+    "yatube_view_latency_seconds",
+    "Время ответа по имени URL.",
+    ("view", "method", "status"),
+)
+PAGE_CACHE_EVENTS = Counter(
+    "yatube_page_cache_events_total",
+    "События кэша страниц (см. core.cache.get_page_cache_metrics).",
+    ("cache", "event"),
+)
+DB_QUERIES = Histogram(
+    "yatube_db_query_duration_seconds",
+    "Время SQL-запросов, выполненных при обработке запросов.",
+    ("alias", "operation"),
+    buckets=DB_QUERY_BUCKETS,
+)
+THUMBNAIL_SECONDS = Histogram(
+    "yatube_thumbnail_generation_seconds",
+    "Время построения миниатюр картинки поста.",
+    ("source",),
+)
+UPLOAD_BYTES = Histogram(
+    "yatube_image_upload_bytes",
+    "Размер загруженных картинок до обработки.",
+    buckets=UPLOAD_SIZE_BUCKETS,
+)
+
+
+def _db_wrapper(alias: str):
+    def wrapper(execute, sql, params, many, context):
+        operation = sql.lstrip().split(None, 1)[0].upper() if sql else ""
+        if operation not in DB_OPERATIONS:
+            operation = "OTHER"
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            DB_QUERIES.labels(alias, operation).observe(
+                time.perf_counter() - started,
+            )
+    return wrapper
+
+
+class MetricsMiddleware:
+    """Замеряет время ответа и SQL-запросы каждого запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    _db_wrapper(connection.alias),
+                ))
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        VIEW_LATENCY.labels(
+            match.view_name if match else "unresolved",
+            request.method,
+            f"{response.status_code // 100}xx",
+        ).observe(time.perf_counter() - started)
+        return response
+
+
+def get_registry():
+    """Реестр для /metrics: общий по процессам, если задан каталог."""
+
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics() -> tuple:
+    """Текст метрик в формате Prometheus и его content type."""
+
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
@@ -0,0 +1,194 @@
+"""
+Выборочное профилирование запросов в продакшене.
+
+ProfilingMiddleware замеряет долю запросов PROFILING_SAMPLE_RATE:
+имя вью, число и время SQL-запросов, время рендеринга шаблонов,
+события кэша страниц, а при PROFILING_TRACE_MEMORY и пик выделенной
+памяти (tracemalloc замедляет весь процесс, поэтому выключен). Запись попадает
+в кольцевой буфер процесса (последние PROFILING_BUFFER_SIZE штук,
+их отдаёт вью profiling_report) и одной JSON-строкой в лог
+core.profiling. Запросы вне выборки не замеряются вовсе.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.utils import timezone
+
+DEFAULT_SAMPLE_RATE: float = 0.0
+DEFAULT_BUFFER_SIZE: int = 1000
+DEFAULT_TRACE_MEMORY: bool = False
+
+logger = logging.getLogger(__name__)
+
+records = deque(
+    maxlen=getattr(settings, "PROFILING_BUFFER_SIZE", DEFAULT_BUFFER_SIZE),
+)
+
+_current: ContextVar = ContextVar("profile", default=None)
+
+# tracemalloc общий на процесс: пик памяти одновременно
+# замеряет только один поток, остальные пишут peak_kb = None
+_memory_lock = threading.Lock()
+
+
+class Profile:
+    """Метрики одного запроса; сам служит обёрткой SQL-запросов."""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+        self.render_depth = 0
+        self.cache = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_seconds += time.perf_counter() - started
+
+    def as_record(self, request, response, seconds: float,
+                  peak: Optional[int]) -> dict:
+        match = request.resolver_match
+        return {
+            "time": timezone.now().isoformat(),
+            "view": match.view_name if match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(seconds * 1000, 2),
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_seconds * 1000, 2),
+            "render_ms": round(self.render_seconds * 1000, 2),
+            "cache": dict(self.cache),
+            "peak_kb": None if peak is None else round(peak / 1024, 1),
+        }
+
+
+def record_cache_event(event: str) -> None:
+    """Учитывает событие кэша в профиле текущего запроса, если он есть."""
+
+    profile = _current.get()
+    if profile is not None:
+        profile.cache[event] += 1
+
+
+def _install_render_hook() -> None:
+    """
+    Оборачивает Template.render, чтобы считать время рендеринга.
+    Вложенные шаблоны ({% include %}) входят во время внешнего.
+    """
+
+    if getattr(Template.render, "profiled", False):
+        return
+    original = Template.render
+
+    def render(self, context):
+        profile = _current.get()
+        if profile is None:
+            return original(self, context)
+        profile.render_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            profile.render_depth -= 1
+            if not profile.render_depth:
+                profile.render_seconds += time.perf_counter() - started
+
+    render.profiled = True
+    Template.render = render
+
+
+class _PeakMemory:
+    """Замер пика памяти через tracemalloc, если он никем не занят."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def __enter__(self):
+        self.peak = None
+        self.locked = self.enabled and _memory_lock.acquire(blocking=False)
+        if not self.locked:
+            return self
+        self.was_tracing = tracemalloc.is_tracing()
+        if self.was_tracing:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.locked:
+            return
+        self.peak = tracemalloc.get_traced_memory()[1]
+        if not self.was_tracing:
+            tracemalloc.stop()
+        _memory_lock.release()
+
+
+class ProfilingMiddleware:
+    """Профилирует случайную долю запросов PROFILING_SAMPLE_RATE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _install_render_hook()
+
+    def __call__(self, request):
+        rate = getattr(settings, "PROFILING_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)
+        if random.random() >= rate:
+            return self.get_response(request)
+
+        profile = Profile()
+        token = _current.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                memory = stack.enter_context(_PeakMemory(enabled=getattr(
+                    settings, "PROFILING_TRACE_MEMORY", DEFAULT_TRACE_MEMORY,
+                )))
+                started = time.perf_counter()
+                response = self.get_response(request)
+                seconds = time.perf_counter() - started
+        finally:
+            _current.reset(token)
+
+        record = profile.as_record(request, response, seconds, memory.peak)
+        records.append(record)
+        logger.info(json.dumps(record, ensure_ascii=False))
+        return response
+
+
+def summarize(items) -> dict:
+    """Средние метрики записей items по именам вью."""
+
+    groups = {}
+    for record in items:
+        groups.setdefault(record["view"], []).append(record)
+    return {
+        str(view): {
+            "count": len(group),
+            **{
+                f"avg_{metric}": round(
+                    sum(record[metric] for record in group) / len(group), 2,
+                )
+                for metric in ("total_ms", "sql_count", "sql_ms", "render_ms")
+            },
+        }
+        for view, group in groups.items()
+    }
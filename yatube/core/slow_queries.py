@@ -0,0 +1,189 @@
+"""
+Журнал медленных SQL-запросов.
+
+SlowQueryMiddleware оборачивает выполнение SQL на время запроса
+и пишет в лог core.slow_queries каждый запрос к базе дольше
+SLOW_QUERY_THRESHOLD_MS: имя вью, слепок запроса (SQL без значений,
+одинаковый для запросов, отличающихся только параметрами), сам SQL
+и план из EXPLAIN. Записи - JSON-строки в файле SLOW_QUERY_LOG_FILE,
+команда slow_query_report сводит их в топ.
+
+Параметры пишутся только у SELECT к таблицам, кроме пользователей
+и сессий: в остальных запросах бывают хэши паролей, данные сессий
+и тексты, которые пользователь ещё не опубликовал.
+"""
+
+import json
+import logging
+import re
+import time
+from contextlib import ExitStack
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+DEFAULT_THRESHOLD_MS: float = 100.0
+MAX_PARAM_LENGTH: int = 200
+REDACTED_PARAMS: str = "<скрыты>"
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+_SENSITIVE_TABLE = re.compile(r"\b(?:auth_\w+|django_session)\b")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Слепок запроса: значения и параметры заменены на ?, списки IN (...)
+    любой длины сведены к одному виду, пробелы схлопнуты.
+    """
+
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def _is_select(sql: str) -> bool:
+    return sql.lstrip()[:6].upper() == "SELECT"
+
+
+def _loggable(sql: str, params):
+    """Параметры запроса для журнала или REDACTED_PARAMS."""
+
+    if params is None:
+        return None
+    if not _is_select(sql) or _SENSITIVE_TABLE.search(sql):
+        return REDACTED_PARAMS
+    loggable = []
+    for value in params:
+        if isinstance(value, (bytes, memoryview)):
+            value = f"<{len(value)} байт>"
+        elif not isinstance(value, (int, float, bool, type(None))):
+            value = str(value)[:MAX_PARAM_LENGTH]
+        loggable.append(value)
+    return loggable
+
+
+def explain(connection, sql: str, params) -> Optional[list]:
+    """
+    План запроса SELECT строками, как его отдаёт EXPLAIN базы,
+    или None, если запрос не SELECT или база его не объясняет.
+    """
+
+    if not _is_select(sql):
+        return None
+    if not connection.features.supports_explaining_query_execution:
+        return None
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            return [str(row[-1]) for row in cursor.fetchall()]
+    except DatabaseError:
+        return None
+
+
+class _SlowQueryRecorder:
+    """Обёртка SQL-запросов одного соединения в рамках одного запроса."""
+
+    def __init__(self, request, connection, threshold_ms: float):
+        self.request = request
+        self.connection = connection
+        self.threshold = threshold_ms / 1000
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        seconds = time.perf_counter() - started
+        if seconds >= self.threshold:
+            self.record(sql, params, many, seconds)
+        return result
+
+    def record(self, sql, params, many, seconds) -> None:
+        self.explaining = True
+        try:
+            plan = None if many else explain(self.connection, sql, params)
+        finally:
+            self.explaining = False
+        match = self.request.resolver_match
+        logger.warning(json.dumps({
+            "time": timezone.now().isoformat(),
+            "view": match.view_name if match else None,
+            "alias": self.connection.alias,
+            "duration_ms": round(seconds * 1000, 2),
+            "fingerprint": fingerprint(sql),
+            "sql": sql,
+            "params": None if many else _loggable(sql, params),
+            "plan": plan,
+        }, ensure_ascii=False))
+
+
+class SlowQueryMiddleware:
+    """Пишет в журнал SQL-запросы дольше SLOW_QUERY_THRESHOLD_MS."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = getattr(
+            settings, "SLOW_QUERY_THRESHOLD_MS", DEFAULT_THRESHOLD_MS,
+        )
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    _SlowQueryRecorder(request, connection, threshold),
+                ))
+            return self.get_response(request)
+
+
+def read_log(lines: Iterable[str]):
+    """Записи журнала из строк lines; чужие строки пропускаются."""
+
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(entry, dict) and "fingerprint" in entry:
+            yield entry
+
+
+def aggregate(entries) -> list:
+    """
+    Сводка записей по слепкам: число, суммарное, среднее
+    и наибольшее время, вью и самый медленный пример с планом.
+    """
+
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry["fingerprint"], {
+            "fingerprint": entry["fingerprint"],
+            "count": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+            "views": {},
+            "slowest": entry,
+        })
+        group["count"] += 1
+        group["total_ms"] += entry["duration_ms"]
+        view = str(entry.get("view"))
+        group["views"][view] = group["views"].get(view, 0) + 1
+        if entry["duration_ms"] >= group["max_ms"]:
+            group["max_ms"] = entry["duration_ms"]
+            group["slowest"] = entry
+
+    for group in groups.values():
+        group["total_ms"] = round(group["total_ms"], 2)
+        group["avg_ms"] = round(group["total_ms"] / group["count"], 2)
+    return list(groups.values())
@@ -0,0 +1,157 @@
+"""
+Стемминг русских слов по алгоритму Snowball (Russian stemmer):
+окончания и суффиксы отсекаются по таблицам, без словаря.
+https://snowballstem.org/algorithms/russian/stemmer.html
+"""
+
+import re
+from functools import lru_cache
+
+VOWELS: str = "аеиоуыэюя"
+STEM_CACHE_SIZE: int = 100_000
+
+# окончания первых групп отсекаются, только если перед ними а или я
+PERFECTIVE_GERUND = (
+    ("в", "вши", "вшись"),
+    ("ив", "ивши", "ившись", "ыв", "ывши", "ывшись"),
+)
+ADJECTIVE = (
+    (),
+    ("ее", "ие", "ые", "ое", "ими", "ыми", "ей", "ий", "ый", "ой", "ем",
+     "им", "ым", "ом", "его", "ого", "ему", "ому", "их", "ых", "ую", "юю",
+     "ая", "яя", "ою", "ею"),
+)
+PARTICIPLE = (
+    ("ем", "нн", "вш", "ющ", "щ"),
+    ("ивш", "ывш", "ующ"),
+)
+REFLEXIVE = ((), ("ся", "сь"))
+VERB = (
+    ("ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но", "ет",
+     "ют", "ны", "ть", "ешь", "нно"),
+    ("ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей", "уй",
+     "ил", "ыл", "им", "ым", "ен", "ило", "ыло", "ено", "ят", "ует", "уют",
+     "ит", "ыт", "ены", "ить", "ыть", "ишь", "ую", "ю"),
+)
+NOUN = (
+    (),
+    ("а", "ев", "ов", "ие", "ье", "е", "иями", "ями", "ами", "еи", "ии",
+     "и", "ией", "ей", "ой", "ий", "й", "иям", "ям", "ием", "ем", "ам", "ом",
+     "о", "у", "ах", "иях", "ях", "ы", "ь", "ию", "ью", "ю", "ия", "ья", "я"),
+)
+DERIVATIONAL = ((), ("ост", "ость"))
+SUPERLATIVE = ((), ("ейше", "ейш"))
+
+CYRILLIC_WORD_RE = re.compile(r"^[а-я]+$")
+
+
+def _regions(word: str):
+    """Начала областей RV и R2 по правилам Snowball."""
+
+    rv = len(word)
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+
+    def next_region(start):
+        for i in range(start + 1, len(word)):
+            if word[i] not in VOWELS and word[i - 1] in VOWELS:
+                return i + 1
+        return len(word)
+
+    r1 = next_region(0)
+    return rv, next_region(r1)
+
+
+@lru_cache(maxsize=None)
+def _candidates(groups) -> tuple:
+    """
+    Окончания групп groups от длинных к коротким вместе с признаком,
+    что перед окончанием должна стоять а или я.
+    """
+
+    preceded, plain = groups
+    return tuple(sorted(
+        [(ending, True) for ending in preceded]
+        + [(ending, False) for ending in plain],
+        key=lambda item: len(item[0]),
+        reverse=True,
+    ))
+
+
+def _strip(rv: str, groups) -> str:
+    """
+    Отсекает от rv самое длинное окончание из groups.
+    Возвращает None, если ни одно окончание не подошло.
+    """
+
+    for ending, needs_a in _candidates(groups):
+        if not rv.endswith(ending):
+            continue
+        stem = rv[:-len(ending)]
+        if needs_a and not stem.endswith(("а", "я")):
+            continue
+        return stem
+    return None
+
+
+def _strip_inflection(rv: str) -> str:
+    """Шаг 1: деепричастие или возвратность и словоизменение."""
+
+    stem = _strip(rv, PERFECTIVE_GERUND)
+    if stem is not None:
+        return stem
+
+    stem = _strip(rv, REFLEXIVE)
+    if stem is not None:
+        rv = stem
+    stem = _strip(rv, ADJECTIVE)
+    if stem is not None:
+        participle = _strip(stem, PARTICIPLE)
+        return participle if participle is not None else stem
+    for groups in (VERB, NOUN):
+        stem = _strip(rv, groups)
+        if stem is not None:
+            return stem
+    return rv
+
+
+# слов в языке немного, а в текстах они повторяются
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem_russian(word: str) -> str:
+    """
+    Основа русского слова.
+    Остальные слова только приводятся к нижнему регистру.
+    """
+
+    word = word.lower().replace("ё", "е")
+    if not CYRILLIC_WORD_RE.match(word):
+        return word
+
+    rv_start, r2_start = _regions(word)
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    rv = _strip_inflection(rv)
+
+    # шаг 2
+    if rv.endswith("и"):
+        rv = rv[:-1]
+
+    # шаг 3: словообразовательный суффикс, только внутри R2
+    r2 = max(r2_start - rv_start, 0)
+    stem = _strip(rv, DERIVATIONAL)
+    if stem is not None and len(stem) >= r2:
+        rv = stem
+
+    # шаг 4
+    if rv.endswith("нн"):
+        rv = rv[:-1]
+    else:
+        stem = _strip(rv, SUPERLATIVE)
+        if stem is not None:
+            rv = stem[:-1] if stem.endswith("нн") else stem
+        elif rv.endswith("ь"):
+            rv = rv[:-1]
+
+    return prefix + rv
@@ -2,6 +2,8 @@ from django import template
 
 register = template.Library()
 
+PAGE_WINDOW_SIZE: int = 3
+
 
 @register.filter
 def addclass(field, css):
@@ -15,6 +17,44 @@ def count_items(queryset):
     return queryset.count()
 
 
+@register.filter
+def page_window(page, size=PAGE_WINDOW_SIZE):
+    """
+    Номера страниц для навигации: первая, последняя и по size страниц
+    вокруг текущей. Пропуски между ними обозначаются через None.
+    """
+
+    last = page.paginator.num_pages
+    numbers = sorted(
+        {1, last} | set(
+            range(max(page.number - size, 1),
+                  min(page.number + size, last) + 1)
+        )
+    )
+
+    window = []
+    for number in numbers:
+        if window and number - window[-1] > 1:
+            window.append(None)
+        window.append(number)
+    return window
+
+
+@register.simple_tag(takes_context=True)
+def replace_query(context, **params):
+    """
+    Строка запроса текущей страницы с заменёнными параметрами.
+    Параметры со значением None из неё убираются.
+    """
+
+    query = context["request"].GET.copy()
+    for key, value in params.items():
+        query.pop(key, None)
+        if value is not None:
+            query[key] = value
+    return query.urlencode()
+
+
 @register.filter
 def uglify(text: str) -> str:
     """иЗмЕнЯеТ РеГиСтР БуКв нА ВоТ ТаКоЙ"""
@@ -0,0 +1,69 @@
+"""
+Проверки количества SQL-запросов для тестов вью-функций.
+
+Бюджет запросов задаётся на имя URL, а рост данных на странице
+не должен менять число запросов: иначе в шаблоне или во вью
+завёлся N+1 (обращение к связанному объекту в цикле).
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin:
+    """
+    Примесь к TestCase с проверками количества SQL-запросов.
+    Запросы, выполненные в prepare_request, не считаются.
+    """
+
+    def prepare_request(self, name: str) -> None:
+        """Готовит данные перед каждым замером страницы name."""
+
+    def count_queries(self, name: str, send):
+        """Выполняет send() и возвращает (ответ, выполненные запросы)."""
+
+        self.prepare_request(name)
+        with CaptureQueriesContext(connection) as captured:
+            response = send()
+        return response, [query["sql"] for query in captured]
+
+    def _queries_message(self, queries) -> str:
+        return "\n".join(
+            f"{number}. {sql}" for number, sql in enumerate(queries, 1)
+        )
+
+    def assertQueryBudget(self, name: str, send, budget: int):
+        """Проверяет, что send() выполняет не больше budget запросов."""
+
+        response, queries = self.count_queries(name, send)
+        if len(queries) > budget:
+            self.fail(
+                f"{name}: выполнено {len(queries)} запросов "
+                f"при бюджете {budget}:\n{self._queries_message(queries)}"
+            )
+        return response
+
+    def assertQueriesIndependentOf(self, sends: dict, grow):
+        """
+        Проверяет, что после grow() (добавления данных на страницы)
+        каждая функция из sends выполняет столько же запросов,
+        сколько до него. Перед замером каждая функция вызывается
+        вхолостую: первый запрос может прогревать внутренние кэши.
+        """
+
+        before = {}
+        for name, send in sends.items():
+            self.count_queries(name, send)
+            before[name] = len(self.count_queries(name, send)[1])
+
+        grow()
+
+        for name, send in sends.items():
+            with self.subTest(name=name):
+                _, after = self.count_queries(name, send)
+                if len(after) != before[name]:
+                    self.fail(
+                        f"{name}: число запросов зависит от количества "
+                        f"данных: {before[name]} -> {len(after)}:\n"
+                        f"{self._queries_message(after)}"
+                    )
@@ -1,6 +1,31 @@
+import json
+import os
+import tempfile
+import tracemalloc
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
-from django.test import Client, TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from . import metrics, profiling, slow_queries
+from .backends.sqlite3.base import DatabaseWrapper
+from .backends.tiered import (EPOCH_KEY, INVALIDATION_KEY_PREFIX,
+                              SEQUENCE_KEY, TieredCache)
+from .cache import (_page_key, bump_versions, cache_page_versioned,
+                    conditional_page, get_page_cache_metrics,
+                    page_cache_metrics)
+from .stemmers import STEM_CACHE_SIZE, _candidates, stem_russian
+from .templatetags.user_filters import page_window
 
 
 class CoreTests(TestCase):
@@ -22,3 +47,600 @@ class CoreTests(TestCase):
             response=guest_response,
             template_name="core/404.html",
         )
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1.0)
+class ProfilingMiddlewareTests(TestCase):
+    """Набор тестов для проверки выборочного профилирования запросов"""
+
+    def setUp(self):
+        cache.clear()
+        profiling.records.clear()
+        self.guest_client = Client()
+
+    def test_sampled_request_is_recorded(self):
+        self.guest_client.get(path=reverse(viewname="posts:index"))
+
+        record = profiling.records[-1]
+        self.assertEqual(first=record["view"], second="posts:index")
+        self.assertEqual(first=record["status"], second=HTTPStatus.OK)
+        self.assertGreater(record["sql_count"], 0)
+        self.assertGreater(record["render_ms"], 0)
+        self.assertEqual(first=record["cache"], second={"miss": 1})
+        self.assertIsNone(record["peak_kb"])
+
+    @override_settings(PROFILING_TRACE_MEMORY=True)
+    def test_peak_memory_is_recorded_when_enabled(self):
+        self.guest_client.get(path=reverse(viewname="posts:index"))
+
+        self.assertIsNotNone(profiling.records[-1]["peak_kb"])
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_cached_page_is_not_rendered_again(self):
+        self.guest_client.get(path=reverse(viewname="posts:index"))
+        self.guest_client.get(path=reverse(viewname="posts:index"))
+
+        record = profiling.records[-1]
+        self.assertEqual(first=record["cache"], second={"hit": 1})
+        self.assertEqual(first=record["render_ms"], second=0)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0)
+    def test_unsampled_request_is_not_recorded(self):
+        self.guest_client.get(path=reverse(viewname="posts:index"))
+        self.assertEqual(first=len(profiling.records), second=0)
+
+    def test_report_is_only_for_staff(self):
+        url = reverse(viewname="profiling_report")
+        self.assertEqual(
+            first=self.guest_client.get(path=url).status_code,
+            second=HTTPStatus.FOUND,
+        )
+
+        staff = get_user_model().objects.create_user(
+            username="test_staff", is_staff=True,
+        )
+        self.guest_client.force_login(staff)
+        self.guest_client.get(path=reverse(viewname="posts:index"))
+        response = self.guest_client.get(
+            path=url, data={"view": "posts:index"},
+        )
+        self.assertEqual(first=response.status_code, second=HTTPStatus.OK)
+        report = response.json()
+        self.assertEqual(
+            first=[record["view"] for record in report["records"]],
+            second=["posts:index"],
+        )
+        self.assertEqual(
+            first=report["summary"]["posts:index"]["count"], second=1,
+        )
+
+
+class MetricsTests(TestCase):
+    """Набор тестов для проверки метрик Prometheus"""
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def sample(self, name, **labels):
+        return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_view_latency_and_queries_are_observed(self):
+        latency = {"view": "posts:index", "method": "GET", "status": "2xx"}
+        selects = {"alias": "default", "operation": "SELECT"}
+        requests_before = self.sample(
+            "yatube_view_latency_seconds_count", **latency,
+        )
+        queries_before = self.sample(
+            "yatube_db_query_duration_seconds_count", **selects,
+        )
+
+        self.guest_client.get(path=reverse(viewname="posts:index"))
+
+        self.assertEqual(
+            first=self.sample("yatube_view_latency_seconds_count", **latency),
+            second=requests_before + 1,
+        )
+        self.assertGreater(
+            self.sample("yatube_db_query_duration_seconds_count", **selects),
+            queries_before,
+        )
+
+    def test_page_cache_events_are_counted(self):
+        labels = {"cache": "index_page", "event": "hit"}
+        before = self.sample("yatube_page_cache_events_total", **labels)
+
+        self.guest_client.get(path=reverse(viewname="posts:index"))
+        self.guest_client.get(path=reverse(viewname="posts:index"))
+
+        self.assertEqual(
+            first=self.sample("yatube_page_cache_events_total", **labels),
+            second=before + 1,
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.5"])
+    def test_metrics_endpoint(self):
+        self.guest_client.get(path=reverse(viewname="posts:index"))
+        response = self.guest_client.get(
+            path=reverse(viewname="metrics"), REMOTE_ADDR="10.0.0.5",
+        )
+        self.assertEqual(first=response.status_code, second=HTTPStatus.OK)
+        self.assertIn(
+            member=b'yatube_view_latency_seconds_count{method="GET",'
+                   b'status="2xx",view="posts:index"}',
+            container=response.content,
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.5"])
+    def test_metrics_are_closed_to_other_addresses(self):
+        url = reverse(viewname="metrics")
+        self.assertEqual(
+            first=self.guest_client.get(path=url).status_code,
+            second=HTTPStatus.FORBIDDEN,
+        )
+
+        staff = get_user_model().objects.create_user(
+            username="test_staff", is_staff=True,
+        )
+        self.guest_client.force_login(staff)
+        self.assertEqual(
+            first=self.guest_client.get(path=url).status_code,
+            second=HTTPStatus.OK,
+        )
+
+    def test_multiprocess_registry_reads_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch.dict(
+                os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory},
+            ):
+                registry = metrics.get_registry()
+        self.assertIsNot(expr1=registry, expr2=metrics.REGISTRY)
+
+
+class SlowQueryLogTests(TestCase):
+    """Набор тестов для проверки журнала медленных запросов"""
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_fingerprint_hides_values(self):
+        self.assertEqual(
+            first=slow_queries.fingerprint(
+                "SELECT *  FROM t\nWHERE id IN (%s, %s, %s) "
+                "AND name = 'it''s' LIMIT 20"
+            ),
+            second="SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?",
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_query_is_logged_with_plan(self):
+        with self.assertLogs(logger="core.slow_queries") as logs:
+            self.guest_client.get(path=reverse(viewname="posts:index"))
+
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        posts = [entry for entry in entries
+                 if '"posts_post"' in entry["fingerprint"]]
+        self.assertTrue(posts)
+        self.assertEqual(first=posts[0]["view"], second="posts:index")
+        self.assertTrue(posts[0]["plan"])
+
+    def test_only_public_select_params_are_logged(self):
+        cases = (
+            ('SELECT * FROM "posts_post" WHERE "id" = %s', [1]),
+            ('SELECT * FROM "django_session" WHERE "session_key" = %s',
+             slow_queries.REDACTED_PARAMS),
+            ('SELECT * FROM "auth_user" WHERE "id" = %s',
+             slow_queries.REDACTED_PARAMS),
+            ('UPDATE "posts_post" SET "text" = %s',
+             slow_queries.REDACTED_PARAMS),
+        )
+        for sql, expected in cases:
+            with self.subTest(sql=sql):
+                self.assertEqual(
+                    first=slow_queries._loggable(sql, [1]), second=expected,
+                )
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_session_params_are_not_logged(self):
+        user = get_user_model().objects.create_user(username="test_user")
+        self.guest_client.force_login(user)
+        session_key = self.guest_client.session.session_key
+
+        with self.assertLogs(logger="core.slow_queries") as logs:
+            self.guest_client.get(path=reverse(viewname="posts:index"))
+
+        self.assertFalse(any(
+            session_key in record.getMessage() for record in logs.records
+        ))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=60_000)
+    def test_fast_queries_are_not_logged(self):
+        with mock.patch.object(slow_queries.logger, "warning") as warning:
+            self.guest_client.get(path=reverse(viewname="posts:index"))
+        warning.assert_not_called()
+
+    def test_report_shows_top_fingerprints(self):
+        def line(fingerprint, duration_ms):
+            return json.dumps({
+                "view": "posts:profile",
+                "duration_ms": duration_ms,
+                "fingerprint": fingerprint,
+                "params": [1],
+                "plan": ["SCAN posts_post"],
+            }) + "\n"
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "slow.log")
+            with open(path, "w") as log:
+                log.write(line("SELECT fast", 150))
+                log.write("не JSON\n")
+            with open(f"{path}.1", "w") as log:
+                log.write(line("SELECT slow", 300))
+                log.write(line("SELECT slow", 200))
+            out = StringIO()
+            call_command("slow_query_report", log=path, top=1, stdout=out)
+
+        report = out.getvalue()
+        self.assertIn(member="SELECT slow", container=report)
+        self.assertNotIn(member="SELECT fast", container=report)
+        self.assertIn(member="| SCAN posts_post", container=report)
+        self.assertIn(member="Записей: 3", container=report)
+
+
+class SqliteBackendTests(TestCase):
+    """Набор тестов для проверки настроек соединений SQLite"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def file_wrapper(self, **options):
+        wrapper = DatabaseWrapper(
+            settings_dict={
+                **connection.settings_dict,
+                "NAME": os.path.join(self.directory.name, "test.sqlite3"),
+                "OPTIONS": options,
+            },
+            alias="file_test",
+        )
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_on_connect(self):
+        wrapper = self.file_wrapper(PRAGMAS={"busy_timeout": 1234})
+        self.assertEqual(first=self.pragma(wrapper, "journal_mode"),
+                         second="wal")
+        # 1 - NORMAL
+        self.assertEqual(first=self.pragma(wrapper, "synchronous"), second=1)
+        self.assertEqual(first=self.pragma(wrapper, "busy_timeout"),
+                         second=1234)
+
+    def test_invalid_pragma_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.file_wrapper(PRAGMAS={"cache_size": "1; DROP TABLE x"})
+
+    def test_broken_connection_is_closed(self):
+        wrapper = self.file_wrapper()
+        wrapper.ensure_connection()
+        wrapper.close_if_unusable_or_obsolete()
+        self.assertIsNotNone(wrapper.connection)
+
+        wrapper.connection.close()
+        wrapper.close_if_unusable_or_obsolete()
+        self.assertIsNone(wrapper.connection)
+
+
+class PageWindowFilterTests(TestCase):
+    """Набор тестов для проверки фильтра page_window"""
+
+    def test_page_window_elides_distant_pages(self):
+        paginator = Paginator(object_list=range(1000), per_page=10)
+        numbers_windows = {
+            1: [1, 2, 3, 4, None, 100],
+            5: [1, 2, 3, 4, 5, 6, 7, 8, None, 100],
+            50: [1, None, 47, 48, 49, 50, 51, 52, 53, None, 100],
+            100: [1, None, 97, 98, 99, 100],
+        }
+
+        for number, expected in numbers_windows.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    first=page_window(paginator.page(number)),
+                    second=expected,
+                )
+
+    def test_page_window_of_short_list_is_the_whole_range(self):
+        paginator = Paginator(object_list=range(30), per_page=10)
+        self.assertEqual(
+            first=page_window(paginator.page(2)),
+            second=[1, 2, 3],
+        )
+
+
+@override_settings(CACHES={
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+})
+class CachePageVersionedTests(TestCase):
+    """Набор тестов для проверки декоратора cache_page_versioned"""
+
+    def setUp(self):
+        cache.clear()
+        page_cache_metrics.clear()
+        self.factory = RequestFactory()
+        self.view_calls = 0
+
+        def view(request):
+            self.view_calls += 1
+            return HttpResponse(content=f"render #{self.view_calls}")
+
+        self.view = cache_page_versioned(
+            timeout=60, key_prefix="test_page", scopes=lambda request: ["t"],
+        )(view)
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self):
+        request = self.factory.get(path="/")
+        request.user = AnonymousUser()
+        return self.view(request).content.decode()
+
+    def test_fresh_copy_is_served_until_version_changes(self):
+        self.assertEqual(first=self.get(), second="render #1")
+        self.assertEqual(first=self.get(), second="render #1")
+
+        bump_versions("t")
+
+        self.assertEqual(first=self.get(), second="render #2")
+        self.assertEqual(
+            first=get_page_cache_metrics(),
+            second={("test_page", "miss"): 2, ("test_page", "hit"): 1},
+        )
+
+    def test_stale_copy_is_served_while_page_is_rebuilt(self):
+        self.get()
+        bump_versions("t")
+        cache.add(
+            key=f"{_page_key('test_page', self.factory.get('/'))}.lock",
+            value=True,
+        )
+
+        self.assertEqual(first=self.get(), second="render #1")
+        self.assertEqual(first=self.view_calls, second=1)
+        self.assertEqual(
+            first=get_page_cache_metrics()[("test_page", "stale")],
+            second=1,
+        )
+
+    @mock.patch("core.cache.PAGE_LOCK_WAIT_SECONDS", 0)
+    def test_page_is_rendered_when_nothing_to_serve(self):
+        cache.add(
+            key=f"{_page_key('test_page', self.factory.get('/'))}.lock",
+            value=True,
+        )
+
+        self.assertEqual(first=self.get(), second="render #1")
+
+    def test_copy_near_expiry_is_refreshed_early(self):
+        with mock.patch("core.cache.time") as clock:
+            # страница собиралась 0.1 секунды и живёт до отметки 60.1
+            clock.time.side_effect = [0, 0.1, 0.1]
+            self.get()
+
+            clock.time.side_effect = None
+            clock.time.return_value = 59.9
+            with mock.patch("core.cache.random.random", return_value=0.99):
+                self.assertEqual(first=self.get(), second="render #2")
+
+        self.assertEqual(
+            first=get_page_cache_metrics()[("test_page", "early_refresh")],
+            second=1,
+        )
+
+    def test_new_release_does_not_serve_old_pages(self):
+        self.get()
+
+        with override_settings(RELEASE="next"):
+            self.assertEqual(first=self.get(), second="render #2")
+
+
+class ConditionalPageTests(TestCase):
+    """Набор тестов для проверки декоратора conditional_page"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self, status=HTTPStatus.OK, **headers):
+        @conditional_page(scopes=lambda request: ["t"])
+        def view(request):
+            return HttpResponse(status=status)
+
+        request = self.factory.get(path="/", **headers)
+        request.user = AnonymousUser()
+        return view(request)
+
+    def test_only_ok_responses_get_etag(self):
+        self.assertTrue(self.get().has_header("ETag"))
+        for status in (HTTPStatus.NOT_FOUND, HTTPStatus.FOUND):
+            with self.subTest(status=status):
+                self.assertFalse(self.get(status=status).has_header("ETag"))
+
+    def test_etag_changes_with_release(self):
+        etag = self.get()["ETag"]
+        self.assertEqual(
+            first=self.get(HTTP_IF_NONE_MATCH=etag).status_code,
+            second=HTTPStatus.NOT_MODIFIED,
+        )
+
+        with override_settings(RELEASE="next"):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(first=response.status_code, second=HTTPStatus.OK)
+        self.assertNotEqual(first=response["ETag"], second=etag)
+
+
+@override_settings(CACHES={
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tiered-tests",
+    },
+})
+class TieredCacheTests(TestCase):
+    """Набор тестов для проверки двухуровневого кэша TieredCache"""
+
+    def setUp(self):
+        caches["shared"].clear()
+        # два экземпляра изображают два процесса с общим L2
+        self.first = self.make_cache()
+        self.second = self.make_cache()
+
+    @staticmethod
+    def make_cache(**options):
+        return TieredCache(location="", params={"OPTIONS": {
+            "L2_CACHE": "shared",
+            "SYNC_INTERVAL": 0,
+            **options,
+        }})
+
+    def test_value_is_shared_between_processes(self):
+        self.first.set("key", "value")
+        self.assertEqual(first=self.second.get("key"), second="value")
+
+    def test_value_is_read_from_local_tier(self):
+        self.first.set("key", "value")
+        self.first.get("key")
+        state = {EPOCH_KEY: self.first._epoch,
+                 SEQUENCE_KEY: self.first._sequence}
+        with mock.patch.object(TieredCache, "l2") as l2:
+            l2.get_many.return_value = state
+            self.assertEqual(first=self.first.get("key"), second="value")
+            l2.get_many.assert_called_once_with([EPOCH_KEY, SEQUENCE_KEY])
+            l2.get.assert_not_called()
+
+    def test_overwrite_invalidates_other_processes(self):
+        self.first.set("key", "old")
+        self.assertEqual(first=self.second.get("key"), second="old")
+
+        self.first.set("key", "new")
+        self.assertEqual(first=self.second.get("key"), second="new")
+
+        self.first.delete("key")
+        self.assertIsNone(self.second.get("key"))
+
+    def test_overwrite_keeps_other_local_copies(self):
+        self.first.set("changed", "old")
+        self.first.set("untouched", "value")
+        self.second.get("changed")
+        self.second.get("untouched")
+
+        self.first.set("changed", "new")
+        self.second._sync()
+
+        self.assertNotIn(member=self.second.make_key("changed"),
+                         container=self.second._l1)
+        self.assertIn(member=self.second.make_key("untouched"),
+                      container=self.second._l1)
+
+    def test_lost_log_entry_resets_local_tier(self):
+        self.first.set("key", "old")
+        self.first.set("other", "value")
+        self.second.get("key")
+        self.second.get("other")
+
+        self.first.set("key", "new")
+        sequence = caches["shared"].get(SEQUENCE_KEY)
+        caches["shared"].delete(f"{INVALIDATION_KEY_PREFIX}:{sequence}")
+        self.second._sync()
+
+        self.assertEqual(first=len(self.second._l1), second=0)
+
+    def test_clear_resets_other_processes(self):
+        self.first.set("key", "value")
+        self.second.get("key")
+
+        self.first.clear()
+        self.assertIsNone(self.second.get("key"))
+
+    def test_local_copy_does_not_outlive_shared_ttl(self):
+        cache = self.make_cache(L1_TIMEOUT=60)
+        with mock.patch("core.backends.tiered.time") as clock, \
+                mock.patch("django.core.cache.backends.base.time", clock):
+            clock.time.return_value = 0
+            cache.set("key", "value", timeout=10)
+
+            clock.time.return_value = 11
+            caches["shared"].set(
+                key="key", value=(None, "leftover"), timeout=None,
+            )
+            # L1 выбрасывает копию по TTL и идёт за значением в L2
+            self.assertEqual(first=cache.get("key"), second="leftover")
+
+    def test_local_tier_is_bounded(self):
+        cache = self.make_cache(MAX_ENTRIES=2)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+
+        self.assertEqual(first=list(cache._l1), second=[
+            cache.make_key("b"), cache.make_key("c"),
+        ])
+
+    def test_incr_and_add(self):
+        self.assertTrue(self.first.add("counter", 1))
+        self.assertFalse(self.second.add("counter", 5))
+        self.assertEqual(first=self.second.incr("counter"), second=2)
+        self.assertEqual(first=self.first.get("counter"), second=2)
+
+
+class RussianStemmerTests(TestCase):
+    """Набор тестов для проверки стеммера русских слов"""
+
+    def test_word_forms_share_a_stem(self):
+        word_forms = {
+            "кошк": ("кошка", "кошки", "кошками", "КОШКУ"),
+            "говор": ("говорила", "говорить"),
+            "красив": ("красивый", "красивейший"),
+            "елк": ("ёлки", "елка"),
+        }
+
+        for stem, words in word_forms.items():
+            for word in words:
+                with self.subTest(word=word):
+                    self.assertEqual(first=stem_russian(word), second=stem)
+
+    def test_other_words_are_only_lowercased(self):
+        self.assertEqual(first=stem_russian("Django2"), second="django2")
+
+    def test_repeated_words_are_cached(self):
+        stem_russian.cache_clear()
+        for _ in range(3):
+            stem_russian("кошками")
+
+        info = stem_russian.cache_info()
+        self.assertEqual(first=(info.hits, info.misses), second=(2, 1))
+        self.assertEqual(first=info.maxsize, second=STEM_CACHE_SIZE)
+
+    def test_longest_endings_are_tried_first(self):
+        candidates = _candidates((("ем", "нн"), ("ившем", "ем")))
+
+        self.assertEqual(first=candidates[0], second=("ившем", False))
+        self.assertEqual(
+            first=[len(ending) for ending, _ in candidates],
+            second=sorted(
+                (len(ending) for ending, _ in candidates), reverse=True,
+            ),
+        )
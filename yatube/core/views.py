@@ -1,7 +1,14 @@
 from http import HTTPStatus
 
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from . import profiling
+from .metrics import render_metrics
+
 
 def not_modified_304(request, exception=None):
     return render(
@@ -74,3 +81,41 @@ def internal_server_error_500(request, exception=None):
             "custom_message": HTTPStatus.INTERNAL_SERVER_ERROR.description,
         }
     )
+
+
+@staff_member_required
+def profiling_report(request):
+    """
+    Последние замеры ProfilingMiddleware этого процесса, новые первыми,
+    и средние значения по вью. ?view=posts:index оставляет одну вью.
+    """
+
+    items = list(reversed(profiling.records))
+    view = request.GET.get("view")
+    if view:
+        items = [record for record in items if record["view"] == view]
+    return JsonResponse(
+        data={
+            "sample_rate": getattr(
+                settings, "PROFILING_SAMPLE_RATE",
+                profiling.DEFAULT_SAMPLE_RATE,
+            ),
+            "summary": profiling.summarize(items),
+            "records": items,
+        },
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+def metrics(request):
+    """
+    Метрики Prometheus (см. core.metrics) для адресов
+    из METRICS_ALLOWED_IPS и для сотрудников.
+    """
+
+    allowed_ips = getattr(settings, "METRICS_ALLOWED_IPS", ())
+    if (request.META.get("REMOTE_ADDR") not in allowed_ips
+            and not request.user.is_staff):
+        raise PermissionDenied
+    content, content_type = render_metrics()
+    return HttpResponse(content=content, content_type=content_type)
@@ -0,0 +1,11 @@
+"""
+Настройки gunicorn. Перед запуском в PROMETHEUS_MULTIPROC_DIR
+записывается путь к пустому каталогу для метрик воркеров
+(см. core.metrics).
+"""
+
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
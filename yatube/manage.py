@@ -5,6 +5,9 @@ import sys
 
 
 def main():
+    # тесты запускаются со своими настройками, см. yatube/test_settings.py
+    if sys.argv[1:2] == ["test"]:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.test_settings")
     os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.settings")
     try:
         from django.core.management import execute_from_command_line
@@ -1,10 +1,29 @@
 from django.contrib import admin
 
+from . import search
+from .helpers import EstimatedCountPaginator
 from .models import Comment, Follow, Group, Post
 
 
+class FullTextSearchMixin:
+    """
+    Поиск в админке по полнотекстовому индексу posts_search
+    вместо LIKE '%...%' по всей таблице. Без индекса (не SQLite)
+    работает обычный поиск по search_fields.
+    """
+
+    search_filter = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.is_supported():
+            return super().get_search_results(
+                request, queryset, search_term,
+            )
+        return self.search_filter(queryset, search_term), False
+
+
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(FullTextSearchMixin, admin.ModelAdmin):
     """Настройка отображения объектов Post в django-админке."""
 
     list_display = (
@@ -14,16 +33,35 @@ class PostAdmin(admin.ModelAdmin):
         "author",
         "group",
         "image",
-        "comments",
+        "comments_count",
     )
+    list_select_related = ("author", "group", )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     ordering = ("-created", )
     search_fields = ("text", )
+    search_filter = staticmethod(search.filter_posts)
     list_editable = ("group", )
     list_filter = ("created", )
 
     empty_value_display = "-пусто-"
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        """
+        Список сообществ для редактируемой колонки group
+        выбирается из базы один раз на запрос, а не на каждую строку.
+        """
+
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs,
+        )
+        if db_field.name == "group":
+            if not hasattr(request, "_group_choices"):
+                request._group_choices = list(formfield.choices)
+            formfield.choices = request._group_choices
+        return formfield
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
@@ -34,7 +72,7 @@ class GroupAdmin(admin.ModelAdmin):
         "title",
         "description",
         "slug",
-        "posts",
+        "posts_count",
     )
 
     search_fields = ("title", "description", )
@@ -44,7 +82,7 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchMixin, admin.ModelAdmin):
     """Настройка отображения объектов Comment в django-админке."""
 
     list_display = (
@@ -54,9 +92,13 @@ class CommentAdmin(admin.ModelAdmin):
         "post",
         "author",
     )
+    list_select_related = ("post", "author", )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     ordering = ("-created", )
     search_fields = ("text", )
+    search_filter = staticmethod(search.filter_comments)
     list_filter = ("created", )
 
     empty_value_display = "-пусто-"
@@ -72,9 +114,12 @@ class FollowAdmin(admin.ModelAdmin):
         "user",
         "author",
     )
+    list_select_related = ("user", "author", )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     ordering = ("-created", )
-    search_fields = ("user", "author", )
+    search_fields = ("^user__username", "^author__username", )
     list_filter = ("created", )
 
     empty_value_display = "-пусто-"
@@ -0,0 +1,65 @@
+"""
+Области версий кэша приложения posts.
+
+Закэшированные страницы и карточки постов хранятся под ключами
+с версиями этих областей. Сигналы моделей заменяют версии
+при изменении данных, и устаревшие записи больше не читаются.
+Из тех же версий собираются ETag страниц для условных запросов.
+"""
+
+from .models import Post
+
+GROUPS_PAGES_SCOPE: str = "pages:groups"
+INDEX_PAGE_SCOPE: str = "pages:index"
+USERS_PAGES_SCOPE: str = "pages:users"
+
+
+def author_cards_scope(author_id) -> str:
+    return f"post_card:author:{author_id}"
+
+
+def group_cards_scope(group_id) -> str:
+    return f"post_card:group:{group_id}"
+
+
+def group_page_scope(slug: str) -> str:
+    return f"pages:group:{slug}"
+
+
+def profile_page_scope(username: str) -> str:
+    return f"pages:profile:{username}"
+
+
+def post_page_scope(post_id) -> str:
+    return f"pages:post:{post_id}"
+
+
+def index_page_scopes(request) -> list:
+    return [INDEX_PAGE_SCOPE, GROUPS_PAGES_SCOPE, USERS_PAGES_SCOPE]
+
+
+def group_page_scopes(request, slug: str) -> list:
+    return [group_page_scope(slug), GROUPS_PAGES_SCOPE, USERS_PAGES_SCOPE]
+
+
+def profile_page_scopes(request, username: str) -> list:
+    return [
+        profile_page_scope(username), GROUPS_PAGES_SCOPE, USERS_PAGES_SCOPE,
+    ]
+
+
+def post_page_scopes(request, post_id: int):
+    """
+    Страница поста зависит ещё и от страницы автора:
+    на ней показано, сколько у автора постов.
+    """
+
+    username = Post.objects.filter(
+        pk=post_id,
+    ).values_list("author__username", flat=True).first()
+    if username is None:
+        return None
+    return [
+        post_page_scope(post_id), profile_page_scope(username),
+        GROUPS_PAGES_SCOPE, USERS_PAGES_SCOPE,
+    ]
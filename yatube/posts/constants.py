@@ -3,10 +3,77 @@
 POST_PREVIEW_SYMBOLS: int = 15
 COMMENT_PREVIEW_SYMBOLS: int = 15
 
-CACHE_TIMEOUT_SECONDS: int = 20
+CACHE_TIMEOUT_SECONDS: int = 60 * 60 * 6
+POST_CARD_CACHE_TIMEOUT_SECONDS: int = 60 * 60 * 24
 
 POSTS_PER_PAGE: int = 10
 
+COUNT_CACHE_TIMEOUT_SECONDS: int = 60 * 60
+
+FEED_FANOUT_MAX_FOLLOWERS: int = 1000
+FEED_BATCH_SIZE: int = 1000
+
+POST_IMAGE_MAX_BYTES: int = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS: int = 40_000_000
+POST_IMAGE_MAX_SIDE: int = 2560
+POST_IMAGE_FORMATS: tuple = ("JPEG", "PNG", "GIF", "WEBP")
+POST_IMAGE_SAVE_OPTIONS: dict = {
+    "JPEG": {"quality": 85, "optimize": True},
+    "PNG": {"optimize": True},
+    "WEBP": {"quality": 85},
+}
+# ключи Image.info, которые не метаданные, а часть самой картинки
+POST_IMAGE_KEPT_INFO: tuple = ("transparency",)
+
+# должны совпадать с аргументами {% thumbnail %} в шаблонах
+THUMBNAIL_GEOMETRIES: tuple = (
+    ("960x339", {"crop": "center", "upscale": True}),
+)
+THUMBNAIL_WORKERS: int = 2
+
+# форматы в порядке предпочтения и параметры их сохранения в Pillow
+IMAGE_VARIANT_FORMATS: dict = {
+    "avif": {"quality": 50},
+    "webp": {"quality": 75, "method": 4},
+}
+IMAGE_VARIANT_WIDTHS: tuple = (320, 640, 960)
+IMAGE_VARIANT_ASPECT_RATIO: float = 960 / 339
+IMAGE_VARIANT_SIZES: str = "(min-width: 992px) 720px, 100vw"
+
+IMAGE_GC_GRACE_SECONDS: int = 60 * 60
+
+SEARCH_BATCH_SIZE: int = 1000
+# BM25 отрицателен, поэтому множитель меньше 1 ослабляет совпадение
+SEARCH_COMMENT_WEIGHT: float = 0.5
+
+TRANSFER_BATCH_SIZE: int = 1000
+
+# объёмы синтетических данных: пользователи, сообщества,
+# посты, комментарии и подписки
+LOAD_DATA_PRESETS: dict = {
+    "tiny": {"users": 100, "groups": 5, "posts": 1_000,
+             "comments": 2_000, "follows": 500},
+    "small": {"users": 10_000, "groups": 50, "posts": 100_000,
+              "comments": 200_000, "follows": 50_000},
+    "medium": {"users": 100_000, "groups": 500, "posts": 1_000_000,
+               "comments": 2_000_000, "follows": 1_000_000},
+    "large": {"users": 1_000_000, "groups": 5_000, "posts": 5_000_000,
+              "comments": 10_000_000, "follows": 10_000_000},
+}
+LOAD_DATA_BATCH_SIZE: int = 5000
+LOAD_DATA_DAYS: int = 3 * 365
+# показатели степенного распределения: чем больше, тем сильнее
+# популярность сосредоточена у первых авторов, сообществ и постов
+LOAD_DATA_FOLLOW_EXPONENT: float = 1.3
+LOAD_DATA_POST_EXPONENT: float = 1.1
+LOAD_DATA_GROUP_EXPONENT: float = 1.0
+LOAD_DATA_COMMENT_EXPONENT: float = 1.2
+LOAD_DATA_GROUP_SHARE: float = 0.6
+LOAD_DATA_PASSWORD: str = "load-data-password"
+
+# дальше этого числа админка не считает строки отфильтрованных списков
+ADMIN_EXACT_COUNT_LIMIT: int = 10_000
+
 TESTS_POSTS_PER_PAGE_MULTIPLIER: float = 1.2
 
 TESTS_ALL_POSTS_TOTAL_PAGES: int = 4
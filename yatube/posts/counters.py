@@ -0,0 +1,89 @@
+"""
+Денормализованные счётчики постов, комментариев и подписок.
+Шаблоны читают их из строк моделей вместо COUNT(*) на каждый рендер.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+def change_counters(queryset, **deltas) -> int:
+    """
+    Атомарно изменяет счётчики объектов из queryset на заданные величины.
+    Счётчики не опускаются ниже нуля. Возвращает число обновлённых строк.
+    """
+
+    return queryset.update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def change_user_stats(user_id, **deltas) -> None:
+    """
+    Изменяет счётчики пользователя.
+    Если у пользователя ещё нет строки со счётчиками,
+    она создаётся и заполняется пересчётом.
+    """
+
+    if not change_counters(UserStats.objects.filter(user_id=user_id),
+                           **deltas):
+        rebuild_user_stats(users=User.objects.filter(pk=user_id))
+
+
+def _count_of(queryset, field):
+    """Коррелированный подзапрос с количеством строк по полю field."""
+
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def rebuild_user_stats(users=None) -> None:
+    """Пересчитывает счётчики пользователей (по умолчанию - всех)."""
+
+    if users is None:
+        users = User.objects.all()
+
+    with transaction.atomic():
+        UserStats.objects.bulk_create(
+            objs=[
+                UserStats(user_id=user_id)
+                for user_id in users.filter(
+                    stats__isnull=True,
+                ).values_list("pk", flat=True).iterator()
+            ],
+            ignore_conflicts=True,
+        )
+        UserStats.objects.filter(user__in=users).update(
+            posts_count=_count_of(Post.objects.all(), "author"),
+            followers_count=_count_of(Follow.objects.all(), "author"),
+            following_count=_count_of(Follow.objects.all(), "user"),
+        )
+
+
+def rebuild_counters() -> None:
+    """Пересчитывает все денормализованные счётчики с нуля."""
+
+    with transaction.atomic():
+        Group.objects.update(
+            posts_count=_count_of(Post.objects.all(), "group"),
+        )
+        Post.objects.update(
+            comments_count=_count_of(Comment.objects.all(), "post"),
+        )
+        rebuild_user_stats()
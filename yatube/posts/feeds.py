@@ -0,0 +1,135 @@
+"""
+Материализованные ленты подписок (fan-out on write).
+
+Новый пост автора сразу раскладывается по лентам его подписчиков,
+поэтому follow_index читает готовую ленту по индексу (user, created).
+Посты авторов, у которых подписчиков больше FEED_FANOUT_MAX_FOLLOWERS,
+не раскладываются, а подмешиваются при чтении (fan-out on read).
+"""
+
+from itertools import islice
+
+from django.db import connection
+from django.db.models import Q
+
+from .constants import FEED_BATCH_SIZE, FEED_FANOUT_MAX_FOLLOWERS
+from .models import FeedEntry, Follow, Post, UserStats
+
+
+def _bulk_create_entries(entries) -> None:
+    """Сохраняет записи ленты пачками, пропуская уже существующие."""
+
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, FEED_BATCH_SIZE))
+        if not batch:
+            return
+        FeedEntry.objects.bulk_create(objs=batch, ignore_conflicts=True)
+
+
+def is_fanned_out(author_id) -> bool:
+    """Раскладываются ли посты автора по лентам подписчиков."""
+
+    followers_count = UserStats.objects.filter(
+        user_id=author_id,
+    ).values_list("followers_count", flat=True).first()
+    return (followers_count or 0) <= FEED_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out_post(post) -> None:
+    """Добавляет новый пост в ленты всех подписчиков его автора."""
+
+    if not is_fanned_out(post.author_id):
+        return
+
+    _bulk_create_entries(
+        FeedEntry(user_id=user_id, post_id=post.pk, created=post.created)
+        for user_id in Follow.objects.filter(
+            author_id=post.author_id,
+        ).values_list("user_id", flat=True).iterator()
+    )
+
+
+def backfill_feed(user_ids, author_id) -> None:
+    """Добавляет все посты автора в ленты перечисленных пользователей."""
+
+    for user_id in user_ids:
+        _bulk_create_entries(
+            FeedEntry(user_id=user_id, post_id=post_id, created=created)
+            for post_id, created in Post.objects.filter(
+                author_id=author_id,
+            ).order_by().values_list("pk", "created").iterator()
+        )
+
+
+def rebuild_feeds(author_ids) -> None:
+    """
+    Достраивает ленты всех подписчиков перечисленных авторов,
+    если посты этих авторов раскладываются по лентам.
+    Записи копируются одним INSERT ... SELECT на пачку авторов,
+    не проходя через Python.
+    """
+
+    ops = connection.ops
+    sql = (
+        f"{ops.insert_statement(ignore_conflicts=True)} "
+        f"{FeedEntry._meta.db_table} (user_id, post_id, created) "
+        f"SELECT follow.user_id, post.id, post.created "
+        f"FROM {Follow._meta.db_table} follow "
+        f"JOIN {UserStats._meta.db_table} stats "
+        f"ON stats.user_id = follow.author_id "
+        f"JOIN {Post._meta.db_table} post "
+        f"ON post.author_id = follow.author_id "
+        f"WHERE stats.followers_count <= %s AND follow.author_id IN ({{}}) "
+        f"{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}"
+    )
+
+    # один параметр занят порогом подписчиков
+    batch_size = min(
+        FEED_BATCH_SIZE,
+        (connection.features.max_query_params or FEED_BATCH_SIZE + 1) - 1,
+    )
+    author_ids = iter(author_ids)
+    with connection.cursor() as cursor:
+        while True:
+            batch = list(islice(author_ids, batch_size))
+            if not batch:
+                return
+            cursor.execute(
+                sql.format(", ".join(["%s"] * len(batch))),
+                [FEED_FANOUT_MAX_FOLLOWERS, *batch],
+            )
+
+
+def prune_feed(user_id, author_id) -> None:
+    """Убирает из ленты пользователя все посты автора."""
+
+    FeedEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id,
+    ).delete()
+
+
+def feed_posts(user):
+    """
+    Посты ленты подписок пользователя в порядке убывания даты публикации.
+    Читает материализованную ленту и подмешивает посты авторов,
+    чьи публикации по подписчикам не раскладываются.
+    """
+
+    unfanned_author_ids = list(
+        UserStats.objects.filter(
+            user__following__user=user,
+            followers_count__gt=FEED_FANOUT_MAX_FOLLOWERS,
+        ).values_list("user_id", flat=True)
+    )
+
+    if not unfanned_author_ids:
+        return Post.objects.filter(
+            feed_entries__user=user,
+        ).order_by("-feed_entries__created", "-pk")
+
+    return Post.objects.filter(
+        Q(pk__in=FeedEntry.objects.filter(user=user).values("post_id"))
+        | Q(author_id__in=unfanned_author_ids)
+    ).order_by("-created", "-pk")
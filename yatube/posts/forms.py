@@ -1,6 +1,9 @@
+from core.metrics import UPLOAD_BYTES
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
 from .models import Comment, Post
+from .uploads import prepare_image_upload, validate_image_upload
 
 
 class PostForm(forms.ModelForm):
@@ -10,6 +13,19 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ("text", "group", "image")
 
+    def clean_image(self):
+        """
+        Новую картинку проверяет по заголовку, уменьшает
+        и очищает от метаданных (см. posts.uploads).
+        """
+
+        image = self.cleaned_data["image"]
+        if not isinstance(image, UploadedFile):
+            return image
+        UPLOAD_BYTES.observe(image.size)
+        validate_image_upload(image)
+        return prepare_image_upload(image)
+
 
 class CommentForm(forms.ModelForm):
     """Форма для создания и редактирования комментариев (объектов Comment)."""
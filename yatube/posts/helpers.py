@@ -1,13 +1,275 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+from datetime import timezone
 
-from .constants import POSTS_PER_PAGE
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 
+from .constants import (ADMIN_EXACT_COUNT_LIMIT, COUNT_CACHE_TIMEOUT_SECONDS,
+                        POSTS_PER_PAGE)
 
-def paginate(request, queryset):
+CURSOR_FORWARD: str = "n"
+CURSOR_BACKWARD: str = "p"
+# id в курсоре должен поместиться в целое со знаком из 64 бит
+CURSOR_MAX_PK: int = 2 ** 63 - 1
+
+
+def encode_cursor(direction: str, obj) -> str:
+    """
+    Упаковывает позицию объекта (created, id) в непрозрачный токен,
+    пригодный для передачи в GET-параметре cursor.
+    """
+
+    raw = f"{direction}|{obj.created.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Распаковывает токен, созданный encode_cursor.
+    Для отсутствующего или повреждённого токена, а также для позиции,
+    которую не передать в базу (id вне int64, время вне диапазона
+    datetime после перевода в UTC), возвращает None.
+    """
+
+    if not token:
+        return None
+
+    try:
+        raw = base64.urlsafe_b64decode(
+            token + "=" * (-len(token) % 4)
+        ).decode()
+        direction, created, pk = raw.split("|")
+        created = parse_datetime(created)
+        pk = int(pk)
+        if created is not None and created.utcoffset() is not None:
+            created.astimezone(timezone.utc)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError):
+        return None
+
+    if direction not in (CURSOR_FORWARD, CURSOR_BACKWARD) or created is None:
+        return None
+    if not -CURSOR_MAX_PK - 1 <= pk <= CURSOR_MAX_PK:
+        return None
+    return direction, created, pk
+
+
+class KeysetPage(Page):
+    """
+    Страница курсорной пагинации.
+    Не знает ни своего номера, ни общего количества страниц,
+    зато умеет выдавать токены соседних страниц.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(
+            object_list=object_list, number=None, paginator=paginator,
+        )
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return "<Keyset page>"
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @cached_property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(CURSOR_FORWARD, self.object_list[-1])
+
+    @cached_property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(CURSOR_BACKWARD, self.object_list[0])
+
+
+class KeysetPaginator(Paginator):
+    """
+    Курсорный (keyset) пагинатор по паре полей (created, id).
+    Вместо COUNT(*) и OFFSET выбирает на одну запись больше,
+    чем помещается на страницу, начиная от позиции из курсора.
+    """
+
+    keyset: bool = True
+
+    def __init__(self, object_list, per_page):
+        super().__init__(
+            object_list=object_list.order_by("-created", "-pk"),
+            per_page=per_page,
+        )
+
+    def get_page(self, cursor):
+        """
+        Возвращает страницу, начинающуюся от позиции курсора.
+        Если по курсору (устаревшему или подделанному) ничего
+        не нашлось, возвращает первую страницу.
+        """
+
+        position = decode_cursor(cursor)
+        queryset = self.object_list
+
+        if position is not None:
+            direction, created, pk = position
+            if direction == CURSOR_FORWARD:
+                rows = list(
+                    queryset.filter(
+                        Q(created__lt=created) | Q(created=created, pk__lt=pk)
+                    )[:self.per_page + 1]
+                )
+                if rows:
+                    return KeysetPage(
+                        object_list=rows[:self.per_page],
+                        paginator=self,
+                        has_next=len(rows) > self.per_page,
+                        has_previous=True,
+                    )
+            else:
+                rows = list(
+                    queryset.filter(
+                        Q(created__gt=created) | Q(created=created, pk__gt=pk)
+                    ).reverse()[:self.per_page + 1]
+                )
+                if rows:
+                    return KeysetPage(
+                        object_list=rows[:self.per_page][::-1],
+                        paginator=self,
+                        has_next=True,
+                        has_previous=len(rows) > self.per_page,
+                    )
+
+        rows = list(queryset[:self.per_page + 1])
+        return KeysetPage(
+            object_list=rows[:self.per_page],
+            paginator=self,
+            has_next=len(rows) > self.per_page,
+            has_previous=False,
+        )
+
+
+def count_cache_key(scope: str, pk=None) -> str:
+    """
+    Ключ кэша с общим количеством постов в разделе:
+    all - все посты, group/author - посты сообщества/автора по его pk,
+    feed - лента подписок пользователя по его pk.
+    """
+
+    if pk is None:
+        return f"posts:count:{scope}"
+    return f"posts:count:{scope}:{pk}"
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Пагинатор, который берёт общее количество объектов из кэша.
+    Точный COUNT(*) выполняется только при промахе кэша,
+    а сбрасывают закэшированные значения сигналы моделей.
+    """
+
+    def __init__(self, object_list, per_page, count_key):
+        super().__init__(object_list=object_list, per_page=per_page)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        count = cache.get(self.count_key)
+        if count is None:
+            count = super().count
+            cache.set(self.count_key, count, COUNT_CACHE_TIMEOUT_SECONDS)
+        return count
+
+
+def estimated_row_count(model):
+    """
+    Примерное количество строк в таблице модели по статистике,
+    которую собирает сама база (ANALYZE). Если статистики нет,
+    возвращает None.
+    """
+
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE relname = %s",
+                [table],
+            )
+        elif connection.vendor == "sqlite":
+            try:
+                # первое число в stat - количество строк таблицы
+                cursor.execute(
+                    "SELECT stat FROM sqlite_stat1 WHERE tbl = %s "
+                    "ORDER BY idx IS NOT NULL LIMIT 1",
+                    [table],
+                )
+            except DatabaseError:
+                return None
+        else:
+            return None
+        row = cursor.fetchone()
+
+    if row is None:
+        return None
+    # reltuples в PostgreSQL - число с плавающей точкой, у больших
+    # таблиц в виде 1.2e+07
+    count = int(float(str(row[0]).split()[0]))
+    return count if count >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор для списков в админке.
+    Для всей таблицы без фильтров берёт оценку количества строк
+    из статистики базы, если таблица большая. Отфильтрованные списки
+    считаются точно, но не дальше ADMIN_EXACT_COUNT_LIMIT строк.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model)
+            if estimate is not None and estimate > ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return queryset.order_by().values("pk")[
+            :ADMIN_EXACT_COUNT_LIMIT + 1
+        ].count()
+
+
+def paginate(request, queryset, keyset=False, count_key=None):
     """
     Делит список объектов, переданных в queryset, на страницы.
     Количество страниц определяется автоматически из заданной константы.
+
+    При keyset=True страницы адресуются непрозрачным курсором ?cursor=
+    без COUNT(*) и OFFSET. Ссылки вида ?page=N при этом продолжают
+    работать в обычном режиме.
+
+    Если передан count_key, общее количество объектов
+    для обычного режима берётся из кэша по этому ключу.
     """
 
-    paginator = Paginator(object_list=queryset, per_page=POSTS_PER_PAGE)
+    if keyset and "page" not in request.GET:
+        paginator = KeysetPaginator(
+            object_list=queryset, per_page=POSTS_PER_PAGE,
+        )
+        return paginator.get_page(cursor=request.GET.get("cursor"))
+
+    if count_key is not None:
+        paginator = CachedCountPaginator(
+            object_list=queryset,
+            per_page=POSTS_PER_PAGE,
+            count_key=count_key,
+        )
+    else:
+        paginator = Paginator(object_list=queryset, per_page=POSTS_PER_PAGE)
     return paginator.get_page(number=request.GET.get("page"))
@@ -0,0 +1,119 @@
+"""
+Адаптивные варианты картинок постов.
+
+Для каждой загруженной картинки строятся уменьшенные копии
+нескольких ширин в современных форматах (AVIF, если его умеет
+Pillow на этом сервере, и WebP) с тем же кадрированием, что и у
+миниатюр в шаблонах. Копии лежат рядом с оригиналом в posts/,
+а в Post.image_formats записывается, в каких форматах они готовы:
+пока строка пустая, шаблоны показывают только обычную миниатюру.
+
+Одинаковые картинки хранятся одним файлом (см. Post.image),
+а файлы, на которые не ссылается ни один пост, удаляет
+команда collect_image_garbage. Удалять их при удалении или правке
+поста нельзя: ту же картинку в это время может загружать другой пост,
+а хранилище отдаёт ему имя уже сохранённого файла.
+"""
+
+import os
+import re
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from sorl import thumbnail
+
+from .constants import (IMAGE_VARIANT_ASPECT_RATIO, IMAGE_VARIANT_FORMATS,
+                        IMAGE_VARIANT_WIDTHS)
+
+Image.init()
+
+VARIANT_NAME_RE = re.compile(r"^(?P<root>.+)-\d+w\.[a-z]+$")
+
+
+def available_formats() -> list:
+    """Форматы вариантов, которые умеет сохранять установленный Pillow."""
+
+    return [
+        image_format for image_format in IMAGE_VARIANT_FORMATS
+        if image_format.upper() in Image.SAVE
+    ]
+
+
+def variant_name(name: str, width: int, image_format: str) -> str:
+    """Имя файла варианта: posts/photo.jpg -> posts/photo-640w.webp."""
+
+    root, _ = os.path.splitext(name)
+    return f"{root}-{width}w.{image_format}"
+
+
+def variant_root(name: str):
+    """Имя оригинала без расширения, если name - имя варианта."""
+
+    match = VARIANT_NAME_RE.match(name)
+    return match and match.group("root")
+
+
+def variant_sources(post) -> list:
+    """
+    Готовые варианты картинки поста для тегов <source>:
+    [(MIME-тип, значение srcset), ...] в порядке предпочтения.
+    """
+
+    if not post.image or not post.image_formats:
+        return []
+
+    storage = default_storage
+    sources = []
+    for image_format in post.image_formats.split(","):
+        srcset = ", ".join(
+            "{url} {width}w".format(
+                url=storage.url(
+                    variant_name(post.image.name, width, image_format),
+                ),
+                width=width,
+            )
+            for width in IMAGE_VARIANT_WIDTHS
+        )
+        sources.append((f"image/{image_format}", srcset))
+    return sources
+
+
+def build_image_variants(post) -> list:
+    """Строит все варианты картинки поста и возвращает их форматы."""
+
+    # у вариантов свои имена, поэтому сохраняются они
+    # в обычное хранилище, а не в хранилище оригиналов
+    image_name = post.image.name
+    storage = default_storage
+    formats = available_formats()
+
+    with post.image.open("rb") as original:
+        source = ImageOps.exif_transpose(Image.open(original))
+        source = source.convert("RGBA" if "A" in source.getbands() else "RGB")
+
+    for width in IMAGE_VARIANT_WIDTHS:
+        size = (width, round(width / IMAGE_VARIANT_ASPECT_RATIO))
+        resized = ImageOps.fit(source, size, method=Image.LANCZOS)
+        for image_format in formats:
+            buffer = BytesIO()
+            resized.save(
+                buffer,
+                format=image_format.upper(),
+                **IMAGE_VARIANT_FORMATS[image_format],
+            )
+            name = variant_name(image_name, width, image_format)
+            storage.delete(name)
+            storage.save(name, ContentFile(buffer.getvalue()))
+
+    return formats
+
+
+def delete_image_files(name: str) -> None:
+    """Удаляет картинку вместе с её миниатюрами и вариантами."""
+
+    thumbnail.delete(name)
+    for image_format in IMAGE_VARIANT_FORMATS:
+        for width in IMAGE_VARIANT_WIDTHS:
+            default_storage.delete(variant_name(name, width, image_format))
@@ -0,0 +1,71 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from sorl.thumbnail import default
+
+from posts.constants import IMAGE_GC_GRACE_SECONDS
+from posts.images import delete_image_files, variant_root
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет картинки постов, на которые не ссылается ни один пост, "
+        "вместе с их миниатюрами и вариантами."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=IMAGE_GC_GRACE_SECONDS,
+            help=("Не трогать файлы моложе стольких секунд: "
+                  "их пост может быть ещё не сохранён."),
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать, что будет удалено.",
+        )
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field("image")
+        directory = field.upload_to.rstrip("/")
+        deadline = timezone.now() - timedelta(seconds=options["grace"])
+
+        referenced_roots = {
+            posixpath.splitext(name)[0]
+            for name in Post.objects.exclude(image="").exclude(
+                image__isnull=True,
+            ).values_list("image", flat=True).iterator()
+        }
+
+        removed = 0
+        _, filenames = field.storage.listdir(directory)
+        for filename in filenames:
+            name = posixpath.join(directory, filename)
+            original_root = variant_root(name)
+            if (posixpath.splitext(name)[0] in referenced_roots
+                    or original_root in referenced_roots
+                    or field.storage.get_modified_time(name) > deadline):
+                continue
+            # картинку могли заново привязать к посту уже после снимка
+            if (original_root is None
+                    and Post.objects.filter(image=name).exists()):
+                continue
+
+            removed += 1
+            self.stdout.write(name)
+            if options["dry_run"]:
+                continue
+            if original_root is None:
+                delete_image_files(name)
+            else:
+                default_storage.delete(name)
+
+        if not options["dry_run"]:
+            default.kvstore.cleanup()
+        self.stdout.write(self.style.SUCCESS(f"Удалено файлов: {removed}"))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.constants import TRANSFER_BATCH_SIZE
+from posts.transfer import FORMATS, MODELS, guess_format, write_file
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает сообщества, посты, комментарии или подписки "
+        "в файл JSONL, CSV или Parquet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(MODELS))
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=sorted(set(FORMATS.values())),
+            help="Формат файла. По умолчанию - по расширению.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=TRANSFER_BATCH_SIZE,
+            help="Сколько строк читать из базы и писать в файл за раз.",
+        )
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or guess_format(options["path"])
+        if file_format is None:
+            raise CommandError("Не удалось определить формат файла")
+
+        try:
+            written = write_file(
+                path=options["path"],
+                file_format=file_format,
+                kind=options["kind"],
+                batch_size=options["batch_size"],
+            )
+        except ImportError as error:
+            raise CommandError(f"Для формата {file_format} нужен {error.name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Выгружено строк: {written}"))
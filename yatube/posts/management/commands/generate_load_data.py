@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.constants import LOAD_DATA_BATCH_SIZE, LOAD_DATA_PRESETS
+from posts.models import Group
+from posts.synthetic import LoadDataGenerator
+from posts.transfer import rebuild_derived_data
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими пользователями, сообществами, "
+        "постами, комментариями и подписками для нагрузочных тестов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--preset",
+            choices=list(LOAD_DATA_PRESETS),
+            default="tiny",
+            help="Набор объёмов данных.",
+        )
+        for name in LOAD_DATA_PRESETS["tiny"]:
+            parser.add_argument(
+                f"--{name}",
+                type=int,
+                help=f"Сколько создать {name} вместо значения из набора.",
+            )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Зерно генератора: одинаковое зерно - одинаковые данные.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=LOAD_DATA_BATCH_SIZE,
+            help="Сколько строк вставлять одним запросом.",
+        )
+        parser.add_argument(
+            "--skip-rebuild",
+            action="store_true",
+            help="Не пересчитывать счётчики, ленты и поисковый индекс.",
+        )
+
+    def report(self, model, done):
+        self.stdout.write(f"{model._meta.verbose_name_plural}: {done}")
+
+    def handle(self, *args, **options):
+        counts = {
+            name: count if options[name] is None else options[name]
+            for name, count in LOAD_DATA_PRESETS[options["preset"]].items()
+        }
+        generator = LoadDataGenerator(
+            counts=counts,
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            progress=self.report if options["verbosity"] > 1 else None,
+        )
+        try:
+            ids = generator.generate()
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        if not options["skip_rebuild"]:
+            rebuild_derived_data(
+                author_ids=ids[User], group_ids=ids[Group], search=True,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            ", ".join(f"{name}: {count}" for name, count in counts.items()),
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import prepare_post_image
+
+
+class Command(BaseCommand):
+    help = (
+        "Строит миниатюры и адаптивные варианты картинок постов, "
+        "для которых они ещё не построены."
+    )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image="").exclude(
+            image__isnull=True,
+        ).filter(thumbnail="").order_by().iterator()
+
+        for post in posts:
+            prepare_post_image(post)
+
+        self.stdout.write(self.style.SUCCESS("Миниатюры построены"))
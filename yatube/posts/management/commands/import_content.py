@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts.constants import TRANSFER_BATCH_SIZE
+from posts.transfer import (FORMATS, MODELS, guess_format, import_file,
+                            rebuild_after_import)
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает сообщества, посты, комментарии или подписки "
+        "из файла JSONL, CSV или Parquet пачками через bulk_create, "
+        "а затем пересчитывает счётчики, ленты и поисковый индекс."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(MODELS))
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=sorted(set(FORMATS.values())),
+            help="Формат файла. По умолчанию - по расширению.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=TRANSFER_BATCH_SIZE,
+            help="Сколько строк читать из файла и записывать в базу за раз.",
+        )
+        parser.add_argument(
+            "--skip-rebuild",
+            action="store_true",
+            help=("Не пересчитывать производные данные: удобно, если "
+                  "следом загружается ещё один файл. После последнего "
+                  "файла нужен полный пересчёт: rebuild_derived_data."),
+        )
+
+    def handle(self, *args, **options):
+        file_format = options["format"] or guess_format(options["path"])
+        if file_format is None:
+            raise CommandError("Не удалось определить формат файла")
+
+        try:
+            summary = import_file(
+                path=options["path"],
+                file_format=file_format,
+                kind=options["kind"],
+                batch_size=options["batch_size"],
+            )
+        except ImportError as error:
+            raise CommandError(f"Для формата {file_format} нужен {error.name}")
+        except (IntegrityError, KeyError, ValueError) as error:
+            raise CommandError(f"Файл не загружен: {error}")
+
+        if not options["skip_rebuild"]:
+            rebuild_after_import(summary)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Загружено строк: {summary.count}"),
+        )
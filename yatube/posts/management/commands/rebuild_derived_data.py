@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.transfer import rebuild_all_derived_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает с нуля счётчики, ленты подписок, поисковый индекс "
+        "и сбрасывает кэш: нужен после загрузок с --skip-rebuild."
+    )
+
+    def handle(self, *args, **options):
+        rebuild_all_derived_data()
+        self.stdout.write(self.style.SUCCESS("Производные данные пересчитаны"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.search import is_supported, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Строит с нуля полнотекстовый индекс постов и комментариев."
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            raise CommandError("Полнотекстовый поиск работает только с SQLite")
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Поисковый индекс построен"))
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-17 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_formats',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50, verbose_name='Форматы готовых вариантов картинки'),
+        ),
+    ]
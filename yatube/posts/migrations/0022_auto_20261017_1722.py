@@ -0,0 +1,19 @@
+# Generated by Django 2.2.28 on 2026-10-17 17:22
+
+import core.backends.content_addressed
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_auto_20261017_1718'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, help_text='Загрузите картинку', null=True, storage=core.backends.content_addressed.ContentAddressedStorage(), upload_to='posts/', verbose_name='Заглавная картинка поста'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from core.backends.content_addressed import ContentAddressedStorage
 from core.models import CreatedModel
 from django.contrib.auth import get_user_model
 from django.db import models
@@ -29,6 +30,11 @@ class Group(models.Model):
         verbose_name="Слаг сообщества",
         help_text="Введите слаг (он будет использован в URL)",
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество постов в сообществе",
+    )
 
     class Meta:
         verbose_name = "Сообщество"
@@ -76,14 +82,65 @@ class Post(CreatedModel):
         verbose_name="Заглавная картинка поста",
         help_text="Загрузите картинку",
         upload_to="posts/",
+        storage=ContentAddressedStorage(),
+        db_index=True,
         blank=True,
         null=True,
         editable=True,
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество комментариев под постом",
+    )
+    image_formats = models.CharField(
+        max_length=50,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Форматы готовых вариантов картинки",
+    )
+    thumbnail = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        editable=False,
+        verbose_name="Миниатюра картинки для карточек",
+    )
+    thumbnail_width = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Ширина миниатюры",
+    )
+    thumbnail_height = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Высота миниатюры",
+    )
+    updated = models.DateTimeField(
+        verbose_name="Дата и время изменения",
+        auto_now=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ("-created", )
         get_latest_by = "created"
+        # страницы автора и сообщества читаются обратным проходом
+        # по индексу: (created, id) идут в нём по возрастанию,
+        # поэтому порядок ("-created", "-pk") не требует сортировки
+        indexes = [
+            models.Index(
+                fields=["author", "created"],
+                name="posts_post_author_created_idx",
+            ),
+            models.Index(
+                fields=["group", "created"],
+                name="posts_post_group_created_idx",
+            ),
+        ]
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
 
@@ -128,6 +185,12 @@ class Comment(CreatedModel):
     class Meta:
         ordering = ("-created", )
         get_latest_by = "created"
+        indexes = [
+            models.Index(
+                fields=["post", "created"],
+                name="posts_comment_post_created_idx",
+            ),
+        ]
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
 
@@ -161,7 +224,15 @@ class Follow(CreatedModel):
     )
 
     class Meta:
+        # уникальный индекс (user, author) покрывает подписки
+        # пользователя, а (author, user) - подписчиков автора
         unique_together = ["user", "author"]
+        indexes = [
+            models.Index(
+                fields=["author", "user"],
+                name="posts_follow_author_user_idx",
+            ),
+        ]
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"
         constraints = [
@@ -173,3 +244,79 @@ class Follow(CreatedModel):
 
     def __str__(self) -> str:
         return f"{self.user} follows {self.author}"
+
+
+class FeedEntry(models.Model):
+    """
+    Запись материализованной ленты подписок: пост автора,
+    на которого подписан пользователь. Дата публикации поста
+    продублирована, чтобы лента сортировалась по индексу без JOIN.
+    """
+
+    user = models.ForeignKey(
+        to=User,
+        related_name="feed_entries",
+        on_delete=models.CASCADE,
+        verbose_name="Владелец ленты",
+    )
+    post = models.ForeignKey(
+        to=Post,
+        related_name="feed_entries",
+        on_delete=models.CASCADE,
+        verbose_name="Пост в ленте",
+    )
+    created = models.DateTimeField(
+        verbose_name="Дата и время публикации поста",
+    )
+
+    class Meta:
+        unique_together = ["user", "post"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created"],
+                name="posts_feed_user_created_idx",
+            ),
+        ]
+        verbose_name = "Запись ленты подписок"
+        verbose_name_plural = "Записи лент подписок"
+
+    def __str__(self) -> str:
+        return f"{self.post} in feed of {self.user}"
+
+
+class UserStats(models.Model):
+    """
+    Счётчики пользователя (объекта User): сколько у него постов,
+    подписчиков и подписок. Обновляются сигналами при записи
+    объектов Post и Follow, пересчитываются командой rebuild_counters.
+    """
+
+    user = models.OneToOneField(
+        to=User,
+        primary_key=True,
+        related_name="stats",
+        on_delete=models.CASCADE,
+        verbose_name="Пользователь",
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество постов пользователя",
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество подписчиков пользователя",
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Количество подписок пользователя",
+    )
+
+    class Meta:
+        verbose_name = "Счётчики пользователя"
+        verbose_name_plural = "Счётчики пользователей"
+
+    def __str__(self) -> str:
+        return f"{self.user} stats"
@@ -0,0 +1,230 @@
+"""
+Полнотекстовый поиск по постам и комментариям.
+
+Индекс - виртуальная таблица SQLite FTS5 posts_search. В ней лежат
+не исходные тексты, а основы слов (core.stemmers), поэтому запрос
+«кошками» находит пост про «кошку». У поста и у каждого комментария
+своя строка: rowid поста - 2 * id, комментария - 2 * id + 1,
+так что строку можно обновить или удалить по rowid без поиска.
+Индекс обновляют сигналы моделей, а с нуля его строит команда
+rebuild_search_index (её нужно запустить и после миграции 0023,
+которая создаёт индекс пустым). На базах, отличных от SQLite, поиск отключён.
+"""
+
+import re
+from itertools import islice
+
+from core.stemmers import stem_russian
+from django.db import connection, transaction
+from django.utils.html import strip_tags
+
+from .constants import SEARCH_BATCH_SIZE, SEARCH_COMMENT_WEIGHT
+from .models import Comment, Post
+
+WORD_RE = re.compile(r"\w+")
+
+
+def is_supported() -> bool:
+    return connection.vendor == "sqlite"
+
+
+def stems(text: str) -> list:
+    """Основы слов текста в порядке их появления."""
+
+    return [
+        stem_russian(word) for word in WORD_RE.findall(strip_tags(text))
+    ]
+
+
+def match_expression(query: str) -> str:
+    """
+    Запрос пользователя в синтаксисе FTS5: все слова обязательны,
+    каждое ищется по основе как по префиксу.
+    """
+
+    return " ".join(f'"{stem}"*' for stem in stems(query))
+
+
+def post_rowid(post_id) -> int:
+    return 2 * post_id
+
+
+def comment_rowid(comment_id) -> int:
+    return 2 * comment_id + 1
+
+
+def _write(cursor, rows) -> None:
+    """Заменяет строки индекса: rows - [(rowid, post_id, text), ...]."""
+
+    rows = [
+        (rowid, post_id, " ".join(stems(text)))
+        for rowid, post_id, text in rows
+    ]
+    cursor.executemany(
+        "DELETE FROM posts_search WHERE rowid = %s",
+        [(rowid,) for rowid, _, _ in rows],
+    )
+    cursor.executemany(
+        "INSERT INTO posts_search (rowid, post_id, body) "
+        "VALUES (%s, %s, %s)",
+        rows,
+    )
+
+
+def index_rows(cursor, posts, comments) -> None:
+    """
+    Записывает в индекс посты [(id, text), ...]
+    и комментарии [(id, post_id, text), ...] пачками.
+    """
+
+    rows = iter([
+        *((post_rowid(pk), pk, text) for pk, text in posts),
+        *((comment_rowid(pk), post_id, text)
+          for pk, post_id, text in comments),
+    ])
+    while True:
+        batch = list(islice(rows, SEARCH_BATCH_SIZE))
+        if not batch:
+            return
+        _write(cursor, batch)
+
+
+def index_post(post) -> None:
+    if is_supported():
+        with connection.cursor() as cursor:
+            _write(cursor, [(post_rowid(post.pk), post.pk, post.text)])
+
+
+def index_comment(comment) -> None:
+    if is_supported():
+        with connection.cursor() as cursor:
+            _write(cursor, [
+                (comment_rowid(comment.pk), comment.post_id, comment.text),
+            ])
+
+
+def _delete(rowid) -> None:
+    if is_supported():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM posts_search WHERE rowid = %s", [rowid],
+            )
+
+
+def unindex_post(post_id) -> None:
+    _delete(post_rowid(post_id))
+
+
+def unindex_comment(comment_id) -> None:
+    _delete(comment_rowid(comment_id))
+
+
+def rebuild_index() -> None:
+    """
+    Строит индекс с нуля по всем постам и комментариям.
+    Одной транзакцией: иначе SQLite фиксирует каждую строку отдельно.
+    """
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("DELETE FROM posts_search")
+        index_rows(
+            cursor,
+            posts=Post.objects.order_by().values_list(
+                "pk", "text",
+            ).iterator(),
+            comments=Comment.objects.order_by().values_list(
+                "pk", "post_id", "text",
+            ).iterator(),
+        )
+
+
+def _filter_found(queryset, query: str, found_ids_sql: str):
+    """
+    Оставляет в queryset строки, id которых выбирает found_ids_sql
+    по выражению запроса. RawSQL в pk__in Django оборачивает
+    в двойные скобки, и SQLite берёт из подзапроса только первую
+    строку, поэтому условие IN пишется целиком через extra.
+    """
+
+    match = match_expression(query)
+    if not match:
+        return queryset.none()
+    opts = queryset.model._meta
+    return queryset.extra(
+        where=[f'"{opts.db_table}"."{opts.pk.column}" IN ({found_ids_sql})'],
+        params=[match],
+    )
+
+
+def filter_posts(queryset, query: str):
+    """Оставляет в queryset постов только найденные по запросу."""
+
+    return _filter_found(
+        queryset, query,
+        "SELECT post_id FROM posts_search "
+        "WHERE posts_search MATCH %s AND rowid % 2 = 0",
+    )
+
+
+def filter_comments(queryset, query: str):
+    """Оставляет в queryset комментариев только найденные по запросу."""
+
+    return _filter_found(
+        queryset, query,
+        "SELECT (rowid - 1) / 2 FROM posts_search "
+        "WHERE posts_search MATCH %s AND rowid % 2 = 1",
+    )
+
+
+class SearchResults:
+    """
+    Найденные посты в порядке релевантности (BM25).
+    Совпадения в комментариях весят меньше совпадений в самом посте.
+    Поддерживает count() и срезы, поэтому годится для Paginator.
+    """
+
+    def __init__(self, query: str):
+        self.match = match_expression(query) if is_supported() else ""
+
+    def count(self) -> int:
+        if not self.match:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(DISTINCT post_id) FROM posts_search "
+                "WHERE posts_search MATCH %s",
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("SearchResults supports only slicing")
+        if not self.match:
+            return []
+
+        offset = key.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT post_id, MIN(score) AS best FROM ("
+                "SELECT post_id, CASE WHEN rowid %% 2 = 0 "
+                "THEN bm25(posts_search) "
+                "ELSE bm25(posts_search) * %s END AS score "
+                "FROM posts_search WHERE posts_search MATCH %s "
+                # LIMIT не даёт SQLite влить подзапрос в агрегат,
+                # где bm25 недоступна
+                "LIMIT -1"
+                ") GROUP BY post_id ORDER BY best, post_id DESC "
+                "LIMIT %s OFFSET %s",
+                [SEARCH_COMMENT_WEIGHT, self.match,
+                 key.stop - offset, offset],
+            )
+            post_ids = [post_id for post_id, _ in cursor.fetchall()]
+
+        posts = Post.objects.select_related("author", "group").in_bulk(
+            post_ids,
+        )
+        return [posts[pk] for pk in post_ids if pk in posts]
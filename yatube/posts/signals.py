@@ -0,0 +1,329 @@
+"""Обработчики сигналов моделей приложения posts"""
+
+from core.cache import bump_versions
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import (GROUPS_PAGES_SCOPE, INDEX_PAGE_SCOPE, USERS_PAGES_SCOPE,
+                    author_cards_scope, group_cards_scope, group_page_scope,
+                    post_page_scope, profile_page_scope)
+from .constants import FEED_FANOUT_MAX_FOLLOWERS
+from .counters import change_counters, change_user_stats
+from .feeds import backfill_feed, fan_out_post, is_fanned_out, prune_feed
+from .helpers import count_cache_key
+from .models import Comment, Follow, Group, Post, UserStats
+from .search import (index_comment, index_post, unindex_comment,
+                     unindex_post)
+from .thumbnails import schedule_thumbnails
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    """Заводит счётчики для только что зарегистрированного пользователя."""
+
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_group(sender, instance, **kwargs):
+    """
+    Запоминает сообщество, в котором пост был до редактирования,
+    чтобы сбросить закэшированные данные и у старого сообщества.
+    Если сменилась картинка, забывает о её миниатюре и вариантах
+    и отмечает, что их нужно построить заново; файлы старой картинки
+    уберёт команда collect_image_garbage.
+    """
+
+    instance._previous_group_id = None
+    instance._image_changed = bool(instance.image)
+    if instance.pk is not None:
+        instance._previous_group_id, previous_image = Post.objects.filter(
+            pk=instance.pk,
+        ).values_list("group_id", "image").first() or (None, None)
+        instance._image_changed = previous_image != instance.image.name
+        if instance._image_changed:
+            instance.image_formats = ""
+            instance.thumbnail = ""
+            instance.thumbnail_width = instance.thumbnail_height = None
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def drop_post_counts(sender, instance, created=None, **kwargs):
+    """
+    Сбрасывает закэшированные количества постов во всех разделах.
+    Правка поста их не меняет, а перенос в другое сообщество меняет
+    только количества сообществ, поэтому ленты подписчиков (по ключу
+    на каждого) сбрасываются лишь при создании и удалении поста,
+    и только у авторов, чьи посты раскладываются по лентам: работа
+    та же, что у fan_out_post. У популярных авторов количество в лентах
+    подписчиков устаревает до COUNT_CACHE_TIMEOUT_SECONDS.
+    """
+
+    previous_group_id = getattr(instance, "_previous_group_id", None)
+    if created is False and previous_group_id == instance.group_id:
+        return
+
+    keys = {
+        count_cache_key("group", group_id)
+        for group_id in (instance.group_id, previous_group_id)
+        if group_id is not None
+    }
+    # created равен None для post_delete
+    if created is not False:
+        keys.update((
+            count_cache_key("all"),
+            count_cache_key("author", instance.author_id),
+        ))
+        # у популярного автора порог отсекает всех подписчиков сразу
+        follower_ids = Follow.objects.filter(
+            author_id=instance.author_id,
+            author__stats__followers_count__lte=FEED_FANOUT_MAX_FOLLOWERS,
+        ).values_list("user_id", flat=True)
+        keys.update(
+            count_cache_key("feed", user_id) for user_id in follower_ids
+        )
+
+    cache.delete_many(keys)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def drop_feed_count(sender, instance, **kwargs):
+    """Сбрасывает закэшированное количество постов в ленте подписчика."""
+
+    cache.delete(count_cache_key("feed", instance.user_id))
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    """Учитывает новый пост или его перенос в другое сообщество."""
+
+    if raw:
+        return
+
+    previous_group_id = getattr(instance, "_previous_group_id", None)
+
+    if created:
+        change_user_stats(instance.author_id, posts_count=1)
+    elif previous_group_id == instance.group_id:
+        return
+    elif previous_group_id is not None:
+        change_counters(
+            Group.objects.filter(pk=previous_group_id), posts_count=-1,
+        )
+
+    if instance.group_id is not None:
+        change_counters(
+            Group.objects.filter(pk=instance.group_id), posts_count=1,
+        )
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    """Вычитает удалённый пост из счётчиков автора и сообщества."""
+
+    change_counters(
+        UserStats.objects.filter(user_id=instance.author_id), posts_count=-1,
+    )
+    if instance.group_id is not None:
+        change_counters(
+            Group.objects.filter(pk=instance.group_id), posts_count=-1,
+        )
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    """Учитывает новый комментарий под постом."""
+
+    if created and not raw:
+        change_counters(
+            Post.objects.filter(pk=instance.post_id), comments_count=1,
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    """Вычитает удалённый комментарий из счётчика поста."""
+
+    change_counters(
+        Post.objects.filter(pk=instance.post_id), comments_count=-1,
+    )
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, raw=False, **kwargs):
+    """Учитывает новую подписку у подписчика и у автора."""
+
+    if created and not raw:
+        change_user_stats(instance.user_id, following_count=1)
+        change_user_stats(instance.author_id, followers_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    """Вычитает удалённую подписку у подписчика и у автора."""
+
+    change_counters(
+        UserStats.objects.filter(user_id=instance.user_id),
+        following_count=-1,
+    )
+    change_counters(
+        UserStats.objects.filter(user_id=instance.author_id),
+        followers_count=-1,
+    )
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw=False, **kwargs):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+
+    if created and not raw:
+        fan_out_post(post=instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_followed_author(sender, instance, created, raw=False,
+                             **kwargs):
+    """Добавляет посты автора в ленту нового подписчика."""
+
+    if created and not raw and is_fanned_out(instance.author_id):
+        backfill_feed(user_ids=[instance.user_id],
+                      author_id=instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_unfollowed_author(sender, instance, **kwargs):
+    """
+    Убирает посты автора из ленты отписавшегося пользователя.
+    Если после отписки посты автора снова раскладываются по лентам,
+    достраивает ленты оставшихся подписчиков.
+    """
+
+    prune_feed(user_id=instance.user_id, author_id=instance.author_id)
+
+    followers_count = UserStats.objects.filter(
+        user_id=instance.author_id,
+    ).values_list("followers_count", flat=True).first()
+    if followers_count == FEED_FANOUT_MAX_FOLLOWERS:
+        backfill_feed(
+            user_ids=Follow.objects.filter(
+                author_id=instance.author_id,
+            ).values_list("user_id", flat=True).iterator(),
+            author_id=instance.author_id,
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_author_post_cards(sender, instance, update_fields=None, **kwargs):
+    """
+    Сбрасывает закэшированные карточки постов автора и страницы лент.
+    Запись одного только времени входа в систему карточки не меняет.
+    """
+
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    bump_versions(author_cards_scope(instance.pk), USERS_PAGES_SCOPE)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def drop_group_post_cards(sender, instance, **kwargs):
+    """Сбрасывает закэшированные карточки постов сообщества и страницы лент."""
+
+    bump_versions(group_cards_scope(instance.pk), GROUPS_PAGES_SCOPE)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def drop_post_pages(sender, instance, **kwargs):
+    """
+    Сбрасывает закэшированные страницы, на которых показывается пост:
+    его собственную, главную, страницу автора
+    и страницы старого и нового сообществ.
+    """
+
+    group_ids = {
+        instance.group_id, getattr(instance, "_previous_group_id", None),
+    } - {None}
+    slugs = Group.objects.filter(
+        pk__in=group_ids,
+    ).values_list("slug", flat=True) if group_ids else []
+    username = User.objects.filter(
+        pk=instance.author_id,
+    ).values_list("username", flat=True).first()
+
+    scopes = [
+        post_page_scope(instance.pk), INDEX_PAGE_SCOPE,
+        *map(group_page_scope, slugs),
+    ]
+    if username is not None:
+        scopes.append(profile_page_scope(username))
+    bump_versions(*scopes)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def drop_followed_profile_page(sender, instance, **kwargs):
+    """Сбрасывает страницу автора с кнопкой подписки."""
+
+    username = User.objects.filter(
+        pk=instance.author_id,
+    ).values_list("username", flat=True).first()
+    if username is not None:
+        bump_versions(profile_page_scope(username))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def drop_commented_post_page(sender, instance, **kwargs):
+    """Сбрасывает страницу поста, под которым изменились комментарии."""
+
+    bump_versions(post_page_scope(instance.post_id))
+
+
+@receiver(post_save, sender=Post)
+def schedule_post_thumbnails(sender, instance, raw=False, **kwargs):
+    """
+    Ставит в очередь миниатюры новой или заменённой картинки поста,
+    откуда бы пост ни сохранялся: из формы, админки или импорта.
+    """
+
+    if not raw and getattr(instance, "_image_changed", False):
+        schedule_thumbnails(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw=False, **kwargs):
+    """Обновляет пост в полнотекстовом индексе."""
+
+    if not raw:
+        index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    """Убирает удалённый пост из полнотекстового индекса."""
+
+    unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_saved_comment(sender, instance, raw=False, **kwargs):
+    """Обновляет комментарий в полнотекстовом индексе."""
+
+    if not raw:
+        index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_deleted_comment(sender, instance, **kwargs):
+    """Убирает удалённый комментарий из полнотекстового индекса."""
+
+    unindex_comment(instance.pk)
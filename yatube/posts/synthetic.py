@@ -0,0 +1,195 @@
+"""
+Синтетические данные для нагрузочного тестирования: пользователи,
+сообщества, посты, комментарии и подписки в объёмах продакшена.
+
+Популярность авторов, сообществ и постов распределена по степенному
+закону: у немногих авторов огромное число подписчиков и постов,
+у большинства - единицы. Одинаковые seed и объёмы на одной и той же
+исходной базе дают одинаковые данные (даты отсчитываются от момента
+запуска). Объекты получают id заранее, поэтому ссылки между ними
+не требуют перечитывать только что вставленные строки.
+"""
+
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from .constants import (LOAD_DATA_BATCH_SIZE, LOAD_DATA_COMMENT_EXPONENT,
+                        LOAD_DATA_DAYS, LOAD_DATA_FOLLOW_EXPONENT,
+                        LOAD_DATA_GROUP_EXPONENT, LOAD_DATA_GROUP_SHARE,
+                        LOAD_DATA_PASSWORD, LOAD_DATA_POST_EXPONENT)
+from .models import Comment, Follow, Group, Post
+from .transfer import batches, keep_created, reset_sequences
+
+User = get_user_model()
+
+LOCALE: str = "ru_RU"
+
+
+def power_law_index(rng, size: int, exponent: float) -> int:
+    """
+    Случайный индекс от 0 до size - 1. Вероятность индекса k убывает
+    примерно как (k + 1) ** -exponent: обратная функция распределения
+    непрерывного степенного закона на [1, size + 1).
+    """
+
+    u = rng.random()
+    if exponent == 1:
+        x = (size + 1) ** u
+    else:
+        power = 1 - exponent
+        x = (1 + u * ((size + 1) ** power - 1)) ** (1 / power)
+    return min(int(x) - 1, size - 1)
+
+
+def _next_id(model) -> int:
+    return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+
+def _insert(model, objects, batch_size, progress, **options) -> None:
+    with keep_created(model):
+        done = 0
+        for batch in batches(objects, batch_size):
+            model.objects.bulk_create(batch, **options)
+            done += len(batch)
+            if progress is not None:
+                progress(model, done)
+    reset_sequences(model)
+
+
+class LoadDataGenerator:
+    """
+    Генератор синтетических данных. Объёмы задаются словарём
+    counts с ключами users, groups, posts, comments и follows.
+    """
+
+    def __init__(self, counts: dict, seed: int = 0,
+                 batch_size: int = LOAD_DATA_BATCH_SIZE, progress=None):
+        self.counts = counts
+        self.batch_size = batch_size
+        self.progress = progress
+        self.rng = random.Random(seed)
+        self.fake = Faker(LOCALE)
+        self.fake.seed_instance(seed)
+        self.end = timezone.now()
+        self.start = self.end - timedelta(days=LOAD_DATA_DAYS)
+        self.ids = {}
+
+    def _date(self, share: float):
+        """Дата на доле share от начала до конца периода."""
+
+        return self.start + (self.end - self.start) * share
+
+    def _post_created(self, index: int):
+        # посты идут по времени в порядке id
+        return self._date(index / self.counts["posts"])
+
+    def users(self):
+        password = make_password(LOAD_DATA_PASSWORD)
+        for pk in self.ids[User]:
+            yield User(
+                id=pk,
+                username=f"{self.fake.user_name()}_{pk}",
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                email=self.fake.email(),
+                password=password,
+                date_joined=self._date(self.rng.random()),
+            )
+
+    def groups(self):
+        for pk in self.ids[Group]:
+            yield Group(
+                id=pk,
+                title=self.fake.sentence(nb_words=3).rstrip(".")[:200],
+                slug=f"group-{pk}",
+                description=self.fake.paragraph(),
+            )
+
+    def posts(self):
+        users, groups = self.ids[User], self.ids[Group]
+        for index, pk in enumerate(self.ids[Post]):
+            group_id = None
+            if groups and self.rng.random() < LOAD_DATA_GROUP_SHARE:
+                group_id = groups[power_law_index(
+                    self.rng, len(groups), LOAD_DATA_GROUP_EXPONENT,
+                )]
+            yield Post(
+                id=pk,
+                created=self._post_created(index),
+                author_id=users[power_law_index(
+                    self.rng, len(users), LOAD_DATA_POST_EXPONENT,
+                )],
+                group_id=group_id,
+                text=self.fake.paragraph(
+                    nb_sentences=self.rng.randint(1, 8),
+                ),
+            )
+
+    def comments(self):
+        users, posts = self.ids[User], self.ids[Post]
+        for pk in self.ids[Comment]:
+            # свежие посты комментируют чаще
+            index = len(posts) - 1 - power_law_index(
+                self.rng, len(posts), LOAD_DATA_COMMENT_EXPONENT,
+            )
+            created = self._post_created(index) + timedelta(
+                hours=self.rng.expovariate(1 / 24),
+            )
+            yield Comment(
+                id=pk,
+                created=min(created, self.end),
+                post_id=posts[index],
+                author_id=users[self.rng.randrange(len(users))],
+                text=self.fake.sentence(nb_words=self.rng.randint(3, 20)),
+            )
+
+    def follows(self):
+        users = self.ids[User]
+        for pk in self.ids[Follow]:
+            user_id = users[self.rng.randrange(len(users))]
+            author_id = users[power_law_index(
+                self.rng, len(users), LOAD_DATA_FOLLOW_EXPONENT,
+            )]
+            if user_id == author_id:
+                continue
+            yield Follow(
+                id=pk,
+                created=self._date(self.rng.random()),
+                user_id=user_id,
+                author_id=author_id,
+            )
+
+    def generate(self) -> dict:
+        """
+        Вставляет данные в базу. Возвращает диапазоны id
+        созданных объектов по моделям.
+        """
+
+        plan = (
+            (User, "users", self.users),
+            (Group, "groups", self.groups),
+            (Post, "posts", self.posts),
+            (Comment, "comments", self.comments),
+            # повторные подписки пропускаются
+            (Follow, "follows", self.follows),
+        )
+        for model, name, objects in plan:
+            first = _next_id(model)
+            self.ids[model] = range(first, first + self.counts[name])
+            if not self.ids[model]:
+                continue
+            if model not in (User, Group) and not self.ids[User]:
+                raise ValueError(f"Для {name} нужны пользователи")
+            if model is Comment and not self.ids[Post]:
+                raise ValueError("Для comments нужны посты")
+            _insert(
+                model, objects(), self.batch_size, self.progress,
+                ignore_conflicts=model is Follow,
+            )
+        return self.ids
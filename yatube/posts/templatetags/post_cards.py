@@ -0,0 +1,53 @@
+from core.cache import get_versions
+from django import template
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from ..cache import author_cards_scope, group_cards_scope
+from ..constants import POST_CARD_CACHE_TIMEOUT_SECONDS
+
+register = template.Library()
+
+
+def post_card_scopes(post) -> list:
+    """Области версий, от которых зависит карточка поста."""
+
+    scopes = [author_cards_scope(post.author_id)]
+    if post.group_id is not None:
+        scopes.append(group_cards_scope(post.group_id))
+    return scopes
+
+
+@register.simple_tag
+def post_card(post, show_author=True, show_group=True):
+    """
+    Карточка поста для лент. Готовая разметка кэшируется по id поста,
+    дате его изменения и версиям его автора и сообщества,
+    так что правка любого из них даёт новый ключ.
+    """
+
+    key = make_template_fragment_key(
+        fragment_name="post_card",
+        vary_on=[
+            post.pk,
+            post.updated.timestamp(),
+            show_author,
+            show_group,
+            *get_versions(*post_card_scopes(post)),
+        ],
+    )
+
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(
+            template_name="includes/post_card.html",
+            context={
+                "post": post,
+                "show_author": show_author,
+                "show_group": show_group,
+            },
+        )
+        cache.set(key, html, POST_CARD_CACHE_TIMEOUT_SECONDS)
+    return mark_safe(html)
@@ -0,0 +1,21 @@
+from django import template
+
+from ..constants import IMAGE_VARIANT_SIZES
+from ..images import variant_sources
+from ..thumbnails import card_thumbnail
+
+register = template.Library()
+
+
+@register.inclusion_tag("includes/post_picture.html")
+def post_picture(post):
+    """
+    Картинка поста с адаптивными вариантами в <source srcset>.
+    Пока варианты не построены, остаётся одна обычная миниатюра.
+    """
+
+    return {
+        "thumbnail": card_thumbnail(post),
+        "sources": variant_sources(post),
+        "sizes": IMAGE_VARIANT_SIZES,
+    }
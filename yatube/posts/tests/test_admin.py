@@ -0,0 +1,129 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy
+
+from ..helpers import EstimatedCountPaginator, estimated_row_count
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AdminChangelistTests(TestCase):
+    """Набор тестов для проверки списков объектов в django-админке"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="test_admin", email="admin@example.com",
+            password="test_password",
+        )
+        self.client.force_login(self.admin)
+        self.group = Group.objects.create(slug="test_slug")
+
+    def add_rows(self, number):
+        start = Post.objects.count()
+        for i in range(start, start + number):
+            author = User.objects.create_user(username=f"author_{i}")
+            post = Post.objects.create(
+                text=f"Пост номер {i}", author=author, group=self.group,
+            )
+            Comment.objects.create(
+                text=f"Комментарий номер {i}", post=post, author=author,
+            )
+            Follow.objects.create(user=self.admin, author=author)
+
+    def count_queries(self, model):
+        url = reverse_lazy(
+            viewname=f"admin:posts_{model._meta.model_name}_changelist",
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(path=url)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.add_rows(number=2)
+        few = {
+            model: self.count_queries(model)
+            for model in (Post, Group, Comment, Follow)
+        }
+        self.add_rows(number=8)
+
+        for model, expected in few.items():
+            with self.subTest(model=model):
+                self.assertEqual(
+                    first=self.count_queries(model), second=expected,
+                )
+
+    def test_search_uses_full_text_index(self):
+        self.add_rows(number=3)
+        response = self.client.get(
+            path=reverse_lazy(viewname="admin:posts_post_changelist"),
+            data={"q": "номером 1"},
+        )
+        self.assertEqual(
+            first=[post.text for post in response.context["cl"].result_list],
+            second=["Пост номер 1"],
+        )
+
+        response = self.client.get(
+            path=reverse_lazy(viewname="admin:posts_comment_changelist"),
+            data={"q": "комментарии 2"},
+        )
+        self.assertEqual(
+            first=[
+                comment.text
+                for comment in response.context["cl"].result_list
+            ],
+            second=["Комментарий номер 2"],
+        )
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    """Набор тестов для проверки пагинатора с оценкой количества"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_username")
+        Post.objects.bulk_create(
+            Post(text=f"Пост номер {i}", author=self.user) for i in range(5)
+        )
+
+    def test_small_table_is_counted_exactly(self):
+        paginator = EstimatedCountPaginator(Post.objects.all(), per_page=2)
+        self.assertEqual(first=paginator.count, second=5)
+
+    @mock.patch("posts.helpers.ADMIN_EXACT_COUNT_LIMIT", 3)
+    def test_large_table_uses_statistics(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        Post.objects.bulk_create(
+            Post(text="Пост после ANALYZE", author=self.user)
+            for i in range(2)
+        )
+        self.assertEqual(first=estimated_row_count(Post), second=5)
+
+        with CaptureQueriesContext(connection) as queries:
+            count = EstimatedCountPaginator(
+                Post.objects.all(), per_page=2,
+            ).count
+        self.assertEqual(first=count, second=5)
+        self.assertNotIn("COUNT", queries[0]["sql"])
+
+    def test_postgresql_estimate_in_exponent_form(self):
+        with mock.patch("posts.helpers.connection") as database:
+            database.vendor = "postgresql"
+            cursor = database.cursor.return_value.__enter__.return_value
+            cursor.fetchone.return_value = (1.25e+16,)
+
+            self.assertEqual(
+                first=estimated_row_count(Post), second=12_500_000_000_000_000,
+            )
+
+    @mock.patch("posts.helpers.ADMIN_EXACT_COUNT_LIMIT", 3)
+    def test_filtered_count_is_capped(self):
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(author=self.user), per_page=2,
+        )
+        self.assertEqual(first=paginator.count, second=4)
@@ -48,7 +48,7 @@ class PostsCacheTests(TestCase):
         cache.clear()
 
     def test_index_page_caches(self):
-        """Шаблон index использует кэш с обозначенными параметрами."""
+        """Шаблон index использует кэш, пока посты не менялись."""
 
         initial_response = self.guest_client.get(
             path=reverse_lazy(viewname="posts:index"), follow=False,
@@ -62,33 +62,97 @@ class PostsCacheTests(TestCase):
             second=2,
         )
 
-        self.own_post.delete()
-
-        response_after_post_deletion = self.guest_client.get(
+        cached_response = self.guest_client.get(
             path=reverse_lazy(viewname="posts:index"), follow=False,
         )
         self.assertEqual(
-            first=response_after_post_deletion.status_code,
+            first=cached_response.status_code,
             second=HTTPStatus.OK,
         )
         self.assertIsNone(
-            obj=response_after_post_deletion.context,
+            obj=cached_response.context,
         )
         self.assertHTMLEqual(
             html1=initial_response.content.decode("utf-8"),
-            html2=response_after_post_deletion.content.decode("utf-8"),
+            html2=cached_response.content.decode("utf-8"),
         )
 
-        cache.clear()
+    def test_index_page_cache_drops_on_post_changes(self):
+        """Создание и удаление поста сразу видны на странице index."""
 
-        response_after_cache_clearance = self.guest_client.get(
+        self.guest_client.get(
+            path=reverse_lazy(viewname="posts:index"), follow=False,
+        )
+
+        self.own_post.delete()
+
+        response_after_post_deletion = self.guest_client.get(
             path=reverse_lazy(viewname="posts:index"), follow=False,
         )
         self.assertEqual(
-            first=response_after_cache_clearance.status_code,
+            first=response_after_post_deletion.status_code,
             second=HTTPStatus.OK,
         )
         self.assertEqual(
-            first=len(response_after_cache_clearance.context["page_obj"]),
+            first=len(response_after_post_deletion.context["page_obj"]),
             second=1,
         )
+
+        Post.objects.create(
+            text="Только что опубликованный пост",
+            author=self.user,
+        )
+
+        response_after_post_creation = self.guest_client.get(
+            path=reverse_lazy(viewname="posts:index"), follow=False,
+        )
+        self.assertEqual(
+            first=len(response_after_post_creation.context["page_obj"]),
+            second=2,
+        )
+
+    def test_group_and_profile_pages_cache_drops_on_post_changes(self):
+        """Страницы сообщества и автора сбрасываются при правке поста."""
+
+        paths = (
+            reverse_lazy(
+                viewname="posts:group_posts",
+                kwargs={"slug": self.group.slug},
+            ),
+            reverse_lazy(
+                viewname="posts:profile",
+                kwargs={"username": self.user.username},
+            ),
+        )
+
+        for path in paths:
+            with self.subTest(path=path):
+                self.guest_client.get(path=path, follow=False)
+                self.assertIsNone(
+                    obj=self.guest_client.get(path=path).context,
+                )
+
+        self.own_post.text = "Отредактированный текст тестового поста"
+        self.own_post.save()
+
+        for path in paths:
+            with self.subTest(path=path):
+                response = self.guest_client.get(path=path, follow=False)
+                self.assertIsNotNone(
+                    obj=response.context,
+                )
+                self.assertContains(
+                    response=response,
+                    text=self.own_post.text,
+                )
+
+    def test_authorized_pages_are_not_cached(self):
+        """Персональные страницы авторизованных клиентов не кэшируются."""
+
+        for _ in range(2):
+            authorized_response = self.authorized_client.get(
+                path=reverse_lazy(viewname="posts:index"), follow=False,
+            )
+            self.assertIsNotNone(
+                obj=authorized_response.context,
+            )
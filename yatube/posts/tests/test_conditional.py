@@ -0,0 +1,107 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse_lazy
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    """Набор тестов для проверки ответов 304 Not Modified"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_username")
+        self.group = Group.objects.create(slug="test_slug")
+        self.post = Post.objects.create(
+            text="Тестовый текст тестового поста",
+            author=self.user,
+            group=self.group,
+        )
+
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(user=self.user)
+
+        self.urls = [
+            reverse_lazy(viewname="posts:index"),
+            reverse_lazy(viewname="posts:group_posts",
+                         kwargs={"slug": self.group.slug}),
+            reverse_lazy(viewname="posts:profile",
+                         kwargs={"username": self.user.username}),
+            reverse_lazy(viewname="posts:post_detail",
+                         kwargs={"post_id": self.post.pk}),
+        ]
+
+    def tearDown(self):
+        cache.clear()
+
+    def revalidate(self, client, url):
+        # первый ответ выставляет CSRF-cookie, и ETag меняется один раз
+        client.get(path=url)
+        etag = client.get(path=url)["ETag"]
+        return client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_are_not_modified(self):
+        for client in (self.guest_client, self.authorized_client):
+            for url in self.urls:
+                with self.subTest(url=url):
+                    response = self.revalidate(client=client, url=url)
+                    self.assertEqual(
+                        first=response.status_code,
+                        second=HTTPStatus.NOT_MODIFIED,
+                    )
+                    self.assertEqual(first=response.content, second=b"")
+
+    def test_pages_are_modified_after_post_changes(self):
+        etags = {url: self.guest_client.get(path=url)["ETag"]
+                 for url in self.urls}
+
+        self.post.text = "Отредактированный текст"
+        self.post.save()
+
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    path=url, HTTP_IF_NONE_MATCH=etag,
+                )
+                self.assertEqual(
+                    first=response.status_code,
+                    second=HTTPStatus.OK,
+                )
+
+    def test_post_page_is_modified_after_new_comment(self):
+        url = reverse_lazy(viewname="posts:post_detail",
+                           kwargs={"post_id": self.post.pk})
+        etag = self.guest_client.get(path=url)["ETag"]
+
+        Comment.objects.create(
+            text="Тестовый комментарий", post=self.post, author=self.user,
+        )
+
+        response = self.guest_client.get(path=url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(first=response.status_code, second=HTTPStatus.OK)
+        self.assertContains(response=response, text="Тестовый комментарий")
+
+    def test_etag_differs_between_users(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    first=self.guest_client.get(path=url)["ETag"],
+                    second=self.authorized_client.get(path=url)["ETag"],
+                )
+
+    def test_missing_post_has_no_etag(self):
+        response = self.guest_client.get(
+            path=reverse_lazy(viewname="posts:post_detail",
+                              kwargs={"post_id": self.post.pk + 1}),
+        )
+        self.assertEqual(
+            first=response.status_code,
+            second=HTTPStatus.NOT_FOUND,
+        )
+        self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,123 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    """Набор тестов для проверки денормализованных счётчиков"""
+
+    def setUp(self):
+        self.group = Group.objects.create(
+            slug="test_slug",
+        )
+        self.other_group = Group.objects.create(
+            slug="other_test_slug",
+        )
+        self.user = User.objects.create_user(
+            username="test_username",
+        )
+        self.other_user = User.objects.create_user(
+            username="other_test_username",
+        )
+
+    def assertCounters(self, expected):
+        """Сверяет значения счётчиков: {(объект, поле): значение}."""
+
+        for (obj, field), value in expected.items():
+            with self.subTest(obj=obj, field=field):
+                obj.refresh_from_db()
+                self.assertEqual(
+                    first=getattr(obj, field),
+                    second=value,
+                )
+
+    def test_new_user_gets_zero_counters(self):
+        """Новому пользователю заводятся нулевые счётчики."""
+
+        self.assertCounters({
+            (self.user.stats, "posts_count"): 0,
+            (self.user.stats, "followers_count"): 0,
+            (self.user.stats, "following_count"): 0,
+        })
+
+    def test_post_counters_follow_writes(self):
+        """Счётчики постов меняются при создании, переносе и удалении."""
+
+        post = Post.objects.create(author=self.user, group=self.group)
+        self.assertCounters({
+            (self.user.stats, "posts_count"): 1,
+            (self.group, "posts_count"): 1,
+            (self.other_group, "posts_count"): 0,
+        })
+
+        post.group = self.other_group
+        post.save()
+        self.assertCounters({
+            (self.user.stats, "posts_count"): 1,
+            (self.group, "posts_count"): 0,
+            (self.other_group, "posts_count"): 1,
+        })
+
+        post.delete()
+        self.assertCounters({
+            (self.user.stats, "posts_count"): 0,
+            (self.group, "posts_count"): 0,
+            (self.other_group, "posts_count"): 0,
+        })
+
+    def test_comment_counter_follows_writes(self):
+        """Счётчик комментариев меняется при их создании и удалении."""
+
+        post = Post.objects.create(author=self.user)
+        comment = Comment.objects.create(post=post, author=self.other_user)
+        Comment.objects.create(post=post, author=self.user)
+        self.assertCounters({(post, "comments_count"): 2})
+
+        comment.delete()
+        self.assertCounters({(post, "comments_count"): 1})
+
+    def test_follow_counters_follow_writes(self):
+        """Счётчики подписок меняются при подписке и отписке."""
+
+        Follow.objects.create(user=self.user, author=self.other_user)
+        self.assertCounters({
+            (self.user.stats, "following_count"): 1,
+            (self.user.stats, "followers_count"): 0,
+            (self.other_user.stats, "following_count"): 0,
+            (self.other_user.stats, "followers_count"): 1,
+        })
+
+        Follow.objects.filter(user=self.user).delete()
+        self.assertCounters({
+            (self.user.stats, "following_count"): 0,
+            (self.other_user.stats, "followers_count"): 0,
+        })
+
+    def test_rebuild_counters_command_restores_counts(self):
+        """Команда rebuild_counters восстанавливает испорченные счётчики."""
+
+        post = Post.objects.create(author=self.user, group=self.group)
+        Post.objects.bulk_create(
+            objs=[Post(author=self.user, group=self.group)] * 2,
+        )
+        Comment.objects.create(post=post, author=self.other_user)
+        Follow.objects.create(user=self.other_user, author=self.user)
+        UserStats.objects.filter(user=self.other_user).delete()
+        Post.objects.update(comments_count=42)
+
+        call_command("rebuild_counters", stdout=StringIO())
+        other_user_stats = UserStats.objects.get(user=self.other_user)
+
+        self.assertCounters({
+            (self.user.stats, "posts_count"): 3,
+            (self.user.stats, "followers_count"): 1,
+            (self.group, "posts_count"): 3,
+            (post, "comments_count"): 1,
+            (other_user_stats, "following_count"): 1,
+        })
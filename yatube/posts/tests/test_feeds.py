@@ -0,0 +1,149 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..feeds import feed_posts, rebuild_feeds
+from ..models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FeedsTests(TestCase):
+    """Набор тестов для проверки материализованных лент подписок"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test_username",
+        )
+        self.other_user = User.objects.create_user(
+            username="other_test_username",
+        )
+        self.author = User.objects.create_user(
+            username="author_username",
+        )
+        self.old_post = Post.objects.create(
+            text="Пост, опубликованный до подписки",
+            author=self.author,
+        )
+
+    def test_follow_backfills_feed(self):
+        """Подписка добавляет в ленту ранее опубликованные посты автора."""
+
+        Follow.objects.create(user=self.user, author=self.author)
+
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                user=self.user, post=self.old_post,
+            ).exists()
+        )
+        self.assertEqual(
+            first=list(feed_posts(user=self.user)),
+            second=[self.old_post],
+        )
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост сразу попадает в ленты всех подписчиков автора."""
+
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.other_user, author=self.author)
+        new_post = Post.objects.create(author=self.author)
+
+        for follower in (self.user, self.other_user):
+            with self.subTest(follower=follower):
+                self.assertEqual(
+                    first=list(feed_posts(user=follower)),
+                    second=[new_post, self.old_post],
+                )
+
+    def test_unfollow_prunes_feed(self):
+        """Отписка убирает посты автора из ленты."""
+
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.filter(user=self.user, author=self.author).delete()
+
+        self.assertFalse(
+            FeedEntry.objects.filter(user=self.user).exists()
+        )
+        self.assertEqual(
+            first=list(feed_posts(user=self.user)),
+            second=[],
+        )
+
+    @mock.patch("posts.feeds.FEED_FANOUT_MAX_FOLLOWERS", 1)
+    @mock.patch("posts.signals.FEED_FANOUT_MAX_FOLLOWERS", 1)
+    def test_popular_author_is_read_on_demand(self):
+        """
+        Посты автора с большим числом подписчиков не раскладываются
+        по лентам, но всё равно видны подписчикам.
+        """
+
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.other_user, author=self.author)
+        new_post = Post.objects.create(author=self.author)
+
+        self.assertFalse(
+            FeedEntry.objects.filter(post=new_post).exists()
+        )
+        for follower in (self.user, self.other_user):
+            with self.subTest(follower=follower):
+                self.assertEqual(
+                    first=list(feed_posts(user=follower)),
+                    second=[new_post, self.old_post],
+                )
+
+        Follow.objects.filter(user=self.other_user).delete()
+
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, post=new_post).exists()
+        )
+        self.assertEqual(
+            first=list(feed_posts(user=self.other_user)),
+            second=[],
+        )
+
+    @mock.patch("posts.feeds.FEED_BATCH_SIZE", 1)
+    def test_rebuild_restores_feeds_in_batches(self):
+        """
+        Пересчёт восстанавливает ленты одним запросом на пачку авторов
+        и не дублирует уже разложенные посты.
+        """
+
+        other_author = User.objects.create_user(username="other_author")
+        other_post = Post.objects.create(author=other_author)
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=other_author)
+        Follow.objects.create(user=self.other_user, author=self.author)
+        FeedEntry.objects.filter(post=self.old_post).delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            rebuild_feeds([self.author.pk, other_author.pk])
+        rebuild_feeds([self.author.pk, other_author.pk])
+
+        self.assertEqual(first=len(queries), second=2)
+        self.assertEqual(
+            first=list(feed_posts(user=self.user)),
+            second=[other_post, self.old_post],
+        )
+        self.assertEqual(
+            first=FeedEntry.objects.filter(user=self.user).count(),
+            second=2,
+        )
+        self.assertEqual(
+            first=list(feed_posts(user=self.other_user)),
+            second=[self.old_post],
+        )
+
+    @mock.patch("posts.feeds.FEED_FANOUT_MAX_FOLLOWERS", 1)
+    def test_rebuild_skips_popular_authors(self):
+        """Посты авторов, читаемые по запросу, в ленты не копируются."""
+
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.other_user, author=self.author)
+        FeedEntry.objects.all().delete()
+
+        rebuild_feeds([self.author.pk])
+
+        self.assertFalse(FeedEntry.objects.exists())
@@ -1,3 +1,5 @@
+import hashlib
+import os
 import shutil
 import tempfile
 
@@ -17,6 +19,13 @@ User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
+def content_addressed_name(upload):
+    """Картинки постов сохраняются под SHA-256 своего содержимого."""
+
+    digest = hashlib.sha256(upload.file.getvalue()).hexdigest()
+    return f"posts/{digest}{os.path.splitext(upload.name)[1]}"
+
+
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostsFormsTests(TestCase):
     """Набор тестов для проверки форм пространства имён posts"""
@@ -246,7 +255,9 @@ class PostsFormsTests(TestCase):
         )
         self.assertEqual(
             first=created_post.image.name,
-            second=("posts/" + self.test_form_data_new_post["image"].name),
+            second=content_addressed_name(
+                upload=self.test_form_data_new_post["image"],
+            ),
         )
 
     def test_created_comment_shows_up_in_database(self):
@@ -325,9 +336,7 @@ class PostsFormsTests(TestCase):
         )
         self.assertEqual(
             first=changed_post.image.name,
-            second=(
-                "posts/" + self.test_form_data_edited_post.get(
-                    "image"
-                ).name
+            second=content_addressed_name(
+                upload=self.test_form_data_edited_post["image"],
             ),
         )
@@ -1,6 +1,10 @@
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse_lazy
 
 from ..constants import (POSTS_PER_PAGE,
@@ -10,7 +14,8 @@ from ..constants import (POSTS_PER_PAGE,
                          TESTS_OTHER_USER_POSTS_TOTAL_PAGES,
                          TESTS_POSTS_PER_PAGE_MULTIPLIER,
                          TESTS_USER_POSTS_TOTAL_PAGES)
-from ..models import Group, Post
+from ..helpers import count_cache_key, paginate
+from ..models import Follow, Group, Post
 
 User = get_user_model()
 
@@ -225,3 +230,273 @@ class PaginationTests(TestCase):
                     first=len(guest_response.context["page_obj"]),
                     second=expected,
                 )
+
+
+class KeysetPaginationTests(TestCase):
+    """Набор тестов для проверки курсорной (keyset) пагинации"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(
+            username="test_username",
+        )
+        # bulk_create проставляет всем постам почти одинаковое время,
+        # так что порядок внутри страниц решает второе поле ключа - id
+        Post.objects.bulk_create(
+            objs=[
+                Post(author=cls.user) for _ in range(
+                    int(POSTS_PER_PAGE * TESTS_ALL_POSTS_TOTAL_PAGES
+                        * TESTS_POSTS_PER_PAGE_MULTIPLIER)
+                )
+            ],
+        )
+        cls.expected_posts = list(Post.objects.order_by("-created", "-pk"))
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        cache.clear()
+
+    def walk(self, page, cursor_attribute):
+        """Проходит по всем страницам в заданном направлении."""
+
+        pages = [page]
+        while getattr(page, cursor_attribute):
+            page = paginate(
+                request=self.factory.get(
+                    path="/", data={"cursor": getattr(page, cursor_attribute)},
+                ),
+                queryset=Post.objects.all(),
+                keyset=True,
+            )
+            pages.append(page)
+        return pages
+
+    def test_keyset_page_is_fetched_with_a_single_query(self):
+        """Курсорная страница не выполняет COUNT(*), только одну выборку."""
+
+        with self.assertNumQueries(1):
+            page = paginate(
+                request=self.factory.get(path="/"),
+                queryset=Post.objects.all(),
+                keyset=True,
+            )
+            self.assertEqual(
+                first=len(page),
+                second=POSTS_PER_PAGE,
+            )
+            self.assertTrue(page.has_next())
+            self.assertFalse(page.has_previous())
+
+    def test_forward_walk_visits_every_post_once(self):
+        """Переход по курсорам вперёд выдаёт все посты ровно один раз."""
+
+        first_page = paginate(
+            request=self.factory.get(path="/"),
+            queryset=Post.objects.all(),
+            keyset=True,
+        )
+        pages = self.walk(page=first_page, cursor_attribute="next_cursor")
+
+        self.assertEqual(
+            first=[post for page in pages for post in page],
+            second=self.expected_posts,
+        )
+        self.assertFalse(pages[-1].has_next())
+
+    def test_backward_walk_mirrors_forward_walk(self):
+        """Переход по курсорам назад повторяет те же страницы."""
+
+        first_page = paginate(
+            request=self.factory.get(path="/"),
+            queryset=Post.objects.all(),
+            keyset=True,
+        )
+        forward = self.walk(page=first_page, cursor_attribute="next_cursor")
+        backward = self.walk(
+            page=forward[-1], cursor_attribute="previous_cursor",
+        )
+
+        self.assertEqual(
+            first=[list(page) for page in reversed(backward)],
+            second=[list(page) for page in forward],
+        )
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Повреждённый курсор приводит на первую страницу."""
+
+        for cursor in ("", "garbage", "bnwxOTcwfGFiYw"):
+            with self.subTest(cursor=cursor):
+                page = paginate(
+                    request=self.factory.get(
+                        path="/", data={"cursor": cursor},
+                    ),
+                    queryset=Post.objects.all(),
+                    keyset=True,
+                )
+                self.assertEqual(
+                    first=list(page),
+                    second=self.expected_posts[:POSTS_PER_PAGE],
+                )
+
+    def test_page_parameter_keeps_offset_pagination(self):
+        """Ссылки вида ?page=N продолжают работать по номеру страницы."""
+
+        page = paginate(
+            request=self.factory.get(path="/", data={"page": 2}),
+            queryset=Post.objects.all(),
+            keyset=True,
+        )
+
+        self.assertEqual(
+            first=page.number,
+            second=2,
+        )
+        self.assertEqual(
+            first=list(page),
+            second=self.expected_posts[POSTS_PER_PAGE:POSTS_PER_PAGE * 2],
+        )
+
+
+class CachedCountTests(TestCase):
+    """Набор тестов для проверки кэширования количества постов"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.group = Group.objects.create(
+            slug="test_slug",
+        )
+        cls.user = User.objects.create_user(
+            username="test_username",
+        )
+        cls.follower = User.objects.create_user(
+            username="follower_username",
+        )
+        Follow.objects.create(
+            user=cls.follower,
+            author=cls.user,
+        )
+        Post.objects.bulk_create(
+            objs=[
+                Post(author=cls.user, group=cls.group)
+                for _ in range(POSTS_PER_PAGE * 2)
+            ],
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_count(self, queryset, count_key):
+        return paginate(
+            request=self.factory.get(path="/", data={"page": 1}),
+            queryset=queryset,
+            count_key=count_key,
+        ).paginator.count
+
+    def test_count_is_served_from_cache(self):
+        """Повторный подсчёт постов не обращается к базе данных."""
+
+        key = count_cache_key("group", self.group.pk)
+        self.assertEqual(
+            first=self.get_count(self.group.posts.all(), key),
+            second=POSTS_PER_PAGE * 2,
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                first=self.get_count(self.group.posts.all(), key),
+                second=POSTS_PER_PAGE * 2,
+            )
+
+    def test_post_changes_drop_cached_counts(self):
+        """Создание и удаление поста сбрасывает кэш во всех его разделах."""
+
+        querysets_keys = (
+            (Post.objects.all(), count_cache_key("all")),
+            (self.group.posts.all(), count_cache_key("group", self.group.pk)),
+            (self.user.posts.all(), count_cache_key("author", self.user.pk)),
+            (
+                Post.objects.filter(author__following__user=self.follower),
+                count_cache_key("feed", self.follower.pk),
+            ),
+        )
+        for queryset, key in querysets_keys:
+            self.get_count(queryset, key)
+
+        post = Post.objects.create(author=self.user, group=self.group)
+        for queryset, key in querysets_keys:
+            with self.subTest(key=key):
+                self.assertEqual(
+                    first=self.get_count(queryset, key),
+                    second=POSTS_PER_PAGE * 2 + 1,
+                )
+
+        post.delete()
+        for queryset, key in querysets_keys:
+            with self.subTest(key=key):
+                self.assertEqual(
+                    first=self.get_count(queryset, key),
+                    second=POSTS_PER_PAGE * 2,
+                )
+
+    def test_post_edit_keeps_cached_counts(self):
+        """Правка поста не трогает количества и подписчиков автора."""
+
+        feed_key = count_cache_key("feed", self.follower.pk)
+        self.get_count(
+            Post.objects.filter(author__following__user=self.follower),
+            feed_key,
+        )
+        post = self.user.posts.first()
+        post.text = "Новый текст"
+
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+
+        self.assertIsNotNone(cache.get(feed_key))
+        self.assertFalse(any(
+            Follow._meta.db_table in query["sql"]
+            for query in queries.captured_queries
+        ))
+
+    def test_group_change_drops_group_counts(self):
+        """Перенос поста в другое сообщество сбрасывает их количества."""
+
+        other_group = Group.objects.create(title="Другая", slug="other")
+        key = count_cache_key("group", self.group.pk)
+        self.get_count(self.group.posts.all(), key)
+        post = self.user.posts.first()
+
+        post.group = other_group
+        post.save()
+
+        self.assertEqual(
+            first=self.get_count(self.group.posts.all(), key),
+            second=POSTS_PER_PAGE * 2 - 1,
+        )
+
+    @mock.patch("posts.feeds.FEED_FANOUT_MAX_FOLLOWERS", 0)
+    @mock.patch("posts.signals.FEED_FANOUT_MAX_FOLLOWERS", 0)
+    def test_popular_author_post_skips_follower_counts(self):
+        """
+        Пост автора, которого не раскладывают по лентам, не сбрасывает
+        количества в лентах подписчиков: они истекают по таймауту.
+        """
+
+        feed_key = count_cache_key("feed", self.follower.pk)
+        cache.set(feed_key, 1)
+
+        Post.objects.create(author=self.user, group=self.group)
+
+        self.assertEqual(first=cache.get(feed_key), second=1)
+        self.assertIsNone(cache.get(count_cache_key("author", self.user.pk)))
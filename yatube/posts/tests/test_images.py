@@ -0,0 +1,109 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse_lazy
+from PIL import Image
+
+from ..constants import IMAGE_VARIANT_WIDTHS
+from ..images import available_formats, variant_name
+from ..models import Post
+from ..thumbnails import prepare_post_image
+from .test_thumbnails import uploaded_gif
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageVariantsTests(TestCase):
+    """Набор тестов для проверки адаптивных вариантов картинок постов"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="test_username")
+        self.post = Post.objects.create(
+            text="Текст тестового поста",
+            author=self.user,
+            image=uploaded_gif(),
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_variants_are_stored_next_to_original(self):
+        prepare_post_image(self.post)
+
+        self.post.refresh_from_db()
+        self.assertEqual(
+            first=self.post.image_formats,
+            second=",".join(available_formats()),
+        )
+        for image_format in available_formats():
+            for width in IMAGE_VARIANT_WIDTHS:
+                name = variant_name(self.post.image.name, width, image_format)
+                with self.subTest(name=name):
+                    self.assertTrue(name.startswith("posts/"))
+                    with default_storage.open(name) as variant:
+                        self.assertEqual(
+                            first=Image.open(variant).width,
+                            second=width,
+                        )
+
+    def test_post_page_lists_variants_once_built(self):
+        url = reverse_lazy(viewname="posts:post_detail",
+                           kwargs={"post_id": self.post.pk})
+        self.assertNotContains(
+            response=self.client.get(path=url), text="srcset",
+        )
+
+        prepare_post_image(self.post)
+
+        response = self.client.get(path=url)
+        for image_format in available_formats():
+            with self.subTest(image_format=image_format):
+                self.assertContains(
+                    response=response,
+                    text=f'type="image/{image_format}"',
+                )
+        self.assertContains(
+            response=response,
+            text=f"{IMAGE_VARIANT_WIDTHS[-1]}w",
+        )
+
+    def test_listing_uses_thumbnail_stored_in_post(self):
+        prepare_post_image(self.post)
+
+        with mock.patch("posts.thumbnails.get_thumbnail") as get_thumbnail:
+            response = self.client.get(
+                path=reverse_lazy(viewname="posts:index"),
+            )
+        get_thumbnail.assert_not_called()
+
+        self.post.refresh_from_db()
+        self.assertContains(response=response, text=self.post.thumbnail)
+        self.assertContains(
+            response=response,
+            text=f'height="{self.post.thumbnail_height}"',
+        )
+
+    def test_new_image_drops_old_variants(self):
+        prepare_post_image(self.post)
+
+        self.post.image = uploaded_gif(name="another.gif")
+        self.post.save()
+
+        self.post.refresh_from_db()
+        self.assertEqual(first=self.post.image_formats, second="")
+        self.assertEqual(first=self.post.thumbnail, second="")
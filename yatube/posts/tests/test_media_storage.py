@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..images import variant_name
+from ..models import Post
+from .test_thumbnails import uploaded_gif
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedImagesTests(TestCase):
+    """Набор тестов для проверки хранения картинок постов без дублей"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(os.path.join(TEMP_MEDIA_ROOT, "posts"),
+                      ignore_errors=True)
+        self.user = User.objects.create_user(username="test_username")
+
+    def create_post(self, name="green.gif"):
+        return Post.objects.create(
+            text="Текст тестового поста",
+            author=self.user,
+            image=uploaded_gif(name=name),
+        )
+
+    def test_same_content_is_stored_once(self):
+        first = self.create_post(name="first.gif")
+        second = self.create_post(name="second.gif")
+
+        self.assertEqual(first=first.image.name, second=second.image.name)
+        self.assertEqual(
+            first=default_storage.listdir("posts")[1],
+            second=[first.image.name.split("/")[-1]],
+        )
+
+    def test_deleted_post_keeps_file_until_garbage_collection(self):
+        post = self.create_post()
+        name = post.image.name
+
+        post.delete()
+        self.assertTrue(default_storage.exists(name))
+
+        call_command("collect_image_garbage", grace=0, stdout=StringIO())
+        self.assertFalse(default_storage.exists(name))
+
+    def test_replaced_image_is_kept_until_garbage_collection(self):
+        post = self.create_post()
+        old_name = post.image.name
+
+        post.image = ContentFile(b"GIF89a" + b"\x00" * 16, name="new.gif")
+        post.save()
+        self.assertTrue(default_storage.exists(old_name))
+
+        call_command("collect_image_garbage", grace=0, stdout=StringIO())
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertTrue(default_storage.exists(post.image.name))
+
+    def test_saving_existing_image_refreshes_its_age(self):
+        post = self.create_post()
+        path = default_storage.path(post.image.name)
+        os.utime(path, (0, 0))
+
+        self.create_post()
+
+        self.assertGreater(a=os.path.getmtime(path), b=0)
+
+    def test_garbage_collection_rechecks_references(self):
+        post = self.create_post()
+
+        with mock.patch.object(Post.objects, "exclude",
+                               return_value=Post.objects.none()):
+            call_command("collect_image_garbage", grace=0,
+                         stdout=StringIO())
+
+        self.assertTrue(default_storage.exists(post.image.name))
+
+    def test_garbage_collection_keeps_referenced_images(self):
+        post = self.create_post()
+        orphan = default_storage.save("posts/orphan.gif", uploaded_gif())
+        orphan_variant = default_storage.save(
+            variant_name(orphan, 320, "webp"), ContentFile(b"webp"),
+        )
+        kept_variant = default_storage.save(
+            variant_name(post.image.name, 320, "webp"), ContentFile(b"webp"),
+        )
+
+        call_command("collect_image_garbage", grace=0, stdout=StringIO())
+
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertFalse(default_storage.exists(orphan_variant))
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertTrue(default_storage.exists(kept_variant))
+
+    def test_garbage_collection_spares_fresh_files(self):
+        orphan = default_storage.save("posts/orphan.gif", uploaded_gif())
+
+        call_command("collect_image_garbage", stdout=StringIO())
+
+        self.assertTrue(default_storage.exists(orphan))
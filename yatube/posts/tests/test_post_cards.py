@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..models import Group, Post
+from ..templatetags.post_cards import post_card
+
+User = get_user_model()
+
+
+class PostCardsTests(TestCase):
+    """Набор тестов для проверки кэширования карточек постов"""
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(
+            title="Старое название",
+            slug="test_slug",
+        )
+        self.user = User.objects.create_user(
+            username="test_username",
+            first_name="Старое",
+            last_name="Имя",
+        )
+        self.post = Post.objects.create(
+            text="Старый текст",
+            author=self.user,
+            group=self.group,
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def render(self):
+        post = Post.objects.select_related("author", "group").get(
+            pk=self.post.pk,
+        )
+        return post_card(post)
+
+    def test_card_is_rendered_once(self):
+        """Повторный вывод карточки берётся из кэша без рендера шаблона."""
+
+        html = self.render()
+        self.assertIn(member="Старый текст", container=html)
+
+        with mock.patch(
+            "posts.templatetags.post_cards.render_to_string",
+        ) as render_to_string:
+            self.assertEqual(first=self.render(), second=html)
+        render_to_string.assert_not_called()
+
+    def test_card_follows_post_group_and_author_changes(self):
+        """Карточка обновляется после правки поста, сообщества и автора."""
+
+        self.render()
+
+        changes = (
+            ("post", self.post, "text", "Новый текст"),
+            ("group", self.group, "title", "Новое название"),
+            ("author", self.user, "first_name", "Новое"),
+        )
+        for name, obj, field, value in changes:
+            with self.subTest(changed=name):
+                setattr(obj, field, value)
+                obj.save()
+                self.assertIn(member=value, container=self.render())
+
+    def test_login_does_not_drop_author_cards(self):
+        """Запись времени входа автора не сбрасывает его карточки."""
+
+        self.render()
+        self.client.force_login(user=self.user)
+
+        with mock.patch(
+            "posts.templatetags.post_cards.render_to_string",
+        ) as render_to_string:
+            self.render()
+        render_to_string.assert_not_called()
@@ -0,0 +1,138 @@
+from core.testing import QueryCountMixin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse_lazy
+
+from .. import urls
+from ..constants import POSTS_PER_PAGE
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# наибольшее число SQL-запросов на один запрос к странице
+# без кэша; не зависит от количества постов на странице
+QUERY_BUDGETS = {
+    "posts:index": 1,
+    "posts:follow_index": 5,
+    "posts:group_posts": 2,
+    "posts:profile": 2,
+    "posts:post_detail": 3,
+    "posts:search": 3,
+    "posts:post_create": 14,
+    "posts:post_edit": 12,
+    "posts:add_comment": 7,
+    "posts:profile_follow": 13,
+    "posts:profile_unfollow": 10,
+}
+
+
+class ViewQueryBudgetTests(QueryCountMixin, TestCase):
+    """Набор тестов для проверки количества запросов вью-функций"""
+
+    def setUp(self):
+        self.group = Group.objects.create(slug="test_slug")
+        self.author = User.objects.create_user(username="test_author")
+        self.reader = User.objects.create_user(username="test_reader")
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.post = Post.objects.create(
+            text="Тестовый пост про кошку",
+            author=self.author,
+            group=self.group,
+        )
+        Comment.objects.create(
+            text="Тестовый комментарий", post=self.post, author=self.reader,
+        )
+
+        self.clients = {None: Client()}
+        for user in (self.author, self.reader):
+            self.clients[user] = Client()
+            self.clients[user].force_login(user)
+
+    def request(self, name):
+        """
+        Функция, которая один раз обращается к странице name
+        от имени подходящего для неё пользователя.
+        """
+
+        post_kwargs = {"post_id": self.post.pk}
+        author_kwargs = {"username": self.author.username}
+        cases = {
+            "posts:index": ("get", None, {}, {}),
+            "posts:follow_index": ("get", self.reader, {}, {}),
+            "posts:group_posts": (
+                "get", None, {"slug": self.group.slug}, {},
+            ),
+            "posts:profile": ("get", None, author_kwargs, {}),
+            "posts:post_detail": ("get", None, post_kwargs, {}),
+            "posts:search": ("get", None, {}, {"q": "кошки"}),
+            "posts:post_create": (
+                "post", self.reader, {},
+                {"text": "Новый пост", "group": self.group.pk},
+            ),
+            "posts:post_edit": (
+                "post", self.author, post_kwargs,
+                {"text": "Исправленный пост", "group": self.group.pk},
+            ),
+            "posts:add_comment": (
+                "post", self.reader, post_kwargs, {"text": "Комментарий"},
+            ),
+            "posts:profile_follow": ("get", self.reader, author_kwargs, {}),
+            "posts:profile_unfollow": (
+                "get", self.reader, author_kwargs, {},
+            ),
+        }
+        method, user, kwargs, data = cases[name]
+        url = reverse_lazy(viewname=name, kwargs=kwargs)
+        client = self.clients[user]
+
+        return lambda: getattr(client, method)(path=url, data=data)
+
+    def prepare_request(self, name):
+        """Страницы считаются без кэша, а подписка каждый раз меняется."""
+
+        cache.clear()
+        follows = Follow.objects.filter(user=self.reader, author=self.author)
+        if name == "posts:profile_follow":
+            follows.delete()
+        elif name == "posts:profile_unfollow" and not follows.exists():
+            Follow.objects.create(user=self.reader, author=self.author)
+
+    def grow(self):
+        """Добавляет полную страницу постов и комментариев других авторов."""
+
+        for i in range(POSTS_PER_PAGE):
+            author = User.objects.create_user(username=f"other_author_{i}")
+            Follow.objects.create(user=self.reader, author=author)
+            Post.objects.create(
+                text=f"Ещё один пост про кошку {i}",
+                author=author,
+                group=self.group,
+            )
+            Post.objects.create(
+                text=f"Ещё один пост автора {i}", author=self.author,
+            )
+            Comment.objects.create(
+                text=f"Ещё один комментарий {i}",
+                post=self.post,
+                author=author,
+            )
+
+    def test_every_url_has_budget(self):
+        names = {f"{urls.app_name}:{pattern.name}"
+                 for pattern in urls.urlpatterns}
+        self.assertEqual(first=set(QUERY_BUDGETS), second=names)
+
+    def test_views_stay_within_budget(self):
+        for name, budget in QUERY_BUDGETS.items():
+            with self.subTest(name=name):
+                response = self.assertQueryBudget(
+                    name=name, send=self.request(name), budget=budget,
+                )
+                self.assertLess(response.status_code, 400)
+
+    def test_queries_do_not_depend_on_page_size(self):
+        self.assertQueriesIndependentOf(
+            sends={name: self.request(name) for name in QUERY_BUDGETS},
+            grow=self.grow,
+        )
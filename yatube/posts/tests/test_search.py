@@ -0,0 +1,139 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse_lazy
+
+from ..constants import POSTS_PER_PAGE
+from ..models import Comment, Post
+from ..search import filter_comments, filter_posts, rebuild_index
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    """Набор тестов для проверки полнотекстового поиска"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_username")
+        self.cat_post = Post.objects.create(
+            text="Моя кошка любит спать на подоконнике",
+            author=self.user,
+        )
+        self.dog_post = Post.objects.create(
+            text="Собаки гуляют в парке",
+            author=self.user,
+        )
+        self.guest_client = Client()
+
+    def search(self, query, **params):
+        return self.guest_client.get(
+            path=reverse_lazy(viewname="posts:search"),
+            data={"q": query, **params},
+        )
+
+    def found(self, query, **params):
+        return list(self.search(query, **params).context["page_obj"])
+
+    def test_word_forms_are_found(self):
+        for query in ("кошками", "Кошки любят", "подоконник"):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    first=self.found(query), second=[self.cat_post],
+                )
+
+    def test_all_words_are_required(self):
+        self.assertEqual(first=self.found("кошки в парке"), second=[])
+
+    def test_comments_are_searched_but_rank_lower(self):
+        Comment.objects.create(
+            text="А моя кошка гуляет в парке",
+            post=self.dog_post,
+            author=self.user,
+        )
+
+        self.assertEqual(
+            first=self.found("кошка"),
+            second=[self.cat_post, self.dog_post],
+        )
+
+    def test_filter_posts_skips_comment_matches(self):
+        Comment.objects.create(
+            text="А моя кошка гуляет в парке",
+            post=self.dog_post,
+            author=self.user,
+        )
+
+        self.assertEqual(
+            first=list(filter_posts(Post.objects.all(), "кошка")),
+            second=[self.cat_post],
+        )
+
+    def test_filters_return_every_match(self):
+        other_cat_post = Post.objects.create(
+            text="Кошка гуляет сама по себе", author=self.user,
+        )
+        comments = [
+            Comment.objects.create(
+                text=f"Кошка номер {i}", post=self.dog_post, author=self.user,
+            )
+            for i in range(2)
+        ]
+
+        self.assertEqual(
+            first=set(filter_posts(Post.objects.all(), "кошка")),
+            second={self.cat_post, other_cat_post},
+        )
+        self.assertEqual(
+            first=set(filter_comments(Comment.objects.all(), "кошка")),
+            second=set(comments),
+        )
+
+    def test_index_follows_edits_and_deletes(self):
+        self.cat_post.text = "Теперь про хомяков"
+        self.cat_post.save()
+        self.assertEqual(first=self.found("кошка"), second=[])
+        self.assertEqual(first=self.found("хомяк"), second=[self.cat_post])
+
+        self.cat_post.delete()
+        self.assertEqual(first=self.found("хомяк"), second=[])
+
+    def test_empty_query_finds_nothing(self):
+        response = self.search("  ")
+        self.assertEqual(first=list(response.context["page_obj"]), second=[])
+        self.assertEqual(first=response.context["query"], second="")
+
+    def test_pages_keep_the_query(self):
+        Post.objects.bulk_create(
+            Post(text=f"Ещё одна кошка номер {i}", author=self.user)
+            for i in range(POSTS_PER_PAGE)
+        )
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        response = self.search("кошка")
+        self.assertEqual(
+            first=response.context["page_obj"].paginator.count,
+            second=POSTS_PER_PAGE + 1,
+        )
+        self.assertContains(response=response, text="?q=%D0%BA%D0%BE")
+        self.assertEqual(first=len(self.found("кошка", page=2)), second=1)
+
+    def test_rebuild_command_restores_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM posts_search")
+        self.assertEqual(first=self.found("собака"), second=[])
+
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        self.assertEqual(first=self.found("собака"), second=[self.dog_post])
+
+    def test_failed_rebuild_keeps_old_index(self):
+        with mock.patch(
+            "posts.search.index_rows", side_effect=RuntimeError,
+        ), self.assertRaises(RuntimeError):
+            rebuild_index()
+
+        self.assertEqual(first=self.found("собака"), second=[self.dog_post])
@@ -0,0 +1,95 @@
+import random
+from collections import Counter
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post
+from ..synthetic import power_law_index
+
+User = get_user_model()
+
+COUNTS = {
+    "users": 50, "groups": 3, "posts": 200, "comments": 100, "follows": 300,
+}
+
+
+class LoadDataGeneratorTests(TestCase):
+    """Набор тестов для проверки генератора синтетических данных"""
+
+    def generate(self, seed=0, **counts):
+        call_command(
+            "generate_load_data", seed=seed, batch_size=40,
+            stdout=StringIO(), **{**COUNTS, **counts},
+        )
+
+    def snapshot(self):
+        return (
+            list(User.objects.order_by("pk").values_list("username")),
+            list(Post.objects.order_by("pk").values_list(
+                "text", "author__username", "group__slug",
+            )),
+            list(Follow.objects.order_by("pk").values_list(
+                "user__username", "author__username",
+            )),
+        )
+
+    def test_counts_follow_options(self):
+        self.generate()
+
+        self.assertEqual(first=User.objects.count(), second=COUNTS["users"])
+        self.assertEqual(first=Group.objects.count(), second=COUNTS["groups"])
+        self.assertEqual(first=Post.objects.count(), second=COUNTS["posts"])
+        self.assertEqual(
+            first=Comment.objects.count(), second=COUNTS["comments"],
+        )
+        # повторные подписки и подписки на себя отбрасываются
+        self.assertTrue(0 < Follow.objects.count() <= COUNTS["follows"])
+
+    def test_same_seed_gives_same_data(self):
+        self.generate(seed=7)
+        first = self.snapshot()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+        self.generate(seed=7)
+        self.assertEqual(first=self.snapshot(), second=first)
+
+        User.objects.all().delete()
+        self.generate(seed=8)
+        self.assertNotEqual(first=self.snapshot(), second=first)
+
+    def test_counters_are_rebuilt(self):
+        self.generate()
+
+        post = Post.objects.order_by("?").first()
+        self.assertEqual(
+            first=post.comments_count, second=post.comments.count(),
+        )
+        author = User.objects.order_by("-stats__followers_count").first()
+        self.assertEqual(
+            first=author.stats.followers_count,
+            second=Follow.objects.filter(author=author).count(),
+        )
+
+    def test_posts_need_users(self):
+        with self.assertRaises(CommandError):
+            self.generate(users=0)
+
+
+class PowerLawTests(TestCase):
+    """Набор тестов для проверки степенного распределения"""
+
+    def test_popularity_is_concentrated(self):
+        rng = random.Random(0)
+        hits = Counter(
+            power_law_index(rng, 1000, 1.3) for _ in range(20_000)
+        )
+
+        self.assertTrue(all(0 <= index < 1000 for index in hits))
+        top = sum(count for index, count in hits.items() if index < 10)
+        # на первый процент индексов приходится больше половины выборки
+        self.assertGreater(top, 10_000)
+        self.assertGreater(hits[0], hits[100] * 20)
@@ -0,0 +1,171 @@
+import shutil
+import tempfile
+import time
+from concurrent.futures import Future
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse_lazy
+from PIL import Image
+from prometheus_client import REGISTRY
+from sorl.thumbnail import default, get_thumbnail
+
+from ..constants import THUMBNAIL_GEOMETRIES
+from ..models import Post
+from .. import thumbnails
+from ..thumbnails import (_generate_in_background, card_thumbnail,
+                          generate_thumbnails, schedule_thumbnails,
+                          wait_for_thumbnails)
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+GREEN_PIXEL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x80"
+    b"\x00\x00\x00\xFF\x00\xFF\xFF\xFF\x21\xF9\x04"
+    b"\x00\x00\x00\x00\x00\x2C\x00\x00\x00\x00\x01"
+    b"\x00\x01\x00\x00\x02\x02\x44\x01\x00\x3B"
+)
+
+
+def uploaded_gif(name="green.gif"):
+    return SimpleUploadedFile(
+        name=name, content=GREEN_PIXEL_GIF, content_type="image/gif",
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    """Набор тестов для проверки фоновой подготовки миниатюр"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_username")
+        self.post = Post.objects.create(
+            text="Текст тестового поста",
+            author=self.user,
+            image=uploaded_gif(),
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(user=self.user)
+
+    def test_generate_thumbnails_stores_thumbnail(self):
+        generate_thumbnails(self.post.image)
+
+        # шаблон получает готовую миниатюру и ничего не строит сам
+        with mock.patch.object(default.engine, "create") as create:
+            get_thumbnail(self.post.image, "960x339",
+                          crop="center", upscale=True)
+        create.assert_not_called()
+
+    def test_only_built_thumbnails_are_timed(self):
+        def observed(source):
+            return REGISTRY.get_sample_value(
+                "yatube_thumbnail_generation_seconds_count",
+                {"source": source},
+            ) or 0
+
+        # картинки хранятся по содержимому: нужна ещё не виденная
+        buffer = BytesIO()
+        Image.new(mode="RGB", size=(3, 2), color=(1, 2, 3)).save(
+            buffer, format="PNG",
+        )
+        post = Post.objects.create(
+            author=self.user,
+            image=SimpleUploadedFile(
+                name="timed.png", content=buffer.getvalue(),
+                content_type="image/png",
+            ),
+        )
+
+        requested = observed("request")
+        card_thumbnail(post)
+        card_thumbnail(post)
+        self.assertEqual(first=observed("request"), second=requested + 1)
+
+        prepared = observed("prepare")
+        generate_thumbnails(post.image)
+        generate_thumbnails(post.image)
+        # первая геометрия уже построена для карточки
+        self.assertEqual(
+            first=observed("prepare"),
+            second=prepared + len(THUMBNAIL_GEOMETRIES) - 1,
+        )
+
+    @override_settings(THUMBNAILS_ASYNC=True)
+    @mock.patch("posts.thumbnails.transaction.on_commit",
+                side_effect=lambda callback: callback())
+    @mock.patch("posts.thumbnails._executor")
+    def test_job_is_queued_after_commit(self, executor, on_commit):
+        executor.submit.return_value = Future()
+        executor.submit.return_value.set_result(None)
+        schedule_thumbnails(self.post)
+
+        executor.submit.assert_called_once_with(
+            _generate_in_background, self.post.pk,
+        )
+
+    @override_settings(THUMBNAILS_ASYNC=False)
+    @mock.patch("posts.thumbnails.transaction.on_commit",
+                side_effect=lambda callback: callback())
+    def test_job_runs_inline_when_not_async(self, on_commit):
+        schedule_thumbnails(self.post)
+
+        self.post.refresh_from_db()
+        self.assertNotEqual(first=self.post.thumbnail, second="")
+
+    @override_settings(THUMBNAILS_ASYNC=True)
+    @mock.patch("posts.thumbnails.transaction.on_commit",
+                side_effect=lambda callback: callback())
+    def test_wait_for_thumbnails_drains_queue(self, on_commit):
+        done = []
+
+        def slow_job(post_id):
+            time.sleep(0.05)
+            done.append(post_id)
+
+        with mock.patch("posts.thumbnails._generate_in_background",
+                        side_effect=slow_job):
+            schedule_thumbnails(self.post)
+            wait_for_thumbnails()
+
+        self.assertEqual(first=done, second=[self.post.pk])
+        self.assertFalse(thumbnails._pending)
+
+    @mock.patch("posts.signals.schedule_thumbnails")
+    def test_saves_schedule_only_new_images(self, schedule):
+        self.authorized_client.post(
+            path=reverse_lazy(viewname="posts:post_create"),
+            data={"text": "Пост с картинкой", "image": uploaded_gif("a.gif")},
+        )
+        self.assertEqual(first=schedule.call_count, second=1)
+
+        self.authorized_client.post(
+            path=reverse_lazy(viewname="posts:post_edit",
+                              kwargs={"post_id": self.post.pk}),
+            data={"text": "Новый текст того же поста"},
+        )
+        self.assertEqual(first=schedule.call_count, second=1)
+
+        self.authorized_client.post(
+            path=reverse_lazy(viewname="posts:post_edit",
+                              kwargs={"post_id": self.post.pk}),
+            data={"text": "Новая картинка", "image": uploaded_gif("b.gif")},
+        )
+        self.assertEqual(first=schedule.call_count, second=2)
+
+        # посты из админки и импорта сохраняются в обход форм проекта
+        Post.objects.create(author=self.user, image=uploaded_gif("c.gif"))
+        self.assertEqual(first=schedule.call_count, second=3)
+
+        Post.objects.create(author=self.user, text="Пост без картинки")
+        self.assertEqual(first=schedule.call_count, second=3)
@@ -0,0 +1,162 @@
+import datetime
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..feeds import feed_posts
+from ..models import Comment, Follow, Group, Post
+from ..search import SearchResults
+
+User = get_user_model()
+
+KINDS = ("group", "post", "comment", "follow")
+
+
+class ContentTransferTests(TestCase):
+    """Набор тестов для проверки выгрузки и загрузки контента"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+        self.group = Group.objects.create(
+            title="Кошатники", slug="cats", description="Про кошек",
+        )
+        self.user = User.objects.create_user(username="test_username")
+        self.reader = User.objects.create_user(username="test_reader")
+        self.created = timezone.make_aware(datetime.datetime(1999, 1, 1))
+        self.post = Post.objects.create(
+            text="Моя кошка спит", author=self.user, group=self.group,
+        )
+        Post.objects.filter(pk=self.post.pk).update(created=self.created)
+        Post.objects.create(text="Пост без сообщества", author=self.reader)
+        Comment.objects.create(
+            text="Какая кошка!", post=self.post, author=self.reader,
+        )
+        Follow.objects.create(user=self.reader, author=self.user)
+
+    def path(self, kind, file_format):
+        return os.path.join(self.directory, f"{kind}.{file_format}")
+
+    def export_all(self, file_format):
+        for kind in KINDS:
+            call_command(
+                "export_content", kind, self.path(kind, file_format),
+                stdout=StringIO(),
+            )
+
+    def import_all(self, file_format, **options):
+        for kind in KINDS:
+            call_command(
+                "import_content", kind, self.path(kind, file_format),
+                batch_size=1, stdout=StringIO(), **options,
+            )
+
+    def snapshot(self):
+        return {
+            "groups": list(Group.objects.order_by("pk").values_list(
+                "pk", "slug", "title", "description", "posts_count",
+            )),
+            "posts": list(Post.objects.order_by("pk").values_list(
+                "pk", "created", "text", "author__username", "group__slug",
+                "comments_count",
+            )),
+            "comments": list(Comment.objects.order_by("pk").values_list(
+                "pk", "post_id", "author__username", "text",
+            )),
+            "follows": list(Follow.objects.order_by("pk").values_list(
+                "user__username", "author__username",
+            )),
+        }
+
+    def clear(self):
+        Follow.objects.all().delete()
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_round_trip(self):
+        for file_format in ("jsonl", "csv", "parquet"):
+            with self.subTest(file_format=file_format):
+                expected = self.snapshot()
+                self.export_all(file_format)
+                self.clear()
+
+                self.import_all(file_format)
+
+                self.assertEqual(first=self.snapshot(), second=expected)
+
+    def test_derived_data_is_rebuilt(self):
+        self.export_all("jsonl")
+        self.clear()
+
+        self.import_all("jsonl")
+
+        reader = User.objects.get(username="test_reader")
+        author = User.objects.get(username="test_username")
+        self.assertEqual(first=author.stats.posts_count, second=1)
+        self.assertEqual(first=author.stats.followers_count, second=1)
+        self.assertEqual(
+            first=list(feed_posts(reader).values_list("pk", flat=True)),
+            second=[self.post.pk],
+        )
+        self.assertEqual(
+            first=[post.pk for post in SearchResults("кошки")[0:10]],
+            second=[self.post.pk],
+        )
+        self.assertFalse(author.has_usable_password())
+
+    def test_skip_rebuild_leaves_counters(self):
+        self.export_all("jsonl")
+        self.clear()
+
+        self.import_all("jsonl", skip_rebuild=True)
+
+        self.assertEqual(
+            first=Group.objects.get(slug="cats").posts_count, second=0,
+        )
+
+    def test_full_rebuild_after_skipped_rebuilds(self):
+        self.export_all("jsonl")
+        self.clear()
+        self.import_all("jsonl", skip_rebuild=True)
+
+        call_command("rebuild_derived_data", stdout=StringIO())
+
+        reader = User.objects.get(username="test_reader")
+        self.assertEqual(
+            first=Group.objects.get(slug="cats").posts_count, second=1,
+        )
+        self.assertEqual(
+            first=list(feed_posts(reader).values_list("pk", flat=True)),
+            second=[self.post.pk],
+        )
+        self.assertEqual(
+            first=[post.pk for post in SearchResults("кошки")[0:10]],
+            second=[self.post.pk],
+        )
+
+    def test_unknown_group_is_rejected(self):
+        self.export_all("jsonl")
+        self.clear()
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "import_content", "post", self.path("post", "jsonl"),
+                stdout=StringIO(),
+            )
+        self.assertFalse(Post.objects.exists())
+
+    def test_unknown_extension_needs_format(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "export_content", "post", self.path("post", "txt"),
+                stdout=StringIO(),
+            )
@@ -0,0 +1,112 @@
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from PIL import Image
+
+from ..forms import PostForm
+from .test_thumbnails import uploaded_gif
+
+
+def uploaded_jpeg(size, exif=b"", name="photo.jpg"):
+    buffer = BytesIO()
+    Image.new(mode="RGB", size=size, color="green").save(
+        buffer, format="JPEG", exif=exif,
+    )
+    return SimpleUploadedFile(
+        name=name, content=buffer.getvalue(), content_type="image/jpeg",
+    )
+
+
+def uploaded_transparent_png(name="logo.png"):
+    image = Image.new(mode="P", size=(16, 16), color=0)
+    image.putpalette([255, 255, 255, 255, 0, 0])
+    image.putpixel((8, 8), 1)
+    buffer = BytesIO()
+    image.save(buffer, format="PNG", transparency=0)
+    return SimpleUploadedFile(
+        name=name, content=buffer.getvalue(), content_type="image/png",
+    )
+
+
+def exif_with_gps():
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"
+    exif[0x8825] = {2: (55.0, 45.0, 0.0)}
+    return exif.tobytes()
+
+
+class PostFormImageUploadTests(TestCase):
+    """Набор тестов для проверки обработки картинок в PostForm"""
+
+    def clean_image(self, upload):
+        form = PostForm(data={"text": "Текст"}, files={"image": upload})
+        return form, form.is_valid()
+
+    def test_small_image_keeps_its_size_and_name(self):
+        form, is_valid = self.clean_image(uploaded_jpeg(size=(64, 32)))
+
+        self.assertTrue(is_valid)
+        image = form.cleaned_data["image"]
+        self.assertEqual(first=image.name, second="photo.jpg")
+        self.assertEqual(first=Image.open(image).size, second=(64, 32))
+
+    @mock.patch("posts.uploads.POST_IMAGE_MAX_SIDE", 100)
+    def test_oversize_image_is_downscaled(self):
+        form, is_valid = self.clean_image(uploaded_jpeg(size=(400, 200)))
+
+        self.assertTrue(is_valid)
+        self.assertEqual(
+            first=Image.open(form.cleaned_data["image"]).size,
+            second=(100, 50),
+        )
+
+    def test_metadata_is_stripped(self):
+        form, is_valid = self.clean_image(
+            uploaded_jpeg(size=(16, 16), exif=exif_with_gps()),
+        )
+
+        self.assertTrue(is_valid)
+        self.assertEqual(
+            first=dict(Image.open(form.cleaned_data["image"]).getexif()),
+            second={},
+        )
+
+    def test_png_transparency_is_kept(self):
+        form, is_valid = self.clean_image(uploaded_transparent_png())
+
+        self.assertTrue(is_valid)
+        image = Image.open(form.cleaned_data["image"])
+        self.assertEqual(first=image.mode, second="P")
+        self.assertEqual(first=image.info.get("transparency"), second=0)
+        self.assertEqual(
+            first=image.convert("RGBA").getpixel((0, 0))[3], second=0,
+        )
+
+    @mock.patch("posts.uploads.POST_IMAGE_MAX_BYTES", 100)
+    def test_too_large_file_is_rejected(self):
+        form, is_valid = self.clean_image(uploaded_jpeg(size=(64, 64)))
+
+        self.assertFalse(is_valid)
+        self.assertEqual(
+            first=form.errors.as_data()["image"][0].code,
+            second="file_too_large",
+        )
+
+    @mock.patch("posts.uploads.POST_IMAGE_MAX_PIXELS", 1000)
+    def test_too_many_pixels_are_rejected(self):
+        form, is_valid = self.clean_image(uploaded_jpeg(size=(100, 100)))
+
+        self.assertFalse(is_valid)
+        self.assertEqual(
+            first=form.errors.as_data()["image"][0].code,
+            second="image_too_large",
+        )
+
+    def test_gif_is_kept_as_is(self):
+        upload = uploaded_gif()
+        form, is_valid = self.clean_image(upload)
+
+        self.assertTrue(is_valid)
+        self.assertIs(form.cleaned_data["image"], upload)
@@ -1,3 +1,4 @@
+import base64
 import datetime
 import shutil
 import tempfile
@@ -10,6 +11,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse_lazy
 
+from ..constants import POSTS_PER_PAGE
 from ..forms import CommentForm, PostForm
 from ..models import Comment, Follow, Group, Post
 
@@ -781,3 +783,73 @@ class PostsModelsCreationTests(TestCase):
             first=authorized_response.status_code,
             second=HTTPStatus.OK,
         )
+
+
+def raw_cursor(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+class KeysetCursorViewsTests(TestCase):
+    """Набор тестов для проверки устаревших и подделанных курсоров"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(slug="test_slug")
+        cls.user = User.objects.create_user(username="test_username")
+        Post.objects.bulk_create(
+            Post(text=f"Пост {i}", author=cls.user, group=cls.group)
+            for i in range(POSTS_PER_PAGE + 1)
+        )
+        cls.urls = (
+            reverse_lazy(viewname="posts:index"),
+            reverse_lazy(viewname="posts:group_posts",
+                         kwargs={"slug": cls.group.slug}),
+            reverse_lazy(viewname="posts:profile",
+                         kwargs={"username": cls.user.username}),
+        )
+        cls.first_page = list(
+            Post.objects.order_by("-created", "-pk")[:POSTS_PER_PAGE],
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cursor_past_the_ends_shows_first_page(self):
+        cursors = (
+            raw_cursor("n|0001-01-01T00:00:00-12:00|1"),
+            raw_cursor("p|9999-12-31T23:59:59.999999+14:00|1"),
+        )
+        for url in self.urls:
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.client.get(
+                        path=url, data={"cursor": cursor},
+                    )
+                    self.assertEqual(
+                        first=response.status_code, second=HTTPStatus.OK,
+                    )
+                    page = response.context["page_obj"]
+                    self.assertEqual(first=list(page), second=self.first_page)
+                    self.assertFalse(page.has_previous())
+
+    def test_out_of_range_cursor_is_ignored(self):
+        cursors = (
+            raw_cursor("n|2020-01-01T00:00:00+00:00|99999999999999999999999"),
+            raw_cursor("n|0001-01-01T00:00:00+14:00|1"),
+        )
+        for url in self.urls:
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.client.get(
+                        path=url, data={"cursor": cursor},
+                    )
+                    self.assertEqual(
+                        first=response.status_code, second=HTTPStatus.OK,
+                    )
+                    self.assertEqual(
+                        first=list(response.context["page_obj"]),
+                        second=self.first_page,
+                    )
@@ -0,0 +1,189 @@
+"""
+Фоновая подготовка миниатюр картинок постов.
+
+Шаблоны строят миниатюры через {% thumbnail %}, и без подготовки
+первый просмотр страницы после загрузки картинки декодирует
+и ужимает её прямо в запросе. Поэтому после сохранения картинки
+все размеры из THUMBNAIL_GEOMETRIES строятся заранее в пуле потоков,
+там же строятся адаптивные варианты картинки (см. posts.images).
+Имя и размеры миниатюры для карточек сохраняются в самом посте,
+так что при выводе страницы постов хранилище миниатюр не нужно.
+Задачи ставятся только после фиксации транзакции и живут в памяти
+процесса. Очередью, которая переживает перезапуск, служит сама
+таблица постов: пост с картинкой без миниатюры ещё не обработан,
+и такие посты достраивает команда generate_thumbnails.
+При THUMBNAILS_ASYNC = False (в тестах) задача выполняется сразу
+после фиксации транзакции в том же потоке.
+
+Время построения миниатюр пишет в метрику THUMBNAIL_SECONDS
+бэкенд MeasuredThumbnailBackend (settings.THUMBNAIL_BACKEND):
+только когда миниатюра действительно строится, а не находится
+в хранилище ключей sorl-thumbnail.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextvars import ContextVar
+
+from core.metrics import THUMBNAIL_SECONDS
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+
+from .constants import THUMBNAIL_GEOMETRIES, THUMBNAIL_WORKERS
+from .images import build_image_variants
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnails",
+)
+_pending = set()
+_pending_lock = threading.Lock()
+
+# кто строит миниатюру: prepare - подготовка после загрузки,
+# request - вывод страницы, для которой миниатюра ещё не готова
+_source: ContextVar = ContextVar("thumbnail_source", default="request")
+_created: ContextVar = ContextVar("thumbnail_created", default=None)
+
+
+class MeasuredThumbnailBackend(ThumbnailBackend):
+    """
+    Бэкенд sorl-thumbnail, который замеряет построение миниатюры
+    вместе с чтением оригинала. Найденные готовыми не замеряются.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        created = [False]
+        token = _created.set(created)
+        started = time.perf_counter()
+        try:
+            return super().get_thumbnail(file_, geometry_string, **options)
+        finally:
+            _created.reset(token)
+            if created[0]:
+                THUMBNAIL_SECONDS.labels(_source.get()).observe(
+                    time.perf_counter() - started,
+                )
+
+    def _create_thumbnail(self, *args, **kwargs):
+        created = _created.get()
+        if created is not None:
+            created[0] = True
+        return super()._create_thumbnail(*args, **kwargs)
+
+
+def generate_thumbnails(image) -> list:
+    """
+    Строит все миниатюры картинки, которые понадобятся шаблонам,
+    и возвращает их в порядке THUMBNAIL_GEOMETRIES.
+    """
+
+    token = _source.set("prepare")
+    try:
+        return [
+            get_thumbnail(image, geometry, **options)
+            for geometry, options in THUMBNAIL_GEOMETRIES
+        ]
+    finally:
+        _source.reset(token)
+
+
+def prepare_post_image(post) -> None:
+    """
+    Строит миниатюры и варианты картинки поста
+    и запоминает в посте всё, что нужно для их вывода.
+    """
+
+    image_name = post.image.name
+    thumbnail = generate_thumbnails(post.image)[0]
+    formats = build_image_variants(post)
+
+    # пока всё строилось, картинку могли заменить
+    if not Post.objects.filter(pk=post.pk, image=image_name).exists():
+        return
+    post.thumbnail = thumbnail.name
+    post.thumbnail_width = thumbnail.width
+    post.thumbnail_height = thumbnail.height
+    post.image_formats = ",".join(formats)
+    post.save(update_fields=[
+        "thumbnail", "thumbnail_width", "thumbnail_height",
+        "image_formats", "updated",
+    ])
+
+
+def card_thumbnail(post):
+    """
+    Миниатюра картинки поста для карточек: url, width и height.
+    Сохранённая в посте берётся без обращений к хранилищу миниатюр,
+    иначе миниатюра ищется или строится обычным путём sorl-thumbnail.
+    """
+
+    if not post.image:
+        return None
+    if post.thumbnail:
+        return {
+            "url": default.storage.url(post.thumbnail),
+            "width": post.thumbnail_width,
+            "height": post.thumbnail_height,
+        }
+
+    geometry, options = THUMBNAIL_GEOMETRIES[0]
+    try:
+        thumbnail = get_thumbnail(post.image, geometry, **options)
+    except Exception:
+        logger.exception("Не удалось построить миниатюру поста %s", post.pk)
+        return None
+    # у миниатюры пропавшего оригинала размеров нет
+    width, height = thumbnail.size or (None, None)
+    return {"url": thumbnail.url, "width": width, "height": height}
+
+
+def _prepare_post(post_id) -> None:
+    try:
+        post = Post.objects.filter(pk=post_id).first()
+        if post is not None and post.image:
+            prepare_post_image(post)
+    except Exception:
+        logger.exception("Не удалось построить миниатюры поста %s", post_id)
+
+
+def _generate_in_background(post_id) -> None:
+    try:
+        _prepare_post(post_id)
+    finally:
+        close_old_connections()
+
+
+def _forget(future) -> None:
+    with _pending_lock:
+        _pending.discard(future)
+
+
+def _submit(post_id) -> None:
+    if not settings.THUMBNAILS_ASYNC:
+        _prepare_post(post_id)
+        return
+    future = _executor.submit(_generate_in_background, post_id)
+    with _pending_lock:
+        _pending.add(future)
+    future.add_done_callback(_forget)
+
+
+def schedule_thumbnails(post) -> None:
+    """Ставит в очередь построение миниатюр картинки поста."""
+
+    if post.image:
+        transaction.on_commit(lambda: _submit(post.pk))
+
+
+def wait_for_thumbnails(timeout=None) -> None:
+    """Дожидается всех поставленных в очередь задач этого процесса."""
+
+    with _pending_lock:
+        pending = list(_pending)
+    wait(pending, timeout=timeout)
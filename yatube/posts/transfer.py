@@ -0,0 +1,428 @@
+"""
+Выгрузка и загрузка сообществ, постов, комментариев и подписок
+в файлы JSONL, CSV и Parquet для переноса между экземплярами сайта.
+
+Файлы читаются и пишутся потоком, пачками по batch_size строк,
+поэтому расход памяти не зависит от объёма данных.
+На пользователей файлы ссылаются по username (недостающие заводятся
+без пароля), на сообщества - по slug, на посты - по id.
+
+Загрузка идёт через bulk_create в обход сигналов моделей,
+поэтому счётчики, ленты подписок, поисковый индекс и кэш страниц
+пересчитываются один раз в конце (rebuild_derived_data). Если
+загрузки шли с --skip-rebuild, в конце нужен полный пересчёт командой
+rebuild_derived_data (rebuild_all_derived_data).
+"""
+
+import csv
+import datetime
+import json
+import os
+from contextlib import contextmanager
+from itertools import islice
+
+from core.cache import bump_versions
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import GROUPS_PAGES_SCOPE, INDEX_PAGE_SCOPE, USERS_PAGES_SCOPE
+from .constants import TRANSFER_BATCH_SIZE
+from .counters import rebuild_counters
+from .feeds import rebuild_feeds
+from .helpers import count_cache_key
+from .models import Comment, Follow, Group, Post
+from .search import is_supported, rebuild_index
+
+User = get_user_model()
+
+FORMATS: dict = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".parquet": "parquet",
+}
+
+MODELS: dict = {
+    "group": Group,
+    "post": Post,
+    "comment": Comment,
+    "follow": Follow,
+}
+
+# колонки файла и поля, из которых они выгружаются
+COLUMNS: dict = {
+    "group": {
+        "id": "pk",
+        "slug": "slug",
+        "title": "title",
+        "description": "description",
+    },
+    "post": {
+        "id": "pk",
+        "created": "created",
+        "author": "author__username",
+        "group": "group__slug",
+        "text": "text",
+        "image": "image",
+    },
+    "comment": {
+        "id": "pk",
+        "created": "created",
+        "post": "post_id",
+        "author": "author__username",
+        "text": "text",
+    },
+    "follow": {
+        "id": "pk",
+        "created": "created",
+        "user": "user__username",
+        "author": "author__username",
+    },
+}
+
+USER_COLUMNS: tuple = ("user", "author")
+
+
+def guess_format(path: str):
+    """Формат файла по расширению или None, если оно незнакомо."""
+
+    return FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def batches(rows, batch_size):
+    """Разбивает поток rows на списки не длиннее batch_size."""
+
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _arrow_schema(kind: str):
+    import pyarrow
+
+    types = {
+        "id": pyarrow.int64(),
+        "post": pyarrow.int64(),
+        "created": pyarrow.timestamp("us", tz="UTC"),
+    }
+    return pyarrow.schema([
+        (column, types.get(column, pyarrow.string()))
+        for column in COLUMNS[kind]
+    ])
+
+
+def _text_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def export_rows(kind: str, batch_size: int = TRANSFER_BATCH_SIZE):
+    """Строки выгрузки в порядке id: словари {колонка: значение}."""
+
+    columns = COLUMNS[kind]
+    queryset = MODELS[kind].objects.order_by("pk").values_list(
+        *columns.values(),
+    )
+    for values in queryset.iterator(chunk_size=batch_size):
+        yield dict(zip(columns, values))
+
+
+def write_file(path: str, file_format: str, kind: str,
+               batch_size: int = TRANSFER_BATCH_SIZE) -> int:
+    """Выгружает все объекты kind в файл. Возвращает число строк."""
+
+    rows = export_rows(kind, batch_size)
+    written = 0
+
+    if file_format == "parquet":
+        import pyarrow
+        import pyarrow.parquet
+
+        schema = _arrow_schema(kind)
+        with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+            for batch in batches(rows, batch_size):
+                writer.write_table(
+                    pyarrow.Table.from_pylist(batch, schema=schema),
+                )
+                written += len(batch)
+        return written
+
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        if file_format == "csv":
+            writer = csv.DictWriter(file, fieldnames=list(COLUMNS[kind]))
+            writer.writeheader()
+        for row in rows:
+            row = {
+                column: _text_value(value) for column, value in row.items()
+            }
+            if file_format == "csv":
+                writer.writerow(row)
+            else:
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            written += 1
+    return written
+
+
+def read_rows(path: str, file_format: str,
+              batch_size: int = TRANSFER_BATCH_SIZE):
+    """Строки файла по одной: словари {колонка: значение}."""
+
+    if file_format == "parquet":
+        import pyarrow.parquet
+
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+        return
+
+    with open(path, encoding="utf-8", newline="") as file:
+        if file_format == "csv":
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _empty_to_none(value):
+    return None if value in ("", None) else value
+
+
+def _parse_created(value):
+    value = _empty_to_none(value)
+    if value is None:
+        return timezone.now()
+    if not isinstance(value, datetime.datetime):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f"Непонятная дата: {value}")
+        value = parsed
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.utc)
+    return value
+
+
+def _user_ids(usernames) -> dict:
+    """
+    id пользователей по username.
+    Недостающих пользователей заводит без пароля.
+    """
+
+    user_ids = dict(
+        User.objects.filter(
+            username__in=usernames,
+        ).values_list("username", "pk")
+    )
+    missing = set(usernames) - set(user_ids)
+    if missing:
+        User.objects.bulk_create([
+            User(username=username, password=make_password(None))
+            for username in missing
+        ])
+        user_ids.update(
+            User.objects.filter(
+                username__in=missing,
+            ).values_list("username", "pk")
+        )
+    return user_ids
+
+
+def _group_ids(slugs) -> dict:
+    group_ids = dict(
+        Group.objects.filter(slug__in=slugs).values_list("slug", "pk")
+    )
+    missing = set(slugs) - set(group_ids)
+    if missing:
+        raise ValueError(
+            f"Нет сообществ со слагами: {', '.join(sorted(missing))}",
+        )
+    return group_ids
+
+
+def _to_int(value):
+    return None if value is None else int(value)
+
+
+def _to_text(value):
+    return "" if value is None else value
+
+
+def _build_objects(kind: str, batch: list) -> list:
+    """Несохранённые объекты модели kind из пачки строк файла."""
+
+    batch = [
+        {column: _empty_to_none(row.get(column)) for column in COLUMNS[kind]}
+        for row in batch
+    ]
+    user_ids = _user_ids({
+        row[column]
+        for row in batch for column in USER_COLUMNS
+        if row.get(column) is not None
+    })
+    group_ids = {} if kind == "group" else _group_ids({
+        row["group"] for row in batch if row.get("group") is not None
+    })
+
+    # колонка файла: (поле модели, преобразование значения)
+    fields = {
+        "id": ("id", _to_int),
+        "post": ("post_id", _to_int),
+        "created": ("created", _parse_created),
+        "user": ("user_id", user_ids.get),
+        "author": ("author_id", user_ids.get),
+        "image": ("image", lambda name: name),
+    }
+    if kind != "group":
+        fields["group"] = ("group_id", group_ids.get)
+
+    objects = []
+    for row in batch:
+        values = {}
+        for column, value in row.items():
+            field, convert = fields.get(column, (column, _to_text))
+            values[field] = convert(value)
+        objects.append(MODELS[kind](**values))
+    return objects
+
+
+@contextmanager
+def keep_created(model):
+    """
+    Не даёт auto_now_add затереть дату создания из файла:
+    bulk_create подставляет текущее время в такие поля.
+    """
+
+    try:
+        field = model._meta.get_field("created")
+    except FieldDoesNotExist:
+        yield
+        return
+
+    auto_now_add = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = auto_now_add
+
+
+def reset_sequences(*models) -> None:
+    """
+    Сдвигает последовательности первичных ключей за строки,
+    вставленные со своими id (нужно в PostgreSQL).
+    """
+
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+class ImportSummary:
+    """Сколько строк загружено и чьи данные затронуты загрузкой."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.count = 0
+        self.author_ids = set()
+        self.group_ids = set()
+
+    def add(self, objects) -> None:
+        self.count += len(objects)
+        for obj in objects:
+            if self.kind in ("post", "follow"):
+                self.author_ids.add(obj.author_id)
+            if self.kind == "post" and obj.group_id is not None:
+                self.group_ids.add(obj.group_id)
+
+
+def import_file(path: str, file_format: str, kind: str,
+                batch_size: int = TRANSFER_BATCH_SIZE) -> ImportSummary:
+    """
+    Загружает объекты kind из файла одной транзакцией.
+    Производные данные не пересчитывает, см. rebuild_after_import.
+    """
+
+    model = MODELS[kind]
+    summary = ImportSummary(kind)
+
+    with transaction.atomic(), keep_created(model):
+        rows = read_rows(path, file_format, batch_size)
+        for batch in batches(rows, batch_size):
+            objects = _build_objects(kind, batch)
+            model.objects.bulk_create(objects, batch_size=batch_size)
+            summary.add(objects)
+
+        reset_sequences(model)
+
+    return summary
+
+
+def rebuild_derived_data(author_ids, group_ids, search: bool) -> None:
+    """
+    Пересчитывает то, что при обычном сохранении обновляют сигналы:
+    счётчики, ленты подписчиков авторов author_ids, поисковый индекс
+    (если search) и закэшированные количества постов и страницы.
+    author_ids и group_ids обходятся дважды, поэтому итераторы не годятся.
+    """
+
+    rebuild_counters()
+    rebuild_feeds(author_ids)
+    if search and is_supported():
+        rebuild_index()
+
+    for group_ids_batch in batches(group_ids, TRANSFER_BATCH_SIZE):
+        cache.delete_many(
+            [count_cache_key("group", pk) for pk in group_ids_batch],
+        )
+    for author_ids_batch in batches(author_ids, TRANSFER_BATCH_SIZE):
+        follower_ids = Follow.objects.filter(
+            author_id__in=author_ids_batch,
+        ).values_list("user_id", flat=True).distinct()
+        cache.delete_many([
+            *(count_cache_key("author", pk) for pk in author_ids_batch),
+            *(count_cache_key("feed", pk) for pk in follower_ids),
+        ])
+    cache.delete(count_cache_key("all"))
+
+    # от этих областей зависят все страницы сайта
+    bump_versions(INDEX_PAGE_SCOPE, GROUPS_PAGES_SCOPE, USERS_PAGES_SCOPE)
+
+
+def rebuild_all_derived_data() -> None:
+    """
+    Полный пересчёт производных данных для всех авторов и сообществ:
+    после нескольких загрузок без пересчёта, когда неизвестно,
+    чьи данные они затронули.
+    """
+
+    rebuild_derived_data(
+        author_ids=list(
+            User.objects.order_by("pk").values_list("pk", flat=True),
+        ),
+        group_ids=list(
+            Group.objects.order_by("pk").values_list("pk", flat=True),
+        ),
+        search=True,
+    )
+
+
+def rebuild_after_import(summary: ImportSummary) -> None:
+    """Пересчитывает производные данные после import_file."""
+
+    rebuild_derived_data(
+        author_ids=sorted(summary.author_ids),
+        group_ids=sorted(summary.group_ids),
+        search=summary.kind in ("post", "comment"),
+    )
@@ -0,0 +1,98 @@
+"""
+Проверка и подготовка картинок, загружаемых к постам.
+
+Загрузки больше FILE_UPLOAD_MAX_MEMORY_SIZE Django пишет на диск
+кусками, и дальше картинка читается оттуда. Размер файла и размеры
+картинки проверяются по заголовку, до декодирования. Слишком большие
+оригиналы уменьшаются до POST_IMAGE_MAX_SIDE; JPEG при этом
+декодируется сразу в уменьшенном масштабе (draft). Все картинки,
+кроме GIF, пересохраняются без метаданных (EXIF с геопозицией и т. п.),
+с поворотом из EXIF, применённым к самим пикселям.
+"""
+
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+from .constants import (POST_IMAGE_FORMATS, POST_IMAGE_KEPT_INFO,
+                        POST_IMAGE_MAX_BYTES, POST_IMAGE_MAX_PIXELS,
+                        POST_IMAGE_MAX_SIDE, POST_IMAGE_SAVE_OPTIONS)
+
+
+def validate_image_upload(upload) -> None:
+    """Проверяет размер файла, формат и размеры картинки по заголовку."""
+
+    if upload.size > POST_IMAGE_MAX_BYTES:
+        raise ValidationError(
+            "Файл больше %(limit)s.",
+            code="file_too_large",
+            params={"limit": filesizeformat(POST_IMAGE_MAX_BYTES)},
+        )
+
+    upload.seek(0)
+    with Image.open(upload) as image:
+        image_format, (width, height) = image.format, image.size
+    upload.seek(0)
+
+    if image_format not in POST_IMAGE_FORMATS:
+        raise ValidationError(
+            "Формат %(format)s не поддерживается.",
+            code="invalid_image_format",
+            params={"format": image_format},
+        )
+    if width * height > POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            "Картинка %(width)s×%(height)s слишком большая.",
+            code="image_too_large",
+            params={"width": width, "height": height},
+        )
+
+
+def prepare_image_upload(upload):
+    """
+    Уменьшает слишком большую картинку и убирает из неё метаданные.
+    Возвращает новый файл с тем же именем; GIF возвращается как есть,
+    чтобы не потерять анимацию.
+    """
+
+    upload.seek(0)
+    image = Image.open(upload)
+    image_format = image.format
+    if image_format == "GIF":
+        upload.seek(0)
+        return upload
+
+    max_size = (POST_IMAGE_MAX_SIDE, POST_IMAGE_MAX_SIDE)
+    if image_format == "JPEG":
+        image.draft("RGB", max_size)
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(max_size, Image.LANCZOS)
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    # часть кодеков Pillow пересохраняет метаданные из info,
+    # оставляем только цветовой профиль и прозрачность
+    options = dict(POST_IMAGE_SAVE_OPTIONS.get(image_format, {}))
+    if image.info.get("icc_profile"):
+        options["icc_profile"] = image.info["icc_profile"]
+    image.info = {
+        key: value for key, value in image.info.items()
+        if key in POST_IMAGE_KEPT_INFO
+    }
+
+    output = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+    )
+    image.save(output, format=image_format, **options)
+    size = output.tell()
+    output.seek(0)
+
+    return UploadedFile(
+        file=output,
+        name=upload.name,
+        content_type=upload.content_type,
+        size=size,
+    )
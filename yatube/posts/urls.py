@@ -41,6 +41,12 @@ urlpatterns = [
         name="post_detail",
     ),
 
+    path(
+        route="search/",
+        view=views.search,
+        name="search",
+    ),
+
     path(
         route="create/",
         view=views.post_create,
@@ -1,20 +1,29 @@
+from core.cache import cache_page_versioned, conditional_page
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
-from django.views.decorators.cache import cache_page
 from django.views.decorators.http import require_POST
 
+from .cache import (group_page_scopes, index_page_scopes, post_page_scopes,
+                    profile_page_scopes)
 from .constants import CACHE_TIMEOUT_SECONDS
+from .feeds import feed_posts
 from .forms import CommentForm, PostForm
-from .helpers import paginate
+from .helpers import count_cache_key, paginate
 from .models import Follow, Group, Post
+from .search import SearchResults
 
 User = get_user_model()
 
 
-@cache_page(timeout=CACHE_TIMEOUT_SECONDS, key_prefix="index_page")
+@conditional_page(scopes=index_page_scopes)
+@cache_page_versioned(
+    timeout=CACHE_TIMEOUT_SECONDS,
+    key_prefix="index_page",
+    scopes=index_page_scopes,
+)
 def index(request: HttpRequest) -> HttpResponse:
     """
     Главная страница.
@@ -28,7 +37,12 @@ def index(request: HttpRequest) -> HttpResponse:
         request=request,
         template_name="posts/index.html",
         context={
-            "page_obj": paginate(request=request, queryset=posts),
+            "page_obj": paginate(
+                request=request,
+                queryset=posts,
+                keyset=True,
+                count_key=count_cache_key("all"),
+            ),
         },
     )
 
@@ -41,19 +55,27 @@ def follow_index(request: HttpRequest) -> HttpResponse:
     на которых подписан пользователь.
     """
 
-    posts = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related("author", "group")
+    posts = feed_posts(user=request.user).select_related("author", "group")
 
     return render(
         request=request,
         template_name="posts/follow.html",
         context={
-            "page_obj": paginate(request=request, queryset=posts),
+            "page_obj": paginate(
+                request=request,
+                queryset=posts,
+                count_key=count_cache_key("feed", request.user.pk),
+            ),
         },
     )
 
 
+@conditional_page(scopes=group_page_scopes)
+@cache_page_versioned(
+    timeout=CACHE_TIMEOUT_SECONDS,
+    key_prefix="group_page",
+    scopes=group_page_scopes,
+)
 def group_posts(request: HttpRequest, slug: str) -> HttpResponse:
     """
     Страница Сообщества (объекта Group).
@@ -68,11 +90,22 @@ def group_posts(request: HttpRequest, slug: str) -> HttpResponse:
         template_name="posts/group_list.html",
         context={
             "group": group,
-            "page_obj": paginate(request=request, queryset=posts),
+            "page_obj": paginate(
+                request=request,
+                queryset=posts,
+                keyset=True,
+                count_key=count_cache_key("group", group.pk),
+            ),
         }
     )
 
 
+@conditional_page(scopes=profile_page_scopes)
+@cache_page_versioned(
+    timeout=CACHE_TIMEOUT_SECONDS,
+    key_prefix="profile_page",
+    scopes=profile_page_scopes,
+)
 def profile(request: HttpRequest, username: str) -> HttpResponse:
     """
     Страница Пользователя (объекта User).
@@ -80,7 +113,9 @@ def profile(request: HttpRequest, username: str) -> HttpResponse:
     Посты идут в порядке убывания даты публикации.
     """
 
-    author = get_object_or_404(klass=User, username=username)
+    author = get_object_or_404(
+        klass=User.objects.select_related("stats"), username=username,
+    )
     posts = author.posts.select_related("group").all()
 
     following = request.user.is_authenticated and Follow.objects.filter(
@@ -93,16 +128,22 @@ def profile(request: HttpRequest, username: str) -> HttpResponse:
         context={
             "author": author,
             "following": following,
-            "page_obj": paginate(request=request, queryset=posts),
+            "page_obj": paginate(
+                request=request,
+                queryset=posts,
+                keyset=True,
+                count_key=count_cache_key("author", author.pk),
+            ),
         }
     )
 
 
+@conditional_page(scopes=post_page_scopes)
 def post_detail(request: HttpRequest, post_id: int) -> HttpResponse:
     """Страница отдельного поста (объекта Post)."""
 
     post = get_object_or_404(
-        klass=Post.objects.select_related("author", "group"),
+        klass=Post.objects.select_related("author__stats", "group"),
         id=post_id,
     )
     form = CommentForm()
@@ -119,6 +160,27 @@ def post_detail(request: HttpRequest, post_id: int) -> HttpResponse:
     )
 
 
+def search(request: HttpRequest) -> HttpResponse:
+    """
+    Поиск по постам и комментариям под ними.
+    Найденные посты идут по убыванию релевантности.
+    """
+
+    query = request.GET.get("q", "").strip()
+
+    return render(
+        request=request,
+        template_name="posts/search.html",
+        context={
+            "query": query,
+            "page_obj": paginate(
+                request=request,
+                queryset=SearchResults(query),
+            ),
+        },
+    )
+
+
 # TODO fix redirection target after login
 @login_required
 def post_create(request: HttpRequest) -> HttpResponse:
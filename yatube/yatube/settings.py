@@ -50,10 +50,12 @@ INSTALLED_APPS = [
     "core.apps.CoreConfig",
     "django_extensions",
     "sorl.thumbnail",
-    "debug_toolbar",
 ]
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
+    "core.profiling.ProfilingMiddleware",
+    "core.slow_queries.SlowQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -61,9 +63,13 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
+# панель отладки только для разработки: она замедляет каждый запрос
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
@@ -95,17 +101,40 @@ WSGI_APPLICATION = "yatube.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# журнал WAL, PRAGMA и проверка соединений - см. core.backends.sqlite3;
+# соединение живёт между запросами до CONN_MAX_AGE секунд
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "core.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        "CONN_MAX_AGE": 60,
+        "OPTIONS": {
+            "PRAGMAS": {},
+            "HEALTH_CHECK": True,
+        },
     }
 }
 
+# default - небольшой LRU-кэш в памяти процесса поверх общего кэша shared.
+# В продакшене shared стоит перевести на Redis или memcached:
+# файловый кэш не делает add атомарным между процессами.
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-    }
+        "BACKEND": "core.backends.tiered.TieredCache",
+        "OPTIONS": {
+            "L2_CACHE": "shared",
+            "MAX_ENTRIES": 1000,
+            "L1_TIMEOUT": 5,
+            "SYNC_INTERVAL": 1,
+        },
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(BASE_DIR, "cache"),
+        # при переполнении кэш вытесняет случайные записи, в том числе
+        # версии областей и журнал TieredCache, поэтому запас большой
+        "OPTIONS": {"MAX_ENTRIES": 100_000},
+    },
 }
 
 
@@ -160,3 +189,73 @@ CSRF_FAILURE_VIEW = "core.views.csrf_failure_403"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
+# номер выкладки входит в ETag и ключи кэша страниц (core.cache),
+# чтобы после смены шаблонов не отдавались страницы старой сборки
+RELEASE = os.environ.get("YATUBE_RELEASE", "dev")
+
+# адреса, с которых Prometheus забирает /metrics; остальным, кроме
+# сотрудников, отвечается 403. За обратным прокси REMOTE_ADDR - адрес
+# прокси, поэтому его сюда не вносят, а /metrics снаружи закрывают
+# на самом прокси и собирают метрики напрямую с gunicorn
+METRICS_ALLOWED_IPS = []
+
+# бэкенд sorl-thumbnail, который пишет время построения миниатюр в метрики
+THUMBNAIL_BACKEND = "posts.thumbnails.MeasuredThumbnailBackend"
+
+# миниатюры строятся в фоновых потоках (см. posts.thumbnails)
+THUMBNAILS_ASYNC = True
+
+# загрузки больше этого размера пишутся во временный файл на диске
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# доля запросов, которые замеряет core.profiling.ProfilingMiddleware,
+# и сколько последних замеров хранить в памяти процесса
+PROFILING_SAMPLE_RATE = 0.01
+PROFILING_BUFFER_SIZE = 1000
+# пик памяти замеряется через tracemalloc, который замедляет
+# все аллокации процесса, поэтому включается только на время разбора
+PROFILING_TRACE_MEMORY = False
+
+# SQL-запросы дольше порога пишутся в журнал с планом выполнения,
+# сводку по нему печатает команда slow_query_report
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_LOG_FILE = os.path.join(BASE_DIR, "slow_queries.log")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "message": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "profiling": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": os.path.join(BASE_DIR, "profiling.log"),
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            "delay": True,
+            "formatter": "message",
+        },
+        "slow_queries": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": SLOW_QUERY_LOG_FILE,
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            "delay": True,
+            "formatter": "message",
+        },
+    },
+    "loggers": {
+        "core.profiling": {
+            "handlers": ["profiling"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "core.slow_queries": {
+            "handlers": ["slow_queries"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
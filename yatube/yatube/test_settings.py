@@ -0,0 +1,19 @@
+"""
+Настройки для тестов и бенчмарков: всё как в settings.py,
+но без общего кэша на диске разработчика и без фоновых потоков.
+"""
+
+from .settings import *  # noqa: F401, F403
+from .settings import CACHES
+
+CACHES = {
+    **CACHES,
+    "shared": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "shared",
+        "OPTIONS": {"MAX_ENTRIES": 100_000},
+    },
+}
+
+# миниатюры строятся сразу, чтобы потоки не писали в базу между тестами
+THUMBNAILS_ASYNC = False
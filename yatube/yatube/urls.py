@@ -15,17 +15,24 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path("blog/", include("blog.urls"))
 """
 
-import debug_toolbar
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import metrics, profiling_report
+
 urlpatterns = [
     path(route="", view=include(arg="posts.urls", namespace="posts")),
     path(route="auth/", view=include(arg="users.urls", namespace="users")),
     path(route="auth/", view=include(arg="django.contrib.auth.urls")),
     path(route="about/", view=include(arg="about.urls", namespace="about")),
+    path(route="metrics", view=metrics, name="metrics"),
+    path(
+        route="admin/profiling/",
+        view=profiling_report,
+        name="profiling_report",
+    ),
     path(route="admin/", view=admin.site.urls, name="admin"),
 ]
 
@@ -38,6 +45,8 @@ handler404 = "core.views.not_found_404"
 handler500 = "core.views.internal_server_error_500"
 
 if settings.DEBUG:
+    import debug_toolbar
+
     urlpatterns += static(
         settings.MEDIA_URL,
         document_root=settings.MEDIA_ROOT,